@@ -26,6 +26,7 @@ class Agent(WorldObject):
         MoveMode.SWIM: 1.0,
         MoveMode.CLIMB: 1.0,
     }
+    RADIUS: float = 0.25  # tiles, footprint against obstacles (see collision.CollisionResolver)
 
     def __init__(self, x: float = 0, y: float = 0, base_speed: float = 1.0):
         super().__init__(x, y)
@@ -35,6 +36,10 @@ class Agent(WorldObject):
         self.base_speed:float = base_speed
         self.move_mode = self.NATURAL_MOVE_MODE
         self.move_mode_factor:dict[MoveMode,float] = self.MOVE_MULTIPLIERS
+        # mode the current path planned for the segment under way (see MoveCommand), None if unplanned
+        self.path_mode: MoveMode | None = None
+        # slowed down by the agents around it on the last tick (see collision.CrowdAvoidance)
+        self.crowded: bool = False
 
         self.world: World | None = World.get_instance()
 
@@ -54,17 +59,20 @@ class Agent(WorldObject):
     @property
     def speed(self)->float:
         mode = self.move_mode
-        # Override mode if in water or climbing terrain
-        if self.world and self.world.get_tile(int(self.x), int(self.y)).is_water:
+        if self.path_mode is not None:
+            # swimming and climbing planned by the path, walking keeps the chosen pace (walk or run)
+            if self.path_mode != self.natural_move_mode:
+                mode = self.path_mode
+        # Override mode if in water
+        elif self.world and self.world.get_tile(int(self.x), int(self.y)).is_water:
             mode = MoveMode.SWIM
-        # TODO extend for climbing type terrains
         return self.base_speed * self.move_mode_factor[mode]
 
     def speed_at(self, x:int, y:int) -> float:
         mode = self.natural_move_mode
         if self.world and self.world.get_tile(x, y).is_water:
             mode = MoveMode.SWIM
-        # TODO extend for climbing type terrains
+        # climbing depends on the slope around the tile, see pathfinder.ModeLayers
         return self.base_speed * self.move_mode_factor[mode]
 
     def set_move_mode(self, mode:MoveMode = MoveMode.WALK):
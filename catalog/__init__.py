@@ -0,0 +1,2 @@
+from .catalog import CATALOG, DataCatalog, file_hash, get
+from .hot_reload import DataWatcher
@@ -0,0 +1,190 @@
+import hashlib
+import importlib.util
+import os
+import pickle as pk
+from pathlib import Path
+from typing import Any, Callable
+
+import logging
+logger = logging.getLogger("catalog")
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+JSON_DIR = PROJECT_ROOT / "json_files"
+# the environment variable moves it, e.g. for tests that must not touch the project cache
+CATALOG_FILE = Path(os.environ.get("CATALOG_FILE", PROJECT_ROOT / "pkl_files" / "catalog.pkl"))
+# part of every cache key: bump it when the layout of the catalog file changes
+CATALOG_FORMAT = 2
+
+
+def file_hash(path: str | Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def module_file(name: str) -> Path:
+    """Source file of module 'name', without importing it (its parent packages are)."""
+    return Path(importlib.util.find_spec(name).origin)
+
+
+class DataCatalog:
+    """
+    Loads every game data set once per process.
+
+    Validated models are kept in a single binary file, each entry pickled on its own and
+    keyed by the catalog format and the hashes of its source files and of the modules
+    defining its loader and models: unchanged entries are unpickled without running
+    pydantic validation again, changed ones are re-parsed and re-cached.
+    """
+
+    def __init__(self, cache_file: str | Path = CATALOG_FILE):
+        self.cache_file = Path(cache_file)
+        self._sources: dict[str, tuple[Path, ...]] = {}
+        self._modules: dict[str, tuple[str, ...]] = {}
+        self._builders: dict[str, Callable[[], Any]] = {}
+        self._data: dict[str, Any] = {}                       # loaded this process
+        self._disk: dict[str, tuple[tuple, bytes]] | None = None  # name -> (key, pickled data)
+
+    def register(self, name: str, sources: list[str | Path], builder: Callable[[], Any],
+                 modules: list[str] | None = None):
+        """
+        Declare a data set.
+
+        Parameters:
+            sources (list): the data files it is parsed from.
+            builder (Callable): the function parsing/validating them.
+            modules (list[str]): modules of the loader and models, editing them re-parses the data set.
+        """
+        self._sources[name] = tuple(Path(p) for p in sources)
+        self._modules[name] = tuple(modules or ())
+        self._builders[name] = builder
+        self._data.pop(name, None)
+
+    def sources(self, name: str) -> tuple[Path, ...]:
+        return self._sources[name]
+
+    def hashes(self, name: str) -> tuple[str, ...]:
+        return tuple(file_hash(p) for p in self._sources[name])
+
+    def key(self, name: str) -> tuple:
+        """Cache key of a data set: catalog format, source hashes and loader/model module hashes."""
+        return (CATALOG_FORMAT, self.hashes(name), tuple(file_hash(module_file(m)) for m in self._modules[name]))
+
+    def get(self, name: str) -> Any:
+        if name in self._data:
+            return self._data[name]
+
+        key = self.key(name)
+        cached = self._load_disk().get(name)
+        data = self._unpickle(name, cached[1]) if cached is not None and cached[0] == key else None
+        if data is not None:
+            logger.info(f"Loaded '{name}' from binary catalog")
+        else:
+            logger.info(f"Parsing '{name}' from {', '.join(p.name for p in self._sources[name])}")
+            data = self._builders[name]()
+            self._store(name, key, data)
+
+        self._data[name] = data
+        return data
+
+    def reload(self, name: str) -> Any:
+        """
+        Re-parse a data set after its sources changed.
+        If parsing/validation fails the exception propagates and the previous data stays loaded.
+        """
+        key = self.key(name)
+        data = self._builders[name]()
+        self._store(name, key, data)
+        self._data[name] = data
+        return data
+
+    def invalidate(self, name: str):
+        """Forget the in-process copy, the next get() re-checks the source hashes."""
+        self._data.pop(name, None)
+
+    def _load_disk(self) -> dict:
+        if self._disk is None:
+            self._disk = {}
+            if self.cache_file.exists():
+                try:
+                    with open(self.cache_file, "rb") as f:
+                        self._disk = pk.load(f)
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable catalog {self.cache_file}: {e}")
+        return self._disk
+
+    def _unpickle(self, name: str, blob: bytes) -> Any:
+        """Data of a cached entry, None if it cannot be unpickled any more."""
+        try:
+            return pk.loads(blob)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable catalog entry '{name}': {e}")
+            return None
+
+    def _store(self, name: str, key: tuple, data: Any):
+        """Cache one entry and write the catalog; data that cannot be pickled is only dropped from it."""
+        disk = self._load_disk()
+        try:
+            disk[name] = (key, pk.dumps(data, protocol=pk.HIGHEST_PROTOCOL))
+        except (pk.PicklingError, TypeError, AttributeError) as e:
+            # AttributeError: "Can't pickle local object"
+            logger.warning(f"Not caching '{name}' in the catalog: {e}")
+            if disk.pop(name, None) is None:
+                return
+        self._save_disk()
+
+    def _save_disk(self):
+        """Write the binary catalog atomically; on failure the data stays loaded and the old file is kept."""
+        tmp = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            self.cache_file.parent.mkdir(exist_ok=True)
+            with open(tmp, "wb") as f:
+                pk.dump(self._disk, f, protocol=pk.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Could not write catalog {self.cache_file}: {e}")
+            try:
+                tmp.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+
+# ------------------- default data sets -------------------
+def _build_terrains():
+    from terrain.terrain import parse_terrains_file
+    return parse_terrains_file(JSON_DIR / "terrains_data.json")
+
+def _build_trees():
+    from tree.tree import parse_trees_file
+    return parse_trees_file(JSON_DIR / "trees.json")
+
+def _build_knowledge():
+    from knowledge_tree.knowledge_tree import KnowledgeTree
+    return KnowledgeTree.ParseTree(JSON_DIR / "knowledge.json")
+
+def _build_skills():
+    from stats.stats import parse_classes_file
+    return parse_classes_file(JSON_DIR / "stats_data.json")
+
+def _build_resources():
+    from resources import parse_resource_file
+    return parse_resource_file(JSON_DIR / "resources_data.csv")
+
+def _build_plants():
+    from plant.plant import parse_plants
+    return parse_plants(JSON_DIR / "plants_data.json", JSON_DIR / "vegetation.csv", CATALOG.get("terrains"))
+
+
+CATALOG = DataCatalog()
+CATALOG.register("terrains", [JSON_DIR / "terrains_data.json"], _build_terrains, ["terrain.terrain"])
+CATALOG.register("trees", [JSON_DIR / "trees.json"], _build_trees, ["tree.tree"])
+CATALOG.register("knowledge", [JSON_DIR / "knowledge.json"], _build_knowledge, ["knowledge_tree.knowledge_tree"])
+CATALOG.register("skills", [JSON_DIR / "stats_data.json"], _build_skills, ["stats.stats"])
+CATALOG.register("resources", [JSON_DIR / "resources_data.csv"], _build_resources, ["resources"])
+CATALOG.register("plants",
+                 [JSON_DIR / "plants_data.json", JSON_DIR / "vegetation.csv", JSON_DIR / "terrains_data.json"],
+                 _build_plants, ["plant.plant", "terrain.terrain"])
+
+
+def get(name: str) -> Any:
+    """Shortcut for CATALOG.get(name)."""
+    return CATALOG.get(name)
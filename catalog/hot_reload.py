@@ -0,0 +1,73 @@
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable
+
+from .catalog import CATALOG, DataCatalog
+
+import logging
+logger = logging.getLogger("catalog")
+
+
+class DataWatcher:
+    """
+    Polls the catalog source files and hot-reloads only the data sets whose files changed.
+
+    Subscribers get the freshly validated data and are responsible for swapping it into
+    the running game (TERRAIN_DATA, TREE_DATA, ...) and for dropping dependent caches.
+    Call poll() once per frame, it only touches the file system every `interval` seconds.
+    """
+
+    def __init__(self, catalog: DataCatalog = CATALOG, names: list[str] | None = None, interval: float = 1.0):
+        self.catalog = catalog
+        self.names = list(names) if names is not None else list(catalog._sources)
+        self.interval = interval
+        self._subscribers: dict[str, list[Callable[[Any], None]]] = defaultdict(list)
+        self._mtimes: dict[Path, float] = {path: self._mtime(path) for path in self._paths()}
+        self._last_poll = time.monotonic()
+
+    def subscribe(self, name: str, callback: Callable[[Any], None]):
+        """callback(new_data) runs after data set `name` was reloaded."""
+        self._subscribers[name].append(callback)
+
+    def _paths(self) -> set[Path]:
+        return {path for name in self.names for path in self.catalog.sources(name)}
+
+    @staticmethod
+    def _mtime(path: Path) -> float:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return 0.0
+
+    def poll(self, force: bool = False) -> list[str]:
+        """Reload changed data sets, returns their names."""
+        now = time.monotonic()
+        if not force and now - self._last_poll < self.interval:
+            return []
+        self._last_poll = now
+
+        changed = set()
+        for path in self._paths():
+            mtime = self._mtime(path)
+            if mtime != self._mtimes.get(path):
+                self._mtimes[path] = mtime
+                changed.add(path)
+        if not changed:
+            return []
+
+        reloaded = []
+        for name in self.names:
+            if not changed.intersection(self.catalog.sources(name)):
+                continue
+            try:
+                data = self.catalog.reload(name)
+            except Exception as e:
+                logger.error(f"Hot reload of '{name}' failed, keeping previous data: {e}")
+                continue
+            logger.info(f"Hot reloaded '{name}'")
+            for callback in self._subscribers[name]:
+                callback(data)
+            reloaded.append(name)
+        return reloaded
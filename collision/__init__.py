@@ -0,0 +1,2 @@
+from .collision import CollisionResolver, resolve_moves
+from .avoidance import CrowdAvoidance, orca_velocities
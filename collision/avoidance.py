@@ -0,0 +1,285 @@
+import numpy as np
+from numba import njit
+
+from agent import Agent
+
+NEIGHBOR_DIST = 2.0   # tiles, agents farther apart ignore each other; also the spatial grid cell size
+MAX_NEIGHBORS = 10    # nearest neighbors each agent avoids
+TIME_HORIZON = 1.0    # seconds ahead collisions with other agents are avoided
+EPSILON = 1e-9
+GOLDEN_ANGLE = 2.399963229728653
+
+
+@njit(cache=True, nogil=True)
+def build_grid(xs, ys, cell):
+    """
+    Uniform spatial grid over the agents, stored sparse: the agents of cell c are
+    order[k] for the k where keys[k] == c, keys sorted.
+
+    Returns:
+        (order, keys, x0, y0, columns, rows), x0, y0 the corner of cell 0.
+    """
+    x0, y0 = xs.min(), ys.min()
+    columns = int((xs.max() - x0) / cell) + 1
+    rows = int((ys.max() - y0) / cell) + 1
+    keys = np.empty(xs.shape[0], dtype=np.int64)
+    for i in range(xs.shape[0]):
+        keys[i] = int((ys[i] - y0) / cell) * columns + int((xs[i] - x0) / cell)
+    order = np.argsort(keys, kind="mergesort")
+    return order, keys[order], x0, y0, columns, rows
+
+
+@njit(cache=True, nogil=True)
+def _det(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+
+@njit(cache=True, nogil=True)
+def _lp1(px, py, dx, dy, line, radius, opt_x, opt_y, direction_opt):
+    """Best velocity on 'line' satisfying the lines before it, inside the speed circle; ok False if none."""
+    dot = px[line] * dx[line] + py[line] * dy[line]
+    discriminant = dot * dot + radius * radius - (px[line] * px[line] + py[line] * py[line])
+    if discriminant < 0.0:
+        return False, 0.0, 0.0
+    root = np.sqrt(discriminant)
+    t_left, t_right = -dot - root, -dot + root
+    for i in range(line):
+        denominator = _det(dx[line], dy[line], dx[i], dy[i])
+        numerator = _det(dx[i], dy[i], px[line] - px[i], py[line] - py[i])
+        if abs(denominator) <= EPSILON:
+            if numerator < 0.0:
+                return False, 0.0, 0.0
+            continue
+        t = numerator / denominator
+        if denominator >= 0.0:
+            t_right = min(t_right, t)
+        else:
+            t_left = max(t_left, t)
+        if t_left > t_right:
+            return False, 0.0, 0.0
+    if direction_opt:
+        t = t_right if opt_x * dx[line] + opt_y * dy[line] > 0.0 else t_left
+    else:
+        t = min(max(dx[line] * (opt_x - px[line]) + dy[line] * (opt_y - py[line]), t_left), t_right)
+    return True, px[line] + t * dx[line], py[line] + t * dy[line]
+
+
+@njit(cache=True, nogil=True)
+def _lp2(px, py, dx, dy, count, radius, opt_x, opt_y, direction_opt):
+    """
+    Velocity closest to opt (or furthest along it with direction_opt) on the left of the
+    'count' lines and inside the speed circle.
+
+    Returns:
+        (index of the first line that could not be satisfied or count, vx, vy)
+    """
+    if direction_opt:
+        vx, vy = opt_x * radius, opt_y * radius
+    elif opt_x * opt_x + opt_y * opt_y > radius * radius:
+        norm = np.hypot(opt_x, opt_y)
+        vx, vy = opt_x / norm * radius, opt_y / norm * radius
+    else:
+        vx, vy = opt_x, opt_y
+    for i in range(count):
+        if _det(dx[i], dy[i], px[i] - vx, py[i] - vy) > 0.0:
+            ok, nx, ny = _lp1(px, py, dx, dy, i, radius, opt_x, opt_y, direction_opt)
+            if not ok:
+                return i, vx, vy
+            vx, vy = nx, ny
+    return count, vx, vy
+
+
+@njit(cache=True, nogil=True)
+def _lp3(px, py, dx, dy, count, begin, radius, vx, vy):
+    """Infeasible: velocity minimizing the largest violation of the lines from 'begin' on."""
+    qx, qy = np.empty(count), np.empty(count)
+    ex, ey = np.empty(count), np.empty(count)
+    distance = 0.0
+    for i in range(begin, count):
+        if _det(dx[i], dy[i], px[i] - vx, py[i] - vy) <= distance:
+            continue
+        projected = 0
+        for j in range(i):
+            determinant = _det(dx[i], dy[i], dx[j], dy[j])
+            if abs(determinant) <= EPSILON:
+                if dx[i] * dx[j] + dy[i] * dy[j] > 0.0:
+                    continue  # same direction
+                pointx, pointy = 0.5 * (px[i] + px[j]), 0.5 * (py[i] + py[j])
+            else:
+                t = _det(dx[j], dy[j], px[i] - px[j], py[i] - py[j]) / determinant
+                pointx, pointy = px[i] + t * dx[i], py[i] + t * dy[i]
+            dirx, diry = dx[j] - dx[i], dy[j] - dy[i]
+            norm = np.hypot(dirx, diry)
+            qx[projected], qy[projected] = pointx, pointy
+            ex[projected], ey[projected] = dirx / norm, diry / norm
+            projected += 1
+        failed, nx, ny = _lp2(qx, qy, ex, ey, projected, radius, -dy[i], dx[i], True)
+        if failed == projected:
+            vx, vy = nx, ny
+        distance = _det(dx[i], dy[i], px[i] - vx, py[i] - vy)
+    return vx, vy
+
+
+@njit(cache=True, nogil=True)
+def orca_velocities(xs, ys, vxs, vys, radii, max_speeds, dt, neighbor_dist, max_neighbors, time_horizon,
+                    out_vx, out_vy):
+    """
+    Optimal reciprocal collision avoidance: each agent takes the velocity closest to its preferred
+    one (vxs, vys) outside the velocity obstacles of its nearest neighbors, every pair sharing the
+    avoidance half and half. Agents already overlapping separate within 'dt'.
+
+    Returns:
+        Number of agents whose velocity changed, new velocities in out_vx, out_vy.
+    """
+    n = xs.shape[0]
+    order, keys, x0, y0, columns, rows = build_grid(xs, ys, neighbor_dist)
+    inv_tau = 1.0 / time_horizon
+    changed = 0
+
+    near = np.empty(max_neighbors, dtype=np.int64)
+    near_d2 = np.empty(max_neighbors)
+    px, py = np.empty(max_neighbors), np.empty(max_neighbors)
+    dx, dy = np.empty(max_neighbors), np.empty(max_neighbors)
+    for i in range(n):
+        # nearest neighbors in the 3 x 3 cells around the agent, kept sorted by distance
+        count = 0
+        cx, cy = int((xs[i] - x0) / neighbor_dist), int((ys[i] - y0) / neighbor_dist)
+        for gy in range(max(0, cy - 1), min(rows, cy + 2)):
+            for gx in range(max(0, cx - 1), min(columns, cx + 2)):
+                c = gy * columns + gx
+                for k in range(np.searchsorted(keys, c), np.searchsorted(keys, c, side="right")):
+                    j = order[k]
+                    if j == i:
+                        continue
+                    d2 = (xs[j] - xs[i]) ** 2 + (ys[j] - ys[i]) ** 2
+                    if d2 >= neighbor_dist * neighbor_dist:
+                        continue
+                    if count == max_neighbors:
+                        if d2 >= near_d2[count - 1]:
+                            continue
+                        count -= 1
+                    slot = count
+                    while slot > 0 and near_d2[slot - 1] > d2:
+                        near[slot], near_d2[slot] = near[slot - 1], near_d2[slot - 1]
+                        slot -= 1
+                    near[slot], near_d2[slot] = j, d2
+                    count += 1
+
+        # one half-plane of allowed velocities per neighbor
+        for m in range(count):
+            j = near[m]
+            rel_x, rel_y = xs[j] - xs[i], ys[j] - ys[i]
+            vel_x, vel_y = vxs[i] - vxs[j], vys[i] - vys[j]
+            dist2 = near_d2[m]
+            combined = radii[i] + radii[j]
+            if dist2 > combined * combined:
+                wx, wy = vel_x - inv_tau * rel_x, vel_y - inv_tau * rel_y
+                w2 = wx * wx + wy * wy
+                dot = wx * rel_x + wy * rel_y
+                if dot < 0.0 and dot * dot > combined * combined * w2:
+                    # project on the cut-off circle
+                    w = np.sqrt(w2)
+                    ux, uy = wx / w, wy / w
+                    dx[m], dy[m] = uy, -ux
+                    ax, ay = (combined * inv_tau - w) * ux, (combined * inv_tau - w) * uy
+                else:
+                    # project on the nearest leg of the cone
+                    leg = np.sqrt(dist2 - combined * combined)
+                    if _det(rel_x, rel_y, wx, wy) > 0.0:
+                        dx[m] = (rel_x * leg - rel_y * combined) / dist2
+                        dy[m] = (rel_x * combined + rel_y * leg) / dist2
+                    else:
+                        dx[m] = -(rel_x * leg + rel_y * combined) / dist2
+                        dy[m] = -(-rel_x * combined + rel_y * leg) / dist2
+                    along = vel_x * dx[m] + vel_y * dy[m]
+                    ax, ay = along * dx[m] - vel_x, along * dy[m] - vel_y
+            else:
+                # already overlapping: separate within this step
+                inv_dt = 1.0 / dt
+                wx, wy = vel_x - inv_dt * rel_x, vel_y - inv_dt * rel_y
+                w = np.hypot(wx, wy)
+                if w <= EPSILON:
+                    # stacked on the same point at the same velocity: split the pair along a fixed
+                    # direction of their own, opposite for the two of them
+                    angle = GOLDEN_ANGLE * (min(i, j) * n + max(i, j))
+                    sign = 1.0 if i < j else -1.0
+                    ux, uy = sign * np.cos(angle), sign * np.sin(angle)
+                    w = 0.0
+                else:
+                    ux, uy = wx / w, wy / w
+                dx[m], dy[m] = uy, -ux
+                ax, ay = (combined * inv_dt - w) * ux, (combined * inv_dt - w) * uy
+            px[m], py[m] = vxs[i] + 0.5 * ax, vys[i] + 0.5 * ay
+
+        failed, vx, vy = _lp2(px, py, dx, dy, count, max_speeds[i], vxs[i], vys[i], False)
+        if failed < count:
+            vx, vy = _lp3(px, py, dx, dy, count, failed, max_speeds[i], vx, vy)
+        if abs(vx - vxs[i]) > EPSILON or abs(vy - vys[i]) > EPSILON:
+            changed += 1
+            out_vx[i], out_vy[i] = vx, vy
+        else:
+            out_vx[i], out_vy[i] = vxs[i], vys[i]
+    return changed
+
+
+def max_speed(agent: Agent) -> float:
+    """
+    Speed cap of 'agent' for avoidance: the speed of the mode its path planned for the segment
+    under way, else its fastest mode, so no tile is looked up per agent and tick.
+    """
+    if agent.path_mode is not None:
+        return agent.speed
+    return agent.base_speed * max(agent.move_mode_factor.values())
+
+
+class CrowdAvoidance:
+    """
+    Local avoidance between agents (ORCA). Commands move agents toward their waypoints as if
+    alone; avoid() turns those moves into preferred velocities and replaces them with the
+    nearest collision-free ones, so agents converging on one point spread around it. Idle
+    agents prefer to stand still but step aside for the others.
+    """
+
+    def __init__(self, neighbor_dist: float = NEIGHBOR_DIST, max_neighbors: int = MAX_NEIGHBORS,
+                 time_horizon: float = TIME_HORIZON):
+        self.neighbor_dist = neighbor_dist
+        self.max_neighbors = max_neighbors
+        self.time_horizon = time_horizon
+        self.changed = 0  # agents slowed or deflected on the last avoid, for profiling and tests
+
+    def avoid(self, agents: list[Agent], before: np.ndarray, dt: float) -> int:
+        """
+        Move 'agents' along collision-free velocities instead of the moves their commands made.
+        Agents slowed below half their preferred speed are flagged 'crowded' (see MoveCommand).
+
+        Parameters:
+            agents: the agents, in the order of 'before'
+            before: (n, 2) positions in tiles at the start of the tick
+            dt: the tick, in seconds
+
+        Returns:
+            Number of agents slowed or deflected.
+        """
+        self.changed = 0
+        if len(agents) < 2 or dt <= 0:
+            for agent in agents:
+                agent.crowded = False
+            return 0
+        after = np.array([(agent.x, agent.y) for agent in agents], dtype=np.float64).reshape(-1, 2)
+        preferred = (after - before) / dt
+        radii = np.array([agent.RADIUS for agent in agents], dtype=np.float64)
+        max_speeds = np.array([max_speed(agent) for agent in agents], dtype=np.float64)
+        max_speeds = np.maximum(max_speeds, np.hypot(preferred[:, 0], preferred[:, 1]))
+        out_vx, out_vy = np.empty(len(agents)), np.empty(len(agents))
+        self.changed = orca_velocities(before[:, 0].copy(), before[:, 1].copy(), preferred[:, 0].copy(),
+                                       preferred[:, 1].copy(), radii, max_speeds, dt, self.neighbor_dist,
+                                       self.max_neighbors, self.time_horizon, out_vx, out_vy)
+
+        for i, agent in enumerate(agents):
+            vx, vy = preferred[i]
+            if out_vx[i] == vx and out_vy[i] == vy:
+                agent.crowded = False
+                continue
+            agent.x, agent.y = before[i, 0] + out_vx[i] * dt, before[i, 1] + out_vy[i] * dt
+            agent.crowded = bool(np.hypot(out_vx[i], out_vy[i]) < 0.5 * np.hypot(vx, vy))
+        return self.changed
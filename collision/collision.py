@@ -0,0 +1,122 @@
+import numpy as np
+from numba import njit
+
+from agent import Agent
+from world import World
+
+PUSH_ITERATIONS = 4   # push-out passes per sub-step, a corner needs two
+MIN_STEP = 0.05       # cells, shortest sub-step whatever the radius
+
+
+@njit(cache=True, nogil=True)
+def push_out(obstacle, x, y, r):
+    """
+    Move a circle of radius r centered on (x, y), in cell units, out of the blocked cells it
+    overlaps and inside the grid: along the normal of each cell it touches, so motion along a
+    wall is kept. Returns the new center.
+    """
+    h, w = obstacle.shape
+    for _ in range(PUSH_ITERATIONS):
+        moved = False
+        for cy in range(max(0, int(np.floor(y - r))), min(h, int(np.floor(y + r)) + 1)):
+            for cx in range(max(0, int(np.floor(x - r))), min(w, int(np.floor(x + r)) + 1)):
+                if not obstacle[cy, cx]:
+                    continue
+                # nearest point of the cell to the center
+                dx = x - min(max(x, cx), cx + 1.0)
+                dy = y - min(max(y, cy), cy + 1.0)
+                d2 = dx * dx + dy * dy
+                if d2 >= r * r:
+                    continue
+                if d2 > 1e-18:
+                    d = np.sqrt(d2)
+                    x += dx / d * (r - d)
+                    y += dy / d * (r - d)
+                else:
+                    # center inside the cell (spawned or grown over): leave through the nearest side
+                    left, right, top, bottom = x - cx, cx + 1.0 - x, y - cy, cy + 1.0 - y
+                    nearest = min(left, right, top, bottom)
+                    if nearest == left:
+                        x = cx - r
+                    elif nearest == right:
+                        x = cx + 1.0 + r
+                    elif nearest == top:
+                        y = cy - r
+                    else:
+                        y = cy + 1.0 + r
+                moved = True
+        x = min(max(x, r), w - r)
+        y = min(max(y, r), h - r)
+        if not moved:
+            break
+    return x, y
+
+
+@njit(cache=True, nogil=True)
+def resolve_moves(obstacle, cells_per_tile, xs0, ys0, xs1, ys1, radii, out_x, out_y):
+    """
+    Sweep circles from (xs0, ys0) to (xs1, ys1), in tiles, against the blocked cells of the
+    subdivision obstacle grid. Sub-steps are at most half a radius long, so a circle cannot
+    pass a cell between two of them; blocked circles slide along the cells they touch.
+
+    Returns:
+        Number of circles stopped or deflected, their final centers are in out_x, out_y.
+    """
+    blocked = 0
+    for i in range(xs0.shape[0]):
+        r = radii[i] * cells_per_tile
+        x, y = xs0[i] * cells_per_tile, ys0[i] * cells_per_tile
+        tx, ty = xs1[i] * cells_per_tile, ys1[i] * cells_per_tile
+        steps = int(np.ceil(np.hypot(tx - x, ty - y) / max(0.5 * r, MIN_STEP)))
+        if steps == 0:
+            out_x[i], out_y[i] = xs1[i], ys1[i]
+            continue
+        sx, sy = (tx - x) / steps, (ty - y) / steps
+        for _ in range(steps):
+            x, y = push_out(obstacle, x + sx, y + sy, r)
+        if abs(x - tx) > 1e-9 or abs(y - ty) > 1e-9:
+            blocked += 1
+            out_x[i], out_y[i] = x / cells_per_tile, y / cells_per_tile
+        else:
+            # free move: keep the target exactly, waypoints are compared for equality
+            out_x[i], out_y[i] = xs1[i], ys1[i]
+    return blocked
+
+
+class CollisionResolver:
+    """
+    Keeps agents off the blocked cells of World.obstacle. Commands move agents freely during the
+    tick, resolve() then sweeps every agent that moved from where it stood before, in one batch.
+    """
+
+    def __init__(self):
+        self.blocked = 0  # agents stopped or deflected on the last resolve, for profiling and tests
+
+    def resolve(self, agents: list[Agent], before: np.ndarray) -> int:
+        """
+        Move 'agents' back onto free ground along their move of this tick.
+
+        Parameters:
+            agents: the agents, in the order of 'before'
+            before: (n, 2) positions in tiles at the start of the tick
+
+        Returns:
+            Number of agents stopped or deflected.
+        """
+        world = World.get_instance()
+        self.blocked = 0
+        if world.obstacle is None or not agents:
+            return 0
+        after = np.array([(agent.x, agent.y) for agent in agents], dtype=np.float64).reshape(-1, 2)
+        moving = np.flatnonzero((after != before).any(axis=1))
+        if moving.size == 0:
+            return 0
+
+        radii = np.array([agents[i].RADIUS for i in moving], dtype=np.float64)
+        out_x, out_y = np.empty(moving.size), np.empty(moving.size)
+        self.blocked = resolve_moves(np.asarray(world.obstacle, dtype=np.bool_), world.gen.config.TILE_SUBDIVISIONS,
+                                     before[moving, 0], before[moving, 1], after[moving, 0], after[moving, 1],
+                                     radii, out_x, out_y)
+        for i, x, y in zip(moving, out_x, out_y):
+            agents[i].x, agents[i].y = float(x), float(y)
+        return self.blocked
@@ -1,3 +1,5 @@
 from .commands import Command
 from .commands import MoveCommand
-from .commands import IdleCommand
\ No newline at end of file
+from .commands import FlowFieldCommand
+from .commands import FormationCommand
+from .commands import IdleCommand
@@ -1,11 +1,15 @@
 from abc import ABC, abstractmethod
 from collections import deque
+import copy
 import math
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from agent import Agent
 
+WAYPOINT_RADIUS = 0.3  # tiles: an intermediate waypoint this close counts as reached
+CROWDED_GOAL_RADIUS = 1.5  # tiles: held back this close to the goal by other agents, the move is over
+
 
 class Command(ABC):
     @abstractmethod
@@ -16,19 +20,70 @@ class Command(ABC):
         """
         ...
 
+    def for_agent(self, agent) -> "Command":
+        """
+        The command to give 'agent' when one order goes to several agents (Manager.broadcast).
+        Commands keep the progress of the agent executing them, so each agent gets its own copy.
+        """
+        return copy.copy(self)
+
 class MoveCommand(Command):
-    def __init__(self, path):
+    def __init__(self, path, modes=None):
         # path is a list of waypoints [(x, y), ...] in meters
         self.path = deque(path)
+        # MoveMode of the segment ending at each waypoint (see Pathfinder.find_path_modes), None if unplanned
+        self.modes = None if modes is None else deque(modes)
+        # True while the path is still being planned: an empty path then means "wait", not "arrived"
+        self.planning = False
+
+    def replace_path(self, path, position: tuple[float, float] | None = None, modes=None):
+        """
+        Swap in new waypoints without restarting the move (partial or repaired paths).
+        With the agent 'position', the waypoints before the one nearest to it are dropped
+        so the agent does not walk back to the start of the new path.
+        """
+        path = list(path)
+        modes = None if modes is None else list(modes)
+        if position is not None and len(path) > 1:
+            px, py = position
+            nearest = min(range(len(path)), key=lambda i: math.hypot(path[i][0] - px, path[i][1] - py))
+            path = path[nearest:]
+            modes = None if modes is None else modes[nearest:]
+        self.path = deque(path)
+        self.modes = None if modes is None else deque(modes)
+
+    def for_agent(self, agent) -> "MoveCommand":
+        command = copy.copy(self)
+        command.path = deque(self.path)
+        command.modes = None if self.modes is None else deque(self.modes)
+        return command
 
     def execute(self, agent, dt: float = 0.0) -> bool:
         if not self.path:
-            return True
-
+            agent.path_mode = None
+            return not self.planning
 
+        # planned modes switch the agent's speed without looking up its tile every frame
+        agent.path_mode = self.modes[0] if self.modes else None
         target_x, target_y = self.path[0]
         dx, dy = target_x - agent.x, target_y - agent.y
         dist = math.hypot(dx, dy)
+        if dist <= WAYPOINT_RADIUS and len(self.path) > 1:
+            # a tile center may sit in a blocked cell the agent slides around (see collision)
+            self.path.popleft()
+            if self.modes:
+                self.modes.popleft()
+            agent.path_mode = self.modes[0] if self.modes else None
+            target_x, target_y = self.path[0]
+            dx, dy = target_x - agent.x, target_y - agent.y
+            dist = math.hypot(dx, dy)
+        elif len(self.path) == 1 and agent.crowded and dist <= CROWDED_GOAL_RADIUS:
+            # the agents that arrived first stand on the goal, stop next to them
+            self.path.popleft()
+            if self.modes:
+                self.modes.popleft()
+            agent.path_mode = None
+            return not self.planning
 
         # meters to move this update
         ds = agent.speed * dt
@@ -42,6 +97,8 @@ class MoveCommand(Command):
             # reached waypoint
             agent.x, agent.y = target_x, target_y
             self.path.popleft()
+            if self.modes:
+                self.modes.popleft()
         else:
             # move fractionally toward target
             agent.x += dx / dist * ds
@@ -49,6 +106,52 @@ class MoveCommand(Command):
 
         return False
 
+class FlowFieldCommand(MoveCommand):
+    """
+    Move toward a goal shared by a group, steering with a flow field (pathfinder.FlowField).
+    The route is traced from the field instead of searched, and traced again only when the
+    agent left it (pushed aside, blocked ...).
+    """
+    def __init__(self, field, goal: tuple[float, float]):
+        super().__init__([])
+        self.field = field
+        self.goal = goal
+        self._route_tiles: set[tuple[int, int]] = set()
+
+    def for_agent(self, agent) -> "FlowFieldCommand":
+        return FlowFieldCommand(self.field, self.goal)  # the field is shared, the route is traced per agent
+
+    def execute(self, agent, dt: float = 0.0) -> bool:
+        tile = (int(agent.x), int(agent.y))
+        if tile not in self._route_tiles:
+            route = self.field.route(agent.x, agent.y)
+            if not route:
+                return True  # goal unreachable from here
+            self._route_tiles = {(int(x), int(y)) for x, y in route}
+            route[0] = (agent.x, agent.y)
+            route[-1] = self.goal
+            self.path = deque(route)
+        return super().execute(agent, dt)
+
+class FormationCommand(Command):
+    """
+    Group move in formation (pathfinder.Formation): one reference path for the whole group, each
+    agent follows its slot path. Given through Manager.broadcast every agent gets a MoveCommand on
+    its slot; executed directly it keeps one such move per agent.
+    """
+    def __init__(self, formation):
+        self.formation = formation
+        self._moves: dict = {}
+
+    def for_agent(self, agent) -> MoveCommand:
+        return MoveCommand(self.formation.path_for(agent) or [])
+
+    def execute(self, agent, dt: float = 0.0) -> bool:
+        move = self._moves.get(agent)
+        if move is None:
+            move = self._moves[agent] = self.for_agent(agent)
+        return move.execute(agent, dt)
+
 class IdleCommand(Command):
     def execute(self, agent, dt: float = 0.0):
         agent.state = agent.State.IDLE
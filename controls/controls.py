@@ -26,5 +26,11 @@ ZOOM_KEYS = {
 OVERLAY_GRID_KEY = pygame.K_g
 TOGGLE_OVERLAY_KEY = pygame.K_F1
 REGENERATE_WORLD_KEY = pygame.K_KP_ENTER
+FORMATION_KEY = pygame.K_f  # cycle the formation of group orders
+# send the selection to the nearest reachable target of a feature (see pathfinder.NearestTargetService)
+GATHER_KEYS = {
+    pygame.K_t: "tree",
+    pygame.K_r: "water",
+}
 
 PAUSE_GAME_KEY = pygame.K_F10
\ No newline at end of file
@@ -2,7 +2,6 @@ import json
 import random
 from pathlib import Path
 from pydantic import BaseModel, RootModel
-from graphviz import Digraph
 
 from typing_extensions import Self
 
@@ -39,13 +38,21 @@ class KnowledgeTree(RootModel[dict[str, Item]]):
     def LoadTree(cls, filepath: str | None = None) -> Self:
         """
         Load knowledge nodes from JSON file.
-        Preserves all fields from JSON (e.g., description, crafting, weight),
-        but replaces raw rules with callable functions.
+        The default knowledge.json is validated once through the data catalog;
+        every call returns its own copy since unlock state is per character.
         """
         if filepath is None:
-            PROJECT_ROOT = Path(__file__).resolve().parent.parent
-            filepath = PROJECT_ROOT / "json_files" / "knowledge.json"
+            import catalog
+            return catalog.get("knowledge").model_copy(deep=True)
+        return cls.ParseTree(filepath)
 
+    @classmethod
+    def ParseTree(cls, filepath: str | Path) -> Self:
+        """
+        Parse and validate a knowledge JSON file.
+        Preserves all fields from JSON (e.g., description, crafting, weight),
+        but replaces raw rules with callable functions.
+        """
         with open(filepath, "r") as f:
             instance =  cls.model_validate_json(f.read())
 
@@ -62,6 +69,17 @@ class KnowledgeTree(RootModel[dict[str, Item]]):
     def __getitem__(self, item:str) -> Item:
         return self.root[item]
 
+    def restore_unlocks(self, previous: "KnowledgeTree") -> Self:
+        """
+        Carry the unlock state of 'previous' over to this tree, used when the
+        knowledge data is reloaded while characters already made progress.
+        Items missing from 'previous' keep their default state.
+        """
+        for name, data in self.root.items():
+            if name in previous.root and previous.root[name].unlocked:
+                data.unlocked = True
+        return self
+
     def try_unlocks(self, event: str) -> None:
         """
         Try to unlock all currently locked nodes given the latest event.
@@ -97,6 +115,8 @@ class KnowledgeTree(RootModel[dict[str, Item]]):
         Render the knowledge tree as a PNG image using Graphviz.
         Green = unlocked, Red = locked
         """
+        from graphviz import Digraph
+
         dot = Digraph(comment="Knowledge Tree")
 
         # Add nodes
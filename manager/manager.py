@@ -1,5 +1,9 @@
 import time
+from typing import Callable
 
+import numpy as np
+
+from collision import CollisionResolver, CrowdAvoidance
 from world import World
 from world_object import WorldObject
 from character import Character, Human
@@ -10,6 +14,7 @@ import logging
 logger = logging.getLogger("manager")
 DAY_DURATION_S = 100
 DAYS_PER_YEAR = 6
+SEARCH_NODE_BUDGET = 4000  # path search expansions per tick, shared by the pending searches
 
 # ---------------- Selection ----------------
 class SelectionManager(set):
@@ -98,8 +103,20 @@ class Manager:
 
         self.selection: SelectionManager = SelectionManager() if selection_manager is None else selection_manager
 
+        # time-sliced path searches: (search, on_progress(search)) advanced every tick
+        self.search_budget: int = SEARCH_NODE_BUDGET
+        self.searches: list[tuple[object, Callable]] = []
+
+        # agents moved by their commands avoid each other, then are swept against the obstacle grid
+        self.avoidance = CrowdAvoidance()
+        self.collisions = CollisionResolver()
+
     def reset(self):
         self.static_objects = [obj for obj in self.world.elements.flat if obj is not None]
+        # paths were planned on the previous layers
+        for agent in self.agents.values():
+            agent.commands.clear()
+        self.searches.clear()
 
         self.day_counter: int = 0
         self.play_time: float = 0.0  # Accumulated session time while unpaused
@@ -159,9 +176,32 @@ class Manager:
         return self.day_counter + self.session_time / DAY_DURATION_S
 
     def broadcast(self, command, agent_ids):
+        """Give 'command' to the agents 'agent_ids', each one its own copy (see Command.for_agent)."""
         for aid in agent_ids:
             if aid in self.agents.keys():
-                self.agents[aid].assign_command(command)
+                agent = self.agents[aid]
+                agent.assign_command(command.for_agent(agent))
+
+    def add_search(self, search, on_progress: Callable):
+        """
+        Run a resumable search (pathfinder.IncrementalSearch) over the next ticks.
+        on_progress(search) is called after every slice, also the last one.
+        """
+        self.searches.append((search, on_progress))
+
+    def cancel_search(self, search):
+        self.searches = [(s, cb) for s, cb in self.searches if s is not search]
+
+    def advance_searches(self):
+        """Spend the per-tick node budget on the pending searches, split evenly."""
+        if not self.searches:
+            return
+        share = max(1, self.search_budget // len(self.searches))
+        for search, on_progress in list(self.searches):
+            search.advance(share)
+            on_progress(search)
+            if search.done:
+                self.cancel_search(search)
 
     def update_static(self):
         """
@@ -186,7 +226,9 @@ class Manager:
         if self.paused:
             return  # Don't update agents while paused
 
-        for agent in self.agents.values():
+        agents = list(self.agents.values())
+        before = np.array([(agent.x, agent.y) for agent in agents], dtype=np.float64).reshape(-1, 2)
+        for agent in agents:
             # Update selection modifier
             color = (0,222,0) if agent.id in self.selection else (200,20,20)
             agent.dummy_render_color = color
@@ -194,6 +236,10 @@ class Manager:
             # Ensure the agent is updated based on the elapsed time
             agent.update(dt)
 
+        # commands move as if each agent were alone: spread them, then keep them out of trees and rocks
+        self.avoidance.avoid(agents, before, dt)
+        self.collisions.resolve(agents, before)
+
     def update(self):
         """
         Update manager state, including agents and static objects.
@@ -211,6 +257,7 @@ class Manager:
         self._last_update_time = now
 
         # Update world
+        self.advance_searches()
         self.update_static()
         self.update_agents(dt)
 
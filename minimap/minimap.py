@@ -1,5 +1,7 @@
 from world import World
+from world import ground_cover
 from camera import Camera
+import numpy as np
 import pygame
 from typing_extensions import Self
 
@@ -29,16 +31,11 @@ class MiniMap:
     def draw(self, surface:pygame.Surface | None = None):
 
         if self.needs_redraw:
-            tile_w = self.size / self.world.size_x
-            tile_h = self.size / self.world.size_y
-
-            for y in range(self.world.size_y):
-                for x in range(self.world.size_x):
-                    tile = self.world.get_tile(x, y)
-                    color = tile.terrain.color if tile.terrain else (87, 87, 87)
-                    rect = pygame.Rect(x * tile_w, y * tile_h, tile_w + 1, tile_h + 1)
-                    self.surface.fill(color, rect)
-
+            terrain = np.array([[tile.terrain.color if tile.terrain else (87, 87, 87) for tile in row]
+                                for row in self.world.tiles], dtype=np.uint8)
+            colors = terrain if self.world.ground_cover is None else ground_cover.tile_colors(self.world.ground_cover, terrain)
+            tiles = pygame.surfarray.make_surface(colors.swapaxes(0, 1))  # surfarray is (x, y)
+            self.surface = pygame.transform.scale(tiles, (self.size, self.size))
             self.needs_redraw = False
 
         scale_x = self.size / self.world.size_x
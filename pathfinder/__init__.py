@@ -1 +1,14 @@
-from .pathfinder import Pathfinder
\ No newline at end of file
+from .pathfinder import Pathfinder
+from .cost_tensor import CostTensor, MovementProfile
+from .hpa import HierarchicalGraph, HierarchicalSearch
+from .flow_field import FlowField
+from .path_cache import PathCache
+from .path_service import PathService
+from .incremental import IncrementalSearch
+from .dstar_lite import DStarLite
+from .reachability import ReachabilityIndex
+from .nearest import NearestTargetService, TargetField
+from .landmarks import LandmarkSet
+from .multimodal import ModeLayers
+from .navmesh import NavMesh
+from .formation import Formation
@@ -0,0 +1,299 @@
+import numpy as np
+from numba import njit
+
+# 8-connected neighborhood, same order as the reference implementation; direction 7 - k is opposite to k
+DIRS_X = np.array([-1, -1, -1, 0, 0, 1, 1, 1], dtype=np.int64)
+DIRS_Y = np.array([-1, 0, 1, -1, 1, -1, 0, 1], dtype=np.int64)
+STEP_COST = np.hypot(DIRS_X, DIRS_Y)
+
+UPHILL_PENALTY = 10.0  # cost per unit of height gained
+
+
+# ------------------- Array-backed binary heap -------------------
+@njit(cache=True, nogil=True)
+def heap_push(keys, items, size, key, item):
+    """Push (key, item) on the min-heap stored in keys/items[:size], returns the new size."""
+    i = size
+    while i > 0:
+        parent = (i - 1) >> 1
+        if keys[parent] <= key:
+            break
+        keys[i] = keys[parent]
+        items[i] = items[parent]
+        i = parent
+    keys[i] = key
+    items[i] = item
+    return size + 1
+
+
+@njit(cache=True, nogil=True)
+def heap_pop(keys, items, size):
+    """Pop the smallest key, returns (item, new size)."""
+    item = items[0]
+    size -= 1
+    key, last = keys[size], items[size]
+    i = 0
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            break
+        if child + 1 < size and keys[child + 1] < keys[child]:
+            child += 1
+        if key <= keys[child]:
+            break
+        keys[i] = keys[child]
+        items[i] = items[child]
+        i = child
+    keys[i] = key
+    items[i] = last
+    return item, size
+
+
+@njit(cache=True, nogil=True)
+def octile_heuristic(x0, y0, x1, y1, min_penalty):
+    """
+    Admissible and consistent lower bound of the A* cost: octile distance, plus the cheapest
+    terrain penalty for each of the (at least Chebyshev distance) entered cells.
+    """
+    dx, dy = abs(x1 - x0), abs(y1 - y0)
+    lo, hi = min(dx, dy), max(dx, dy)
+    return hi + (np.sqrt(2.0) - 1.0) * lo + min_penalty * hi
+
+
+# ------------------- A* -------------------
+RUNNING, FOUND, FAILED = 0, 1, 2  # status of a search (see astar_expand)
+HEAP_START = 256  # entries of a fresh open list, it doubles whenever it fills up
+FLOAT32_SLACK = 2.5e-7  # relative rounding of stored landmark distances, taken off the ALT bound to stay admissible
+
+
+@njit(cache=True, nogil=True)
+def heap_grow(keys, items):
+    """Copy of the heap arrays with twice the room."""
+    bigger_keys = np.empty(2 * keys.shape[0], dtype=keys.dtype)
+    bigger_items = np.empty(2 * items.shape[0], dtype=items.dtype)
+    bigger_keys[:keys.shape[0]] = keys
+    bigger_items[:items.shape[0]] = items
+    return bigger_keys, bigger_items
+
+
+@njit(cache=True, nogil=True)
+def alt_heuristic(forward, reverse, cell, goal_forward, goal_reverse):
+    """
+    Triangle-inequality lower bound of the cost from 'cell' to the goal, over all landmarks L:
+        d(L, goal) - d(L, cell)  and  d(cell, L) - d(goal, L)
+    inf when a landmark proves the goal cannot be reached from 'cell'.
+    """
+    best = 0.0
+    for i in range(forward.shape[0]):
+        from_l, to_l = forward[i, cell], reverse[i, cell]
+        if from_l < np.inf:
+            if goal_forward[i] == np.inf:
+                return np.inf  # L reaches cell but not the goal
+            bound = goal_forward[i] - from_l - FLOAT32_SLACK * (goal_forward[i] + from_l)
+            if bound > best:
+                best = bound
+        if goal_reverse[i] < np.inf:
+            if to_l == np.inf:
+                return np.inf  # the goal reaches L but cell does not
+            bound = to_l - goal_reverse[i] - FLOAT32_SLACK * (to_l + goal_reverse[i])
+            if bound > best:
+                best = bound
+    return best
+
+
+@njit(cache=True, nogil=True)
+def astar_expand(edge_costs, goal, min_penalty, forward, reverse, x0, y0, x1, y1,
+                 g, parent, closed, keys, items, size, budget, best, best_h):
+    """
+    The A* expansion loop of every grid search: expand at most 'budget' cells (-1: no limit) of
+    a search whose state lives in the arrays passed in, so it can be suspended and resumed.
+    g, parent, closed and the heap hold cells local to the box [x0, x1) x [y0, y1); the heap
+    grows when full. forward/reverse are landmark fields (see LandmarkSet) tightening the
+    heuristic, or (0, 0) arrays for the octile bound alone.
+
+    Returns:
+        (status, heap size, expanded, best, best_h, keys, items) - best is the closed cell nearest
+        to the goal by octile distance, the end of a partial path; keys/items may be new arrays.
+    """
+    w = edge_costs.shape[1]
+    bw = x1 - x0
+    gx, gy = goal % w, goal // w
+    local_goal = (gy - y0) * bw + (gx - x0)
+    goal_forward = np.empty(0, dtype=np.float64)
+    goal_reverse = np.empty(0, dtype=np.float64)
+    if forward.shape[0] > 0:
+        goal_forward = forward[:, goal].astype(np.float64)
+        goal_reverse = reverse[:, goal].astype(np.float64)
+    expanded = 0
+    while size > 0 and expanded != budget:
+        cur, size = heap_pop(keys, items, size)
+        if closed[cur]:
+            continue
+        closed[cur] = True
+        expanded += 1
+
+        cx, cy = cur % bw + x0, cur // bw + y0
+        h = octile_heuristic(cx, cy, gx, gy, 0.0)
+        if h < best_h:
+            best, best_h = cur, h
+        if cur == local_goal:
+            return FOUND, size, expanded, cur, 0.0, keys, items
+
+        for k in range(8):
+            cost = edge_costs[cy, cx, k]
+            if cost == np.inf:
+                continue
+            nx, ny = cx + DIRS_X[k], cy + DIRS_Y[k]
+            if nx < x0 or ny < y0 or nx >= x1 or ny >= y1:
+                continue
+            nidx = (ny - y0) * bw + (nx - x0)
+            if closed[nidx]:
+                continue
+            tentative = g[cur] + cost
+            if tentative < g[nidx]:
+                estimate = max(octile_heuristic(nx, ny, gx, gy, min_penalty),
+                               alt_heuristic(forward, reverse, ny * w + nx, goal_forward, goal_reverse))
+                if estimate == np.inf:
+                    continue  # a landmark proves the goal unreachable from there
+                g[nidx] = tentative
+                parent[nidx] = cur
+                if size == keys.shape[0]:
+                    keys, items = heap_grow(keys, items)
+                size = heap_push(keys, items, size, tentative + estimate, nidx)
+
+    status = FAILED if size == 0 else RUNNING
+    return status, size, expanded, best, best_h, keys, items
+
+
+@njit(cache=True, nogil=True)
+def box_path(parent, last, x0, y0, x1, w):
+    """Global cells from the search start to the local cell 'last', following 'parent'."""
+    bw = x1 - x0
+    length = 1
+    idx = last
+    while parent[idx] >= 0:
+        idx = parent[idx]
+        length += 1
+    path = np.empty(length, dtype=np.int64)
+    idx = last
+    for i in range(length - 1, -1, -1):
+        path[i] = (idx // bw + y0) * w + idx % bw + x0
+        idx = parent[idx]
+    return path
+
+
+@njit(cache=True, nogil=True)
+def astar_search(start, goal, edge_costs, min_penalty, forward, reverse, x0, y0, x1, y1):
+    """
+    A* run to completion inside the box [x0, x1) x [y0, y1), see astar_expand.
+
+    Returns:
+        (cells from start to goal, empty if unreachable; number of expanded cells)
+    """
+    w = edge_costs.shape[1]
+    bw = x1 - x0
+    n = bw * (y1 - y0)
+    g = np.full(n, np.inf)
+    parent = np.full(n, -1, dtype=np.int64)
+    closed = np.zeros(n, dtype=np.bool_)
+    keys = np.empty(min(HEAP_START, 8 * n + 1), dtype=np.float64)
+    items = np.empty(keys.shape[0], dtype=np.int64)
+
+    local_start = (start // w - y0) * bw + (start % w - x0)
+    g[local_start] = 0.0
+    size = heap_push(keys, items, 0, 0.0, local_start)
+    status, size, expanded, last, _, keys, items = astar_expand(
+        edge_costs, goal, min_penalty, forward, reverse, x0, y0, x1, y1,
+        g, parent, closed, keys, items, size, -1, local_start, np.inf)
+    if status != FOUND:
+        return np.empty(0, dtype=np.int64), expanded
+    return box_path(parent, last, x0, y0, x1, w), expanded
+
+
+@njit(cache=True, nogil=True)
+def astar_kernel(start: int, goal: int, edge_costs: np.ndarray, min_penalty: float) -> np.ndarray:
+    """
+    A* over the cells of a (H, W) grid, cells are addressed by index y * W + x.
+
+    Parameters:
+        edge_costs: (H, W, 8) cost of each step (see cost_tensor.fill_edge_costs), inf = not allowed
+        min_penalty: lower bound of the terrain penalty part of any step, tightens the heuristic
+
+    Returns:
+        int64 array of cell indices from start to goal, empty if unreachable.
+    """
+    return astar_box(start, goal, edge_costs, min_penalty, 0, 0, edge_costs.shape[1], edge_costs.shape[0])
+
+
+@njit(cache=True, nogil=True)
+def astar_box(start: int, goal: int, edge_costs: np.ndarray, min_penalty: float,
+              x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+    """
+    A* restricted to the box [x0, x1) x [y0, y1), used to refine hierarchical paths inside a cluster.
+    Cells are global indices y * W + x, working arrays are sized to the box.
+    """
+    no_landmarks = np.empty((0, 0), dtype=np.float32)
+    path, _ = astar_search(start, goal, edge_costs, min_penalty, no_landmarks, no_landmarks, x0, y0, x1, y1)
+    return path
+
+
+# ------------------- Dijkstra -------------------
+@njit(cache=True, nogil=True)
+def dijkstra_box(sources: np.ndarray, edge_costs: np.ndarray,
+                 x0: int, y0: int, x1: int, y1: int, reverse: bool) -> np.ndarray:
+    """
+    Multi-source Dijkstra restricted to the box [x0, x1) x [y0, y1).
+
+    Parameters:
+        sources: global cell indices y * W + x, all at distance 0
+        reverse: if True distances are measured *to* the sources (steps walked backwards,
+                 cost of entering a cell is read from the cell the step starts from)
+
+    Returns:
+        float64 (y1 - y0, x1 - x0) distances, inf where unreachable.
+    """
+    w = edge_costs.shape[1]
+    bw, bh = x1 - x0, y1 - y0
+    n = bw * bh
+    dist = np.full(n, np.inf)
+    closed = np.zeros(n, dtype=np.bool_)
+    keys = np.empty(min(HEAP_START, 8 * n + 1) + len(sources), dtype=np.float64)
+    items = np.empty(keys.shape[0], dtype=np.int64)
+
+    size = 0
+    for src in sources:
+        sx, sy = src % w, src // w
+        if sx < x0 or sy < y0 or sx >= x1 or sy >= y1:
+            continue
+        local = (sy - y0) * bw + (sx - x0)
+        dist[local] = 0.0
+        size = heap_push(keys, items, size, 0.0, local)
+
+    while size > 0:
+        cur, size = heap_pop(keys, items, size)
+        if closed[cur]:
+            continue
+        closed[cur] = True
+        cx, cy = cur % bw + x0, cur // bw + y0
+        for k in range(8):
+            nx, ny = cx + DIRS_X[k], cy + DIRS_Y[k]
+            if nx < x0 or ny < y0 or nx >= x1 or ny >= y1:
+                continue
+            if reverse:
+                # step (nx, ny) -> (cx, cy) is direction k from (nx, ny): the opposite slot 7 - k
+                cost = edge_costs[ny, nx, 7 - k]
+            else:
+                cost = edge_costs[cy, cx, k]
+            if cost == np.inf:
+                continue
+            nidx = (ny - y0) * bw + (nx - x0)
+            if closed[nidx]:
+                continue
+            d = dist[cur] + cost
+            if d < dist[nidx]:
+                dist[nidx] = d
+                if size == keys.shape[0]:
+                    keys, items = heap_grow(keys, items)
+                size = heap_push(keys, items, size, d, nidx)
+
+    return dist.reshape(bh, bw)
@@ -0,0 +1,170 @@
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Callable
+from numba import njit
+
+from agent import Agent, MoveMode
+from .astar_kernel import DIRS_X, DIRS_Y, STEP_COST, UPHILL_PENALTY
+
+CHUNK_SIZE = 16  # tiles per side of an invalidation chunk
+
+
+@dataclass(frozen=True, slots=True)
+class MovementProfile:
+    """Everything the traversal cost depends on besides the map: shared by all agents moving the same way."""
+    agent_class: type
+    natural_mode: MoveMode
+    multipliers: tuple[tuple[MoveMode, float], ...]
+
+    @classmethod
+    def of(cls, agent: Agent) -> "MovementProfile":
+        return cls(type(agent), agent.natural_move_mode, tuple(agent.move_mode_factor.items()))
+
+    def penalty(self, water_map: np.ndarray) -> np.ndarray:
+        """
+        Terrain penalty per tile, base_speed / speed_at: agents swim on water and
+        use their natural mode elsewhere. A zero multiplier makes the tile impassable.
+        """
+        factors = dict(self.multipliers)
+        land, swim = factors[self.natural_mode], factors[MoveMode.SWIM]
+        return np.where(water_map,
+                        1.0 / swim if swim > 0 else np.inf,
+                        1.0 / land if land > 0 else np.inf)
+
+
+def lowest_penalty(penalty: np.ndarray) -> float:
+    """Smallest finite terrain penalty (0 if none), the A* heuristic adds it per step."""
+    finite = penalty[np.isfinite(penalty)]
+    return max(0.0, float(finite.min())) if finite.size else 0.0
+
+
+@njit(cache=True, nogil=True)
+def fill_edge_costs(out, height_map, obstacle_map, penalty, y0, y1, x0, x1):
+    """
+    out[y, x, k]: cost of the step from (x, y) in direction k, for the tiles of [x0, x1) x [y0, y1).
+    Steps leaving the map, entering an obstacle or cutting between two blocked tiles cost inf.
+    """
+    h, w = height_map.shape
+    for y in range(y0, y1):
+        for x in range(x0, x1):
+            for k in range(8):
+                dx, dy = DIRS_X[k], DIRS_Y[k]
+                nx, ny = x + dx, y + dy
+                if nx < 0 or ny < 0 or nx >= w or ny >= h or obstacle_map[ny, nx]:
+                    out[y, x, k] = np.inf
+                elif dx != 0 and dy != 0 and obstacle_map[y, nx] and obstacle_map[ny, x]:
+                    out[y, x, k] = np.inf
+                else:
+                    dh = height_map[ny, nx] - height_map[y, x]
+                    out[y, x, k] = STEP_COST[k] + max(0.0, UPHILL_PENALTY * dh) + penalty[ny, nx]
+
+
+def build_edge_costs(height_map: np.ndarray, obstacle_map: np.ndarray, penalty: np.ndarray) -> np.ndarray:
+    """Full (H, W, 8) float32 edge-cost tensor in one go."""
+    h, w = height_map.shape
+    out = np.empty((h, w, 8), dtype=np.float32)
+    fill_edge_costs(out, height_map, obstacle_map, penalty, 0, h, 0, w)
+    return out
+
+
+class CostTensor:
+    """
+    Cached (H, W, 8) float32 edge costs of one MovementProfile.
+
+    The tensor reads the layers it was given (shared with the Pathfinder, updated in place);
+    mark_dirty() flags the chunks touching changed tiles and refresh() rebuilds only those.
+    Structures derived from the costs compare chunk_versions with the version they last saw.
+    """
+
+    def __init__(self, profile: MovementProfile, height_map: np.ndarray, obstacle_map: np.ndarray,
+                 water_map: np.ndarray, chunk_size: int = CHUNK_SIZE):
+        self.profile = profile
+        self.height_map = height_map
+        self.obstacle_map = obstacle_map
+        self.water_map = water_map
+        self.chunk_size = chunk_size
+
+        h, w = height_map.shape
+        self.costs = np.empty((h, w, 8), dtype=np.float32)
+        self.penalty = np.empty((h, w), dtype=np.float64)
+        self.min_penalty = 0.0
+        self.chunks_rebuilt = 0          # total, for profiling and tests
+        self.version = 0                 # bumped on every refresh that changed something
+        self.chunk_versions = np.zeros((-(-h // chunk_size), -(-w // chunk_size)), dtype=np.int64)
+        self._dirty: set[tuple[int, int]] = {(cy, cx) for cy in range(self.chunk_versions.shape[0])
+                                             for cx in range(self.chunk_versions.shape[1])}
+        self._shared = False             # costs handed out by snapshot(), copy before writing
+
+    def snapshot(self) -> np.ndarray:
+        """
+        Read-only costs for searches running in worker threads. The array is never written
+        again: the next refresh() rebuilds into a copy.
+        """
+        self.refresh()
+        self._shared = True
+        view = self.costs.view()
+        view.flags.writeable = False
+        return view
+
+    def tile_penalty(self, ys: slice, xs: slice) -> np.ndarray:
+        """Terrain penalty of the tiles [ys, xs], recomputed on refresh."""
+        return self.profile.penalty(self.water_map[ys, xs])
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
+
+    def mark_dirty(self, x0: int, y0: int, x1: int, y1: int):
+        """Tiles [x0, x1) x [y0, y1) changed: their edges and the edges entering them must be rebuilt."""
+        h, w = self.height_map.shape
+        cs = self.chunk_size
+        x0, y0 = max(0, x0 - 1), max(0, y0 - 1)
+        x1, y1 = min(w, x1 + 1), min(h, y1 + 1)
+        for cy in range(y0 // cs, (y1 - 1) // cs + 1):
+            for cx in range(x0 // cs, (x1 - 1) // cs + 1):
+                self._dirty.add((cy, cx))
+
+    def refresh(self) -> np.ndarray:
+        """Rebuild the dirty chunks, returns the cost tensor."""
+        if not self._dirty:
+            return self.costs
+        if self._shared:
+            self.costs = self.costs.copy()
+            self._shared = False
+        h, w = self.height_map.shape
+        cs = self.chunk_size
+        boxes = [(cy * cs, min(h, cy * cs + cs), cx * cs, min(w, cx * cs + cs)) for cy, cx in self._dirty]
+
+        # penalties first: edges on a chunk border read the penalty of the next chunk
+        for y0, y1, x0, x1 in boxes:
+            ys, xs = slice(max(0, y0 - 1), min(h, y1 + 1)), slice(max(0, x0 - 1), min(w, x1 + 1))
+            self.penalty[ys, xs] = self.tile_penalty(ys, xs)
+        for y0, y1, x0, x1 in boxes:
+            fill_edge_costs(self.costs, self.height_map, self.obstacle_map, self.penalty, y0, y1, x0, x1)
+
+        self.min_penalty = lowest_penalty(self.penalty)
+        self.chunks_rebuilt += len(boxes)
+        self.version += 1
+        for chunk in self._dirty:
+            self.chunk_versions[chunk] = self.version
+        self._dirty.clear()
+        return self.costs
+
+
+class ProfileCache(dict):
+    """
+    Structures of one kind, one per movement profile (or other key), built by 'build' on first use.
+    mark_dirty() forwards a world edit to each of them.
+    """
+
+    def __init__(self, build: Callable[[Any], Any]):
+        super().__init__()
+        self.build = build
+
+    def __missing__(self, key):
+        value = self[key] = self.build(key)
+        return value
+
+    def mark_dirty(self, x0: int, y0: int, x1: int, y1: int):
+        for value in self.values():
+            value.mark_dirty(x0, y0, x1, y1)
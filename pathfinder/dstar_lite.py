@@ -0,0 +1,463 @@
+import math
+import numpy as np
+from numba import njit
+from typing import Callable
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from agent import Agent
+    from .pathfinder import Pathfinder
+
+from .astar_kernel import DIRS_X, DIRS_Y, octile_heuristic
+from .cost_tensor import CostTensor
+from .multimodal import ModeRoute
+
+
+# ------------------- Indexed two-key heap -------------------
+# D* Lite keys are compared lexicographically; pos[cell] is the slot of 'cell' in the heap, -1 if absent.
+@njit(cache=True, nogil=True)
+def _less(a1, a2, b1, b2):
+    return a1 < b1 or (a1 == b1 and a2 < b2)
+
+
+@njit(cache=True, nogil=True)
+def _place(k1, k2, items, pos, i, a, b, item):
+    k1[i] = a
+    k2[i] = b
+    items[i] = item
+    pos[item] = i
+
+
+@njit(cache=True, nogil=True)
+def _sift(k1, k2, items, pos, size, i):
+    """Restore the heap order around slot i, moving it up or down."""
+    a, b, item = k1[i], k2[i], items[i]
+    while i > 0:
+        parent = (i - 1) >> 1
+        if not _less(a, b, k1[parent], k2[parent]):
+            break
+        _place(k1, k2, items, pos, i, k1[parent], k2[parent], items[parent])
+        i = parent
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            break
+        if child + 1 < size and _less(k1[child + 1], k2[child + 1], k1[child], k2[child]):
+            child += 1
+        if not _less(k1[child], k2[child], a, b):
+            break
+        _place(k1, k2, items, pos, i, k1[child], k2[child], items[child])
+        i = child
+    _place(k1, k2, items, pos, i, a, b, item)
+
+
+@njit(cache=True, nogil=True)
+def _heap_set(k1, k2, items, pos, size, item, a, b):
+    """Insert 'item' or change its key, returns the new size."""
+    i = pos[item]
+    if i < 0:
+        i = size
+        size += 1
+    _place(k1, k2, items, pos, i, a, b, item)
+    _sift(k1, k2, items, pos, size, i)
+    return size
+
+
+@njit(cache=True, nogil=True)
+def _heap_remove(k1, k2, items, pos, size, item):
+    i = pos[item]
+    if i < 0:
+        return size
+    pos[item] = -1
+    size -= 1
+    if i < size:
+        _place(k1, k2, items, pos, i, k1[size], k2[size], items[size])
+        _sift(k1, k2, items, pos, size, i)
+    return size
+
+
+# ------------------- D* Lite -------------------
+@njit(cache=True, nogil=True)
+def _key(cell, start, w, km, min_penalty, g, rhs):
+    best = min(g[cell], rhs[cell])
+    return best + octile_heuristic(start % w, start // w, cell % w, cell // w, min_penalty) + km, best
+
+
+@njit(cache=True, nogil=True)
+def _update_vertex(costs, cell, start, goal, km, min_penalty, g, rhs, k1, k2, items, pos, size):
+    """Recompute rhs (best step + cost-to-go over the successors) and (re)queue the cell if inconsistent."""
+    w = costs.shape[1]
+    x, y = cell % w, cell // w
+    if cell != goal:
+        best = np.inf
+        for k in range(8):
+            cost = costs[y, x, k]
+            if cost == np.inf:
+                continue
+            value = cost + g[(y + DIRS_Y[k]) * w + x + DIRS_X[k]]
+            if value < best:
+                best = value
+        rhs[cell] = best
+    if g[cell] != rhs[cell]:
+        a, b = _key(cell, start, w, km, min_penalty, g, rhs)
+        return _heap_set(k1, k2, items, pos, size, cell, a, b)
+    return _heap_remove(k1, k2, items, pos, size, cell)
+
+
+@njit(cache=True, nogil=True)
+def _update_predecessors(costs, cell, start, goal, km, min_penalty, g, rhs, k1, k2, items, pos, size):
+    h, w = costs.shape[:2]
+    x, y = cell % w, cell // w
+    for k in range(8):
+        px, py = x + DIRS_X[k], y + DIRS_Y[k]
+        if px < 0 or py < 0 or px >= w or py >= h or costs[py, px, 7 - k] == np.inf:
+            continue
+        size = _update_vertex(costs, py * w + px, start, goal, km, min_penalty, g, rhs, k1, k2, items, pos, size)
+    return size
+
+
+@njit(cache=True, nogil=True)
+def dstar_compute(costs, changed, start, goal, km, min_penalty, g, rhs, k1, k2, items, pos, size, budget):
+    """
+    Re-queue the cells whose outgoing edges changed, then expand until the cost-to-go of 'start'
+    is consistent or 'budget' cells were expanded. g/rhs hold the cost from each cell to 'goal'
+    (the search runs backward).
+
+    Returns:
+        (heap size, expanded cells, True if the cost-to-go of 'start' is consistent)
+    """
+    w = costs.shape[1]
+    for i in range(changed.shape[0]):
+        size = _update_vertex(costs, changed[i], start, goal, km, min_penalty, g, rhs, k1, k2, items, pos, size)
+
+    expanded = 0
+    while size > 0:
+        s1, s2 = _key(start, start, w, km, min_penalty, g, rhs)
+        if not _less(k1[0], k2[0], s1, s2) and rhs[start] == g[start]:
+            break
+        if expanded == budget:
+            return size, expanded, False
+        cell = items[0]
+        old1, old2 = k1[0], k2[0]
+        new1, new2 = _key(cell, start, w, km, min_penalty, g, rhs)
+        if _less(old1, old2, new1, new2):
+            size = _heap_set(k1, k2, items, pos, size, cell, new1, new2)
+            continue
+        expanded += 1
+        if g[cell] > rhs[cell]:
+            g[cell] = rhs[cell]
+            size = _heap_remove(k1, k2, items, pos, size, cell)
+        else:
+            g[cell] = np.inf
+            size = _update_vertex(costs, cell, start, goal, km, min_penalty, g, rhs, k1, k2, items, pos, size)
+        size = _update_predecessors(costs, cell, start, goal, km, min_penalty, g, rhs, k1, k2, items, pos, size)
+    return size, expanded, True
+
+
+@njit(cache=True, nogil=True)
+def dstar_rekey(start, w, km, min_penalty, g, rhs, k1, k2, items, pos, size):
+    """Recompute every queued key (after the heuristic got weaker) and restore the heap order."""
+    for i in range(size):
+        k1[i], k2[i] = _key(items[i], start, w, km, min_penalty, g, rhs)
+    for i in range(size // 2 - 1, -1, -1):
+        _sift(k1, k2, items, pos, size, i)
+
+
+@njit(cache=True, nogil=True)
+def dstar_trace(costs, start, goal, g):
+    """Cells from start to goal descending the cost-to-go, empty if the goal is unreachable."""
+    h, w = costs.shape[:2]
+    cells = np.empty(h * w, dtype=np.int64)
+    if g[start] == np.inf:
+        return cells[:0]
+    cell, n = start, 1
+    cells[0] = cell
+    while cell != goal:
+        if n == h * w:
+            return cells[:0]
+        x, y = cell % w, cell // w
+        best, step = np.inf, -1
+        for k in range(8):
+            cost = costs[y, x, k]
+            if cost == np.inf:
+                continue
+            nxt = (y + DIRS_Y[k]) * w + x + DIRS_X[k]
+            value = cost + g[nxt]
+            if value < best:
+                best, step = value, nxt
+        if step < 0 or best == np.inf:
+            return cells[:0]
+        cell = step
+        cells[n] = cell
+        n += 1
+    return cells[:n]
+
+
+class DStarLite:
+    """
+    D* Lite planner kept alive for the whole move of one agent.
+
+    The search runs backward from the goal, so when the costs change under a running move only
+    the cells whose edges changed are re-queued and the cost-to-go is repaired around them;
+    the agent position moves the search start without invalidating anything.
+    It reads copy-on-write snapshots of the cost tensor: cells are compared against the previous
+    snapshot only in the chunks the tensor rebuilt since.
+
+    With plan=False the first search is deferred: advance() spreads it over frames with a node
+    budget (see Manager.add_search), or the first repair() runs it whole. Moves that never see an
+    edit never pay for it, nor for its grid-sized arrays.
+    """
+
+    def __init__(self, tensor: CostTensor, start: tuple[int, int], goal: tuple[int, int], plan: bool = True):
+        self.tensor = tensor
+        self.costs = tensor.snapshot()
+        self.chunk_versions = tensor.chunk_versions.copy()
+        self.chunk_size = tensor.chunk_size
+        self.min_penalty = tensor.min_penalty
+        w = self.costs.shape[1]
+        self.width = w
+        self.goal = goal
+
+        self._start = start[1] * w + start[0]
+        self._goal = goal[1] * w + goal[0]
+        self._km = 0.0
+        # grid-sized search state, allocated when the first search starts (see _compute)
+        self._g = self._rhs = self._k1 = self._k2 = self._items = self._pos = None
+        self._size = 0
+        self.expanded = 0      # total, for profiling and tests
+        self.repairs = 0
+
+        self.planned = False   # first search started
+        self._consistent = False
+        self._cancelled = False
+        if plan:
+            self._compute(np.empty(0, dtype=np.int64))
+
+    @property
+    def start(self) -> tuple[int, int]:
+        return self._start % self.width, self._start // self.width
+
+    @property
+    def done(self) -> bool:
+        """The cost-to-go of the start is up to date (the first search, if advanced in slices, is over)."""
+        return self._cancelled or (self.planned and self._consistent)
+
+    def _compute(self, changed: np.ndarray, budget: int = -1):
+        if not self.planned:
+            n = self.costs.shape[0] * self.costs.shape[1]
+            self._g = np.full(n, np.inf)
+            self._rhs = np.full(n, np.inf)
+            self._k1 = np.empty(n, dtype=np.float64)
+            self._k2 = np.empty(n, dtype=np.float64)
+            self._items = np.empty(n, dtype=np.int64)
+            self._pos = np.full(n, -1, dtype=np.int64)
+            self._rhs[self._goal] = 0.0
+            changed = np.array([self._goal], dtype=np.int64)  # seeds the queue with the goal
+            self.planned = True
+        self._size, expanded, self._consistent = dstar_compute(
+            self.costs, changed, self._start, self._goal, self._km, self.min_penalty, self._g, self._rhs,
+            self._k1, self._k2, self._items, self._pos, self._size, budget)
+        self.expanded += expanded
+
+    def _changed_cells(self, costs: np.ndarray, chunk_versions: np.ndarray) -> np.ndarray:
+        h, w = costs.shape[:2]
+        cs = self.chunk_size
+        changed = []
+        for cy, cx in zip(*np.nonzero(chunk_versions != self.chunk_versions)):
+            ys = slice(cy * cs, min(h, cy * cs + cs))
+            xs = slice(cx * cs, min(w, cx * cs + cs))
+            ry, rx = np.nonzero(np.any(costs[ys, xs] != self.costs[ys, xs], axis=2))
+            changed.append((ry + ys.start) * w + rx + xs.start)
+        return np.concatenate(changed).astype(np.int64) if changed else np.empty(0, dtype=np.int64)
+
+    def _sync(self, start: tuple[int, int] | None = None) -> np.ndarray:
+        """Take the latest costs of the tensor and the new search start, returns the cells whose edges changed."""
+        costs = self.tensor.snapshot()
+        changed = np.empty(0, dtype=np.int64)
+        if self.planned and costs is not self.costs and not np.array_equal(self.tensor.chunk_versions, self.chunk_versions):
+            changed = self._changed_cells(costs, self.tensor.chunk_versions)
+        self.costs = costs
+        self.chunk_versions = self.tensor.chunk_versions.copy()
+
+        if start is not None:
+            cell = start[1] * self.width + start[0]
+            if cell != self._start:
+                old = self._start
+                self._km += octile_heuristic(old % self.width, old // self.width, start[0], start[1], self.min_penalty)
+                self._start = cell
+        if self.tensor.min_penalty < self.min_penalty:
+            # a cheaper terrain appeared: the heuristic must stay admissible
+            self.min_penalty = self.tensor.min_penalty
+            if self.planned:
+                dstar_rekey(self._start, self.width, self._km, self.min_penalty, self._g, self._rhs,
+                            self._k1, self._k2, self._items, self._pos, self._size)
+        return changed
+
+    def cancel(self):
+        """Give up a first search advanced in slices (the move is over), done() turns True."""
+        self._cancelled = True
+
+    def advance(self, budget: int) -> int:
+        """Expand up to 'budget' cells toward a consistent cost-to-go, returns how many were expanded."""
+        if self.done:
+            return 0
+        expanded = self.expanded
+        self._compute(self._sync(), budget)
+        return self.expanded - expanded
+
+    def repair(self, tensor: CostTensor | None = None, start: tuple[int, int] | None = None) -> bool:
+        """
+        Move the search start to 'start' (the agent tile) and repair the cost-to-go for the
+        edges that changed since the last call, in one go.
+
+        Returns:
+            True if the route from 'start' changed: an edge on it changed, or the cost-to-go
+            along it did (a cheaper way opened). False on the first search, there was no route yet.
+        """
+        if tensor is not None:
+            self.tensor = tensor
+        old_costs, had_route = self.costs, self.done
+        changed = self._sync(start)
+        route = dstar_trace(old_costs, self._start, self._goal, self._g) if had_route else np.empty(0, dtype=np.int64)
+        before = self._g[route] if had_route else None
+
+        self._compute(changed)
+        if len(changed):
+            self.repairs += 1
+        if not had_route:
+            return False
+        if route.size == 0:
+            return bool(np.isfinite(self._g[self._start]))  # the goal was cut off and became reachable
+        return bool(np.isin(changed, route).any() or not np.array_equal(self._g[route], before))
+
+    @property
+    def cost(self) -> float:
+        """Cost from the current start to the goal, inf if unreachable."""
+        if not self.done:
+            self._compute(np.empty(0, dtype=np.int64))
+        return float(self._g[self._start])
+
+    def path(self) -> list[tuple[int, int]] | None:
+        """Tiles from the current start to the goal, None if unreachable."""
+        if not self.done:
+            self._compute(np.empty(0, dtype=np.int64))
+        cells = dstar_trace(self.costs, self._start, self._goal, self._g)
+        if len(cells) == 0:
+            return None
+        return [(int(i % self.width), int(i // self.width)) for i in cells]
+
+
+def route_cost(edge_costs: np.ndarray, tiles: list[tuple[int, int]]) -> float:
+    """Cost of walking 'tiles' on the edge costs, repeated tiles skipped; inf if a step is blocked or not to a neighbor."""
+    cost = 0.0
+    for (x0, y0), (x1, y1) in zip(tiles, tiles[1:]):
+        if (x0, y0) == (x1, y1):
+            continue
+        step = (x1 - x0, y1 - y0)
+        if max(abs(step[0]), abs(step[1])) > 1:
+            return math.inf
+        k = next(k for k in range(8) if (DIRS_X[k], DIRS_Y[k]) == step)
+        cost += float(edge_costs[y0, x0, k])
+    return cost
+
+
+class MoveTracker:
+    """
+    Moves of a Pathfinder kept repaired while the world changes (see Pathfinder.track_move).
+    Each keeps a DStarLite planner, or a ModeRoute when it was planned with modes.
+    """
+
+    def __init__(self, pathfinder: "Pathfinder"):
+        self.pathfinder = pathfinder
+        # agent, command, goal, planner
+        self._moves: list[tuple["Agent", object, tuple[float, float], DStarLite | ModeRoute]] = []
+        self._planning: set[DStarLite] = set()  # first searches running on the frame budget
+        self.edited = False                     # set on world edits, cleared by repair()
+
+    def track(self, agent: "Agent", command, goal: tuple[float, float]):
+        """Follow 'command' (a MoveCommand of 'agent' toward 'goal'), replacing the agent's previous move."""
+        self._moves = [move for move in self._moves if move[0] is not agent]
+        if command.modes is not None:
+            planner = ModeRoute(self.pathfinder.mode_layers(agent))
+        else:
+            start = int(agent.x), int(agent.y)
+            planner = DStarLite(self.pathfinder.cost_tensor(agent), start, (int(goal[0]), int(goal[1])), plan=False)
+        self._moves.append((agent, command, goal, planner))
+
+    def repair(self, add_search: Callable | None = None) -> int:
+        """Repair the tracked moves after edits, see Pathfinder.repair_moves. Returns the routes swapped."""
+        self._moves = [move for move in self._moves if move[1] in move[0].commands and move[1].path]
+        if not self.edited:
+            return 0
+        self.edited = False
+
+        repaired = 0
+        for move in list(self._moves):
+            agent, command, goal, planner = move
+            if isinstance(planner, ModeRoute):
+                repaired += self._reroute_modes(move)
+                continue
+            if planner in self._planning:
+                continue  # first search under way, it reads the edit when it resumes
+            if not planner.planned:
+                if add_search is None:
+                    repaired += self._reroute_first(move)
+                else:
+                    self._planning.add(planner)
+                    add_search(planner, lambda planner, move=move: self._first_plan_progress(move))
+                continue
+            if planner.repair(self.pathfinder.cost_tensor(agent), (int(agent.x), int(agent.y))):
+                repaired += self._reroute(move)
+        return repaired
+
+    def _first_plan_progress(self, move):
+        agent, command, goal, planner = move
+        if move not in self._moves or command not in agent.commands:
+            planner.cancel()  # the move is over, stop spending the budget on it
+        if planner.done:
+            self._planning.discard(planner)
+            if move in self._moves and command in agent.commands:
+                self._reroute_first(move)
+
+    def _reroute_first(self, move) -> int:
+        """Swap in the first D* Lite route if it beats the waypoints the agent follows, returns 1 if swapped."""
+        agent, command, goal, planner = move
+        tensor = self.pathfinder.cost_tensor(agent)
+        planner.repair(tensor, (int(agent.x), int(agent.y)))  # catch up with the agent and the latest edits
+        tiles = [(int(agent.x), int(agent.y))] + [(int(x), int(y)) for x, y in command.path]
+        current = route_cost(tensor.costs, tiles)
+        if planner.cost >= current - 1e-6 * max(1.0, current) and np.isfinite(current):
+            return 0
+        return self._reroute(move)
+
+    def _reroute_modes(self, move) -> int:
+        """Replan a move planned with modes if an edit changed its route and a cheaper one exists, returns 1 if swapped."""
+        agent, command, goal, route = move
+        tiles = [(int(agent.x), int(agent.y))] + [(int(x), int(y)) for x, y in command.path]
+        if not command.modes or not route.repair(tiles, list(command.modes)):
+            return 0
+        planned = self.pathfinder.find_path_modes((agent.x, agent.y), goal, agent)
+        if planned is None:
+            command.replace_path([])  # the goal got cut off, stop here
+            self._moves.remove(move)
+            return 1
+        path, modes = planned
+        current = route.cost(tiles, list(command.modes))
+        if route.cost([(int(x), int(y)) for x, y in path], modes[1:]) >= current - 1e-6 * max(1.0, current) \
+                and np.isfinite(current):
+            return 0
+        command.replace_path(path, position=(agent.x, agent.y), modes=modes)
+        return 1
+
+    def _reroute(self, move) -> int:
+        """Swap the repaired route into the MoveCommand of the move, returns 1."""
+        agent, command, goal, planner = move
+        tiles = planner.path()
+        if tiles is None:
+            command.replace_path([])  # the goal got cut off, stop here
+            self._moves.remove(move)
+            return 1
+        path = [(x + 0.5, y + 0.5) for x, y in tiles]
+        path[-1] = goal
+        command.replace_path(path, position=(agent.x, agent.y))
+        return 1
@@ -0,0 +1,98 @@
+import numpy as np
+from collections import OrderedDict
+from numba import njit
+
+from .astar_kernel import DIRS_X, DIRS_Y, dijkstra_box
+from .cost_tensor import CostTensor
+
+
+@njit(cache=True, nogil=True)
+def flow_directions(edge_costs: np.ndarray, integration: np.ndarray) -> np.ndarray:
+    """
+    Per cell, the direction k of the step that minimizes step cost + remaining cost to the goal.
+    -1 at the goal and where the goal cannot be reached.
+    """
+    h, w = integration.shape
+    out = np.full((h, w), -1, dtype=np.int8)
+    for y in range(h):
+        for x in range(w):
+            if integration[y, x] == 0.0 or integration[y, x] == np.inf:
+                continue
+            best = np.inf
+            for k in range(8):
+                cost = edge_costs[y, x, k]
+                if cost == np.inf:
+                    continue
+                value = cost + integration[y + DIRS_Y[k], x + DIRS_X[k]]
+                if value < best:
+                    best = value
+                    out[y, x] = k
+    return out
+
+
+@njit(cache=True, nogil=True)
+def trace_flow(directions: np.ndarray, start: int) -> np.ndarray:
+    """Cell indices followed from 'start' until the goal (direction -1)."""
+    h, w = directions.shape
+    cells = np.empty(h * w, dtype=np.int64)
+    n = 0
+    cell = start
+    while n < h * w:
+        cells[n] = cell
+        n += 1
+        k = directions[cell // w, cell % w]
+        if k < 0:
+            break
+        cell += DIRS_Y[k] * w + DIRS_X[k]
+    return cells[:n]
+
+
+class FlowField:
+    """
+    Cost-to-goal (integration) field and flow-direction field toward one goal tile.
+
+    One reverse Dijkstra from the goal serves every agent of the movement profile,
+    whatever the group size; agents steer by sampling the directions.
+    """
+
+    def __init__(self, tensor: CostTensor, goal: tuple[int, int]):
+        self.profile = tensor.profile
+        self.version = tensor.version
+        self.goal = goal
+        costs = tensor.refresh()
+        h, w = costs.shape[:2]
+        self.width, self.height = w, h
+        goal_cell = np.array([goal[1] * w + goal[0]], dtype=np.int64)
+        self.integration = dijkstra_box(goal_cell, costs, 0, 0, w, h, True)
+        self.directions = flow_directions(costs, self.integration)
+
+    def reachable(self, x: float, y: float) -> bool:
+        tx, ty = int(x), int(y)
+        return 0 <= tx < self.width and 0 <= ty < self.height and self.integration[ty, tx] < np.inf
+
+    def route(self, x: float, y: float) -> list[tuple[float, float]]:
+        """Tile-center waypoints from (x, y) to the goal tile, empty if the goal cannot be reached."""
+        if not self.reachable(x, y):
+            return []
+        cells = trace_flow(self.directions, int(y) * self.width + int(x))
+        return [(c % self.width + 0.5, c // self.width + 0.5) for c in cells.tolist()]
+
+
+class FlowFieldCache:
+    """The flow fields of the most recent group orders, one per (movement profile, goal tile)."""
+    SIZE = 8  # fields kept, least recently used dropped first
+
+    def __init__(self):
+        self._fields: OrderedDict[tuple, FlowField] = OrderedDict()
+
+    def get(self, tensor: CostTensor, goal: tuple[int, int]) -> FlowField:
+        """Flow field toward tile 'goal' on 'tensor', rebuilt when the costs changed since."""
+        key = (tensor.profile, goal)
+        field = self._fields.get(key)
+        if field is None or field.version != tensor.version:
+            field = FlowField(tensor, goal)
+            self._fields[key] = field
+            if len(self._fields) > self.SIZE:
+                self._fields.popitem(last=False)
+        self._fields.move_to_end(key)
+        return field
@@ -0,0 +1,159 @@
+import numpy as np
+
+from agent import Agent
+from .astar_kernel import DIRS_X, DIRS_Y, astar_box
+from .cost_tensor import CostTensor
+from .pathfinder import Pathfinder
+
+FORMATIONS = ("line", "box", "wedge")
+SLOT_SPACING = 1.0    # tiles between neighbor slots
+REPAIR_MARGIN = 3     # tiles around a gap searched to reconnect a slot path
+
+
+def slot_offsets(shape: str, count: int, spacing: float = SLOT_SPACING) -> np.ndarray:
+    """
+    (count, 2) slot offsets (lateral, back) in tiles, lateral to the right of the heading and back
+    behind the reference point, centered on it.
+    """
+    i = np.arange(count)
+    if shape == "line":
+        offsets = np.stack([i - (count - 1) / 2, np.zeros(count)], axis=1)
+    elif shape == "box":
+        cols = int(np.ceil(np.sqrt(count)))
+        offsets = np.stack([i % cols - (cols - 1) / 2, i // cols], axis=1).astype(np.float64)
+    elif shape == "wedge":
+        rank = (i + 1) // 2
+        side = np.where(i % 2 == 1, -1.0, 1.0)
+        offsets = np.stack([side * rank, rank], axis=1).astype(np.float64)
+    else:
+        raise ValueError(f"Unknown formation '{shape}', known: {', '.join(FORMATIONS)}")
+    offsets -= offsets.mean(axis=0)
+    return offsets * spacing
+
+
+def _polyline(path: list[tuple[float, float]]) -> tuple[np.ndarray, np.ndarray]:
+    """(n, 2) waypoints and the arc length at each of them."""
+    points = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+    return points, np.concatenate([[0.0], np.cumsum(np.hypot(*np.diff(points, axis=0).T))])
+
+
+def _along(points: np.ndarray, arc: np.ndarray, s: float) -> tuple[np.ndarray, np.ndarray]:
+    """Position and unit heading at arc length 's' of a polyline, extended straight past both ends."""
+    if arc[-1] == 0.0:
+        return points[0], np.array([0.0, 1.0])
+    ahead = np.array([np.interp(min(s + 1.0, arc[-1]), arc, points[:, k]) for k in range(2)])
+    behind = np.array([np.interp(max(s - 1.0, 0.0), arc, points[:, k]) for k in range(2)])
+    heading = ahead - behind
+    heading /= max(np.hypot(*heading), 1e-9)
+    clamped = min(max(s, 0.0), arc[-1])
+    position = np.array([np.interp(clamped, arc, points[:, k]) for k in range(2)])
+    return position + (s - clamped) * heading, heading
+
+
+def slot_point(points: np.ndarray, arc: np.ndarray, s: float, offset: np.ndarray) -> np.ndarray:
+    """Where a slot stands while the reference point is at arc length 's'."""
+    lateral, back = offset
+    position, (hx, hy) = _along(points, arc, s - back)
+    return position + lateral * np.array([-hy, hx])
+
+
+def _connect(costs: np.ndarray, a: tuple[int, int], b: tuple[int, int], margin: int) -> list[tuple[int, int]] | None:
+    """Tiles after 'a' up to 'b': one step when they touch, else a search in the box around both."""
+    h, w = costs.shape[:2]
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    if max(abs(dx), abs(dy)) == 1:
+        k = next(k for k in range(8) if (DIRS_X[k], DIRS_Y[k]) == (dx, dy))
+        if np.isfinite(costs[a[1], a[0], k]):
+            return [b]
+    x0, y0 = max(0, min(a[0], b[0]) - margin), max(0, min(a[1], b[1]) - margin)
+    x1, y1 = min(w, max(a[0], b[0]) + margin + 1), min(h, max(a[1], b[1]) + margin + 1)
+    cells = astar_box(a[1] * w + a[0], b[1] * w + b[0], costs, 0.0, x0, y0, x1, y1)
+    if len(cells) == 0:
+        return None
+    return [(int(i % w), int(i // w)) for i in cells[1:]]
+
+
+def slot_path(reference: list[tuple[float, float]], offset: np.ndarray, tensor: CostTensor,
+              start: tuple[float, float], margin: int = REPAIR_MARGIN) -> list[tuple[float, float]] | None:
+    """
+    Path of one slot: the reference path shifted by 'offset', from 'start'.
+
+    Offset tiles the profile cannot stand on fall back onto the reference tile (the slot squeezes
+    behind the others through gaps), consecutive tiles that do not touch are reconnected by a
+    search in a small box around them. None when a gap cannot be repaired locally.
+    """
+    costs = tensor.refresh()
+    passable = ~tensor.obstacle_map & np.isfinite(tensor.penalty)
+    h, w = passable.shape
+    points, arc = _polyline(reference)
+
+    tiles = [(int(start[0]), int(start[1]))]
+    for s, (rx, ry) in zip(arc, points):
+        x, y = slot_point(points, arc, s, offset)
+        tile = int(x), int(y)
+        if not (0 <= tile[0] < w and 0 <= tile[1] < h and passable[tile[1], tile[0]]):
+            tile = int(rx), int(ry)
+        if tile == tiles[-1]:
+            continue
+        step = _connect(costs, tiles[-1], tile, margin)
+        if step is None:
+            step = _connect(costs, tiles[-1], (int(rx), int(ry)), margin)
+            if step is None:
+                return None
+        tiles.extend(step)
+
+    path = [(x + 0.5, y + 0.5) for x, y in tiles]
+    path[0] = start
+    goal = slot_point(points, arc, arc[-1], offset)
+    if (int(goal[0]), int(goal[1])) == tiles[-1]:
+        path[-1] = (float(goal[0]), float(goal[1]))
+    return path
+
+
+class Formation:
+    """
+    One group order in formation: a single reference path is searched from the agent nearest to
+    the group's center to the goal, every agent gets a slot (line, box or wedge) and follows the
+    reference path shifted by its slot offset, repaired locally where the shift hits obstacles.
+    Slots are given to agents minimizing the total distance to the slot starts.
+    """
+
+    def __init__(self, pathfinder: Pathfinder, agents: list[Agent], goal: tuple[float, float],
+                 shape: str = "line", spacing: float = SLOT_SPACING):
+        self.pathfinder = pathfinder
+        self.shape = shape
+        self.goal = goal
+        self.offsets = slot_offsets(shape, len(agents), spacing)
+
+        positions = np.array([(agent.x, agent.y) for agent in agents], dtype=np.float64).reshape(-1, 2)
+        center = positions.mean(axis=0) if len(agents) else np.zeros(2)
+        self.leader = agents[int(np.argmin(np.hypot(*(positions - center).T)))] if agents else None
+        self.reference = None if self.leader is None else \
+            pathfinder.find_path((self.leader.x, self.leader.y), goal, self.leader)
+
+        self.slots: dict[Agent, int] = {}
+        if self.reference is not None:
+            from scipy.optimize import linear_sum_assignment
+            points, arc = _polyline(self.reference)
+            starts = np.array([slot_point(points, arc, 0.0, offset) for offset in self.offsets])
+            distances = np.hypot(positions[:, None, 0] - starts[None, :, 0], positions[:, None, 1] - starts[None, :, 1])
+            rows, cols = linear_sum_assignment(distances)
+            self.slots = {agents[r]: int(c) for r, c in zip(rows, cols)}
+        self._paths: dict[Agent, list[tuple[float, float]] | None] = {}
+
+    def path_for(self, agent: Agent) -> list[tuple[float, float]] | None:
+        """Slot path of 'agent' from where it stands now, None if it has no slot or no way."""
+        if agent not in self._paths:
+            slot = self.slots.get(agent)
+            if slot is None:
+                self._paths[agent] = None
+            else:
+                path = slot_path(self.reference, self.offsets[slot], self.pathfinder.cost_tensor(agent),
+                                 (agent.x, agent.y))
+                if path is None:
+                    # cut off from the reference path by more than a local detour
+                    points, arc = _polyline(self.reference)
+                    goal = slot_point(points, arc, arc[-1], self.offsets[slot])
+                    path = self.pathfinder.find_path((agent.x, agent.y), (float(goal[0]), float(goal[1])), agent)
+                self._paths[agent] = path
+        return self._paths[agent]
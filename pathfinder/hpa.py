@@ -0,0 +1,376 @@
+import math
+import numpy as np
+from numba import njit
+
+from .astar_kernel import DIRS_X, DIRS_Y, FAILED, FOUND, RUNNING, astar_box, dijkstra_box, heap_pop, heap_push, octile_heuristic
+from .cost_tensor import CostTensor
+
+ENTRANCE_SPLIT = 6  # entrances at least this wide get a portal at each end instead of one in the middle
+
+_DIR = {(int(dx), int(dy)): k for k, (dx, dy) in enumerate(zip(DIRS_X, DIRS_Y))}
+EAST, WEST, SOUTH, NORTH = _DIR[(1, 0)], _DIR[(-1, 0)], _DIR[(0, 1)], _DIR[(0, -1)]
+
+
+
+@njit(cache=True, nogil=True)
+def abstract_astar(indptr, indices, weights, node_cells, width, start_costs, goal_costs,
+                   direct, goal, min_penalty):
+    """
+    A* over the portal graph (CSR arrays) with a virtual start and goal node.
+
+    Parameters:
+        start_costs / goal_costs: per portal cost from the start cell / to the goal cell, inf if not connected
+        direct: cost start -> goal without leaving the cluster, inf if not applicable
+
+    Returns:
+        (portal ids of the best route, reached)
+    """
+    n = len(node_cells)
+    start, end = n, n + 1
+    g = np.full(n + 2, np.inf)
+    parent = np.full(n + 2, -1, dtype=np.int64)
+    closed = np.zeros(n + 2, dtype=np.bool_)
+    capacity = len(indices) + 2 * n + 2
+    keys = np.empty(capacity, dtype=np.float64)
+    items = np.empty(capacity, dtype=np.int64)
+    gx, gy = goal % width, goal // width
+
+    g[start] = 0.0
+    size = heap_push(keys, items, 0, 0.0, start)
+    while size > 0:
+        cur, size = heap_pop(keys, items, size)
+        if closed[cur]:
+            continue
+        closed[cur] = True
+        if cur == end:
+            break
+
+        if cur == start:
+            for node in range(n):
+                cost = start_costs[node]
+                if cost < np.inf and cost < g[node]:
+                    g[node] = cost
+                    parent[node] = start
+                    size = heap_push(keys, items, size, cost + octile_heuristic(
+                        node_cells[node] % width, node_cells[node] // width, gx, gy, min_penalty), node)
+            if direct < g[end]:
+                g[end] = direct
+                parent[end] = start
+                size = heap_push(keys, items, size, direct, end)
+            continue
+
+        for e in range(indptr[cur], indptr[cur + 1]):
+            node = indices[e]
+            tentative = g[cur] + weights[e]
+            if not closed[node] and tentative < g[node]:
+                g[node] = tentative
+                parent[node] = cur
+                size = heap_push(keys, items, size, tentative + octile_heuristic(
+                    node_cells[node] % width, node_cells[node] // width, gx, gy, min_penalty), node)
+        if goal_costs[cur] < np.inf and g[cur] + goal_costs[cur] < g[end]:
+            g[end] = g[cur] + goal_costs[cur]
+            parent[end] = cur
+            size = heap_push(keys, items, size, g[end], end)
+
+    if not closed[end]:
+        return np.empty(0, dtype=np.int64), False
+    length = 0
+    node = parent[end]
+    while node != start:
+        length += 1
+        node = parent[node]
+    route = np.empty(length, dtype=np.int64)
+    node = parent[end]
+    for i in range(length - 1, -1, -1):
+        route[i] = node
+        node = parent[node]
+    return route, True
+
+
+class HierarchicalGraph:
+    """
+    HPA* abstraction of one CostTensor.
+
+    The grid is split in clusters (the tensor chunks). Wherever two neighboring clusters can be
+    crossed, portal cells are placed on both sides of the border; portals of one cluster are linked
+    by their shortest path cost inside the cluster. A query searches this small graph first, which
+    also fails fast for unreachable goals, then refines every abstract edge with a box-bounded A*.
+
+    update() follows the tensor chunk versions: only the clusters whose costs changed get new
+    entrances, plus the neighbors whose shared border actually changed.
+    """
+
+    def __init__(self, tensor: CostTensor):
+        self.tensor = tensor
+        self.cluster_size = tensor.chunk_size
+        self.height, self.width = tensor.costs.shape[:2]
+        self.n_cy, self.n_cx = tensor.chunk_versions.shape
+
+        self.borders: dict[tuple[tuple[int, int], tuple[int, int]], list[tuple[int, int]]] = {}  # portal pairs
+        self.intra: dict[tuple[int, int], dict[int, dict[int, float]]] = {}  # cluster -> portal -> {portal: cost}
+        self.inter: dict[int, dict[int, float]] = {}                          # portal -> {portal across: cost}
+        self.clusters_rebuilt = 0
+        self._seen_version = -1
+
+        # portal graph in CSR form for abstract_astar
+        self.node_cells = np.empty(0, dtype=np.int64)
+        self.node_ids: dict[int, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.empty(0, dtype=np.int64)
+        self.weights = np.empty(0, dtype=np.float64)
+
+    # ------------------- geometry -------------------
+    def cluster_of(self, cell: int) -> tuple[int, int]:
+        return (cell // self.width) // self.cluster_size, (cell % self.width) // self.cluster_size
+
+    def box(self, cluster: tuple[int, int]) -> tuple[int, int, int, int]:
+        """(x0, y0, x1, y1) of a cluster."""
+        cy, cx = cluster
+        cs = self.cluster_size
+        return cx * cs, cy * cs, min(self.width, cx * cs + cs), min(self.height, cy * cs + cs)
+
+    def _neighbors(self, cluster: tuple[int, int]):
+        cy, cx = cluster
+        for ny, nx in ((cy - 1, cx), (cy + 1, cx), (cy, cx - 1), (cy, cx + 1)):
+            if 0 <= ny < self.n_cy and 0 <= nx < self.n_cx:
+                yield ny, nx
+
+    def portals(self, cluster: tuple[int, int]) -> set[int]:
+        return set(self.intra.get(cluster, ()))
+
+    # ------------------- building -------------------
+    def update(self):
+        """Bring the abstract graph in line with the cost tensor."""
+        self.tensor.refresh()
+        changed = {tuple(c) for c in np.argwhere(self.tensor.chunk_versions > self._seen_version)}
+        self._seen_version = self.tensor.version
+        if not changed:
+            return
+
+        rebuild = set(changed)
+        border_keys = {tuple(sorted((c, nb))) for c in changed for nb in self._neighbors(c)}
+        for a, b in border_keys:
+            entrances = self._find_entrances(a, b)
+            if self.borders.get((a, b)) != entrances:
+                self.borders[(a, b)] = entrances
+                rebuild.update((a, b))
+
+        self.inter = {}
+        for pairs in self.borders.values():
+            for a, b in pairs:
+                self.inter.setdefault(a, {})[b] = self._step_cost(a, b)
+                self.inter.setdefault(b, {})[a] = self._step_cost(b, a)
+        for cluster in rebuild:
+            self._build_intra(cluster)
+        self.clusters_rebuilt += len(rebuild)
+        self._build_csr()
+
+    def _build_csr(self):
+        cells = sorted({p for edges in self.intra.values() for p in edges} | set(self.inter))
+        self.node_ids = {cell: i for i, cell in enumerate(cells)}
+        self.node_cells = np.array(cells, dtype=np.int64)
+
+        indptr, indices, weights = [0], [], []
+        for cell in cells:
+            targets = dict(self.intra[self.cluster_of(cell)].get(cell, {}))
+            targets.update(self.inter.get(cell, {}))
+            for target, cost in targets.items():
+                indices.append(self.node_ids[target])
+                weights.append(cost)
+            indptr.append(len(indices))
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.weights = np.array(weights, dtype=np.float64)
+
+    def _step_cost(self, a: int, b: int) -> float:
+        w = self.width
+        return float(self.tensor.costs[a // w, a % w, _DIR[(b % w - a % w, b // w - a // w)]])
+
+    def _find_entrances(self, a: tuple[int, int], b: tuple[int, int]) -> list[tuple[int, int]]:
+        """Portal pairs (cell in a, cell in b) on the border of two neighboring clusters."""
+        costs, w = self.tensor.costs, self.width
+        ax0, ay0, ax1, ay1 = self.box(a)
+        if b[1] > a[1]:   # b east of a
+            line = [(y * w + ax1 - 1, y * w + ax1) for y in range(ay0, ay1)]
+            open_ = [np.isfinite(costs[y, ax1 - 1, EAST]) and np.isfinite(costs[y, ax1, WEST]) for y in range(ay0, ay1)]
+        else:             # b south of a
+            line = [((ay1 - 1) * w + x, ay1 * w + x) for x in range(ax0, ax1)]
+            open_ = [np.isfinite(costs[ay1 - 1, x, SOUTH]) and np.isfinite(costs[ay1, x, NORTH]) for x in range(ax0, ax1)]
+
+        entrances = []
+        i = 0
+        while i < len(line):
+            if not open_[i]:
+                i += 1
+                continue
+            j = i
+            while j + 1 < len(line) and open_[j + 1]:
+                j += 1
+            if j - i + 1 >= ENTRANCE_SPLIT:
+                entrances += [line[i], line[j]]
+            else:
+                entrances.append(line[(i + j) // 2])
+            i = j + 1
+        return entrances
+
+    def _build_intra(self, cluster: tuple[int, int]):
+        portals = set()
+        for (a, b), pairs in self.borders.items():
+            if a == cluster:
+                portals.update(p for p, _ in pairs)
+            elif b == cluster:
+                portals.update(q for _, q in pairs)
+
+        x0, y0, x1, y1 = self.box(cluster)
+        w = self.width
+        edges = {}
+        for p in portals:
+            dist = dijkstra_box(np.array([p], dtype=np.int64), self.tensor.costs, x0, y0, x1, y1, False)
+            edges[p] = {q: float(dist[q // w - y0, q % w - x0]) for q in portals
+                        if q != p and np.isfinite(dist[q // w - y0, q % w - x0])}
+        self.intra[cluster] = edges
+
+    # ------------------- query -------------------
+    def _portal_costs(self, cluster: tuple[int, int], dist: np.ndarray) -> np.ndarray:
+        """Per portal id: distance read from a cluster box distance map, inf outside the cluster."""
+        x0, y0, _, _ = self.box(cluster)
+        w = self.width
+        costs = np.full(len(self.node_cells), np.inf)
+        for p in self.intra.get(cluster, ()):
+            costs[self.node_ids[p]] = dist[p // w - y0, p % w - x0]
+        return costs
+
+    def find_path(self, start: int, goal: int) -> np.ndarray | None:
+        """Cell indices from start to goal, None if unreachable."""
+        nodes = self.abstract_route(start, goal)
+        if nodes is None:
+            return None
+        cells = [start]
+        for a, b in zip(nodes, nodes[1:]):
+            cells.extend(self.refine(a, b))
+        return np.array(cells, dtype=np.int64)
+
+    def abstract_route(self, start: int, goal: int) -> list[int] | None:
+        """
+        Route on the portal graph.
+
+        Returns:
+            Cells from start to goal, consecutive ones are linked by an abstract edge (see refine),
+            None if unreachable.
+        """
+        self.update()
+        if start == goal:
+            return [start]
+
+        costs, w = self.tensor.costs, self.width
+        min_penalty = self.tensor.min_penalty
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+
+        # connect the query cells to the portals of their clusters
+        x0, y0, x1, y1 = self.box(start_cluster)
+        dist = dijkstra_box(np.array([start], dtype=np.int64), costs, x0, y0, x1, y1, False)
+        start_costs = self._portal_costs(start_cluster, dist)
+        direct = float(dist[goal // w - y0, goal % w - x0]) if start_cluster == goal_cluster else math.inf
+
+        x0, y0, x1, y1 = self.box(goal_cluster)
+        dist = dijkstra_box(np.array([goal], dtype=np.int64), costs, x0, y0, x1, y1, True)
+        goal_costs = self._portal_costs(goal_cluster, dist)
+        if direct == math.inf and not np.isfinite(goal_costs).any():
+            return None  # goal walled in inside its cluster
+
+        route, reached = abstract_astar(self.indptr, self.indices, self.weights, self.node_cells, w,
+                                        start_costs, goal_costs, direct, goal, min_penalty)
+        if not reached:
+            return None
+        nodes = [start] + self.node_cells[route].tolist() + [goal]
+        return [b for a, b in zip([-1] + nodes, nodes) if a != b]
+
+    def refine(self, a: int, b: int) -> list[int]:
+        """
+        Cells after 'a' up to 'b' along one abstract edge: a single step across a cluster border,
+        a box-bounded A* inside a cluster. Empty if the cluster no longer links them.
+        """
+        cluster = self.cluster_of(a)
+        if cluster != self.cluster_of(b):
+            return [b] if math.isfinite(self._step_cost(a, b)) else []
+        segment = astar_box(a, b, self.tensor.costs, self.tensor.min_penalty, *self.box(cluster))
+        return segment[1:].tolist()
+
+
+class HierarchicalSearch:
+    """
+    HPA* query spread over frames, same interface as IncrementalSearch (see Manager.add_search).
+
+    The abstract route is searched at once: it only runs a Dijkstra inside the two end clusters
+    and a search on the portal graph. Refining its edges is what advance() slices, one abstract
+    edge at a time, each charged the cell count of its cluster box. Until done, path() is the refined
+    prefix of the route, so the agent can start walking on it.
+
+    An edge no longer refined (its cluster changed since) reroutes from the end of the prefix.
+    """
+
+    def __init__(self, graph: HierarchicalGraph, start: int, goal: int):
+        self.graph = graph
+        self.goal = goal
+        self.expanded = 0
+        self.cells = [start]
+        self._credit = 0
+        self._nodes = graph.abstract_route(start, goal)
+        self._next = 1
+        self.status = RUNNING if self._nodes is not None else FAILED
+        self._settle()
+
+    @property
+    def done(self) -> bool:
+        return self.status != RUNNING
+
+    @property
+    def found(self) -> bool:
+        return self.status == FOUND
+
+    def _settle(self):
+        if self.status == RUNNING and self._next >= len(self._nodes):
+            self.status = FOUND
+
+    def advance(self, budget: int) -> int:
+        """
+        Bank 'budget' cells and refine the abstract edges it covers: an edge inside a cluster costs
+        the cells of the cluster, a border crossing one. Budgets below a cluster add up over calls.
+
+        Returns:
+            Cells taken from the budget.
+        """
+        if self.status != RUNNING:
+            return 0
+        self._credit += budget
+        while self.status == RUNNING:
+            a, b = self.cells[-1], self._nodes[self._next]
+            cluster = self.graph.cluster_of(a)
+            if cluster == self.graph.cluster_of(b):
+                x0, y0, x1, y1 = self.graph.box(cluster)
+                cost = (x1 - x0) * (y1 - y0)
+            else:
+                cost = 1
+            if cost > self._credit:
+                break
+            self._credit -= cost
+            segment = self.graph.refine(a, b)
+            if segment:
+                self.cells.extend(segment)
+                self._next += 1
+            else:
+                self._nodes = self.graph.abstract_route(a, self.goal)
+                self._next = 1
+                if self._nodes is None:
+                    self.status = FAILED
+            self._settle()
+        taken = budget if self.status == RUNNING else max(0, budget - self._credit)
+        self.expanded += taken
+        return taken
+
+    def path(self) -> list[tuple[int, int]] | None:
+        """Tiles of the refined route so far, all of them once found; None if the goal cannot be reached."""
+        if self.status == FAILED:
+            return None
+        w = self.graph.width
+        return [(cell % w, cell // w) for cell in self.cells]
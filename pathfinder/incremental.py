@@ -0,0 +1,73 @@
+import numpy as np
+
+from .astar_kernel import FAILED, FOUND, HEAP_START, RUNNING, astar_expand, heap_push
+from .cost_tensor import CostTensor
+
+
+class IncrementalSearch:
+    """
+    Resumable A* between two tiles: open and closed sets persist between advance() calls,
+    so a long search can be spread over several frames with a node budget per frame.
+    Until it is done, path() returns the best-so-far path toward the goal.
+
+    The search runs on a read-only snapshot of the cost tensor, consistent across frames.
+    'landmarks' are the (forward, reverse) fields of an up to date LandmarkSet, if any.
+    """
+
+    def __init__(self, tensor: CostTensor, start: tuple[int, int], goal: tuple[int, int],
+                 landmarks: tuple[np.ndarray, np.ndarray] | None = None):
+        self.costs = tensor.snapshot()
+        self.min_penalty = tensor.min_penalty
+        h, w = self.costs.shape[:2]
+        self.width = w
+        self.start, self.goal = start, goal
+        n = h * w
+        if landmarks is None:
+            landmarks = (np.empty((0, 0), dtype=np.float32), np.empty((0, 0), dtype=np.float32))
+        self._forward, self._reverse = landmarks
+
+        self._goal = goal[1] * w + goal[0]
+        self._g = np.full(n, np.inf)
+        self._parent = np.full(n, -1, dtype=np.int64)
+        self._closed = np.zeros(n, dtype=np.bool_)
+        self._keys = np.empty(HEAP_START, dtype=np.float64)  # grown by astar_expand
+        self._items = np.empty(HEAP_START, dtype=np.int64)
+
+        first = start[1] * w + start[0]
+        self._g[first] = 0.0
+        self._size = heap_push(self._keys, self._items, 0, 0.0, first)
+        self._best = first
+        self._best_h = np.inf
+        self.status = RUNNING
+        self.expanded = 0
+
+    @property
+    def done(self) -> bool:
+        return self.status != RUNNING
+
+    @property
+    def found(self) -> bool:
+        return self.status == FOUND
+
+    def advance(self, budget: int) -> int:
+        """Expand up to 'budget' cells, returns how many were expanded."""
+        if self.done:
+            return 0
+        h, w = self.costs.shape[:2]
+        self.status, self._size, expanded, self._best, self._best_h, self._keys, self._items = astar_expand(
+            self.costs, self._goal, self.min_penalty, self._forward, self._reverse, 0, 0, w, h,
+            self._g, self._parent, self._closed, self._keys, self._items, self._size, budget, self._best, self._best_h)
+        self.expanded += expanded
+        return expanded
+
+    def path(self) -> list[tuple[int, int]] | None:
+        """Tiles from start to the goal once found, else to the best cell so far; None if the goal is unreachable."""
+        if self.status == FAILED:
+            return None
+        cells = []
+        idx = self._best
+        while idx >= 0:
+            cells.append((idx % self.width, idx // self.width))
+            idx = self._parent[idx]
+        cells.reverse()
+        return cells
@@ -0,0 +1,145 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+from numba import njit
+
+from .astar_kernel import astar_search, dijkstra_box
+from .cost_tensor import CostTensor
+
+import logging
+logger = logging.getLogger("pathfinder")
+
+LANDMARK_COUNT = 8     # distance fields per movement profile, two float32 (H, W) arrays each
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _background() -> ThreadPoolExecutor:
+    """One shared thread for every landmark rebuild, the Dijkstra kernels release the GIL."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="landmarks")
+        return _executor
+
+
+@njit(cache=True, nogil=True)
+def astar_landmarks(start, goal, edge_costs, min_penalty, forward, reverse):
+    """
+    A* over the whole grid with max(octile, ALT) as heuristic.
+
+    Parameters:
+        forward, reverse: (k, H * W) float32 distances from / to each landmark
+
+    Returns:
+        (cells from start to goal, empty if unreachable; number of expanded cells)
+    """
+    h, w = edge_costs.shape[:2]
+    return astar_search(start, goal, edge_costs, min_penalty, forward, reverse, 0, 0, w, h)
+
+
+def build_landmarks(costs: np.ndarray, passable: np.ndarray, count: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Farthest-point landmark selection: each new landmark is the passable cell farthest from the
+    ones already picked, among the cells reachable from the map center (small enclosed pockets
+    would waste landmarks; searches there keep the octile bound).
+
+    Returns:
+        (landmark cells, forward (k, H * W) float32, reverse (k, H * W) float32)
+    """
+    h, w = passable.shape
+    candidates = np.flatnonzero(passable)
+    if candidates.size == 0:
+        empty = np.empty((0, h * w), dtype=np.float32)
+        return np.empty(0, dtype=np.int64), empty, empty.copy()
+
+    # seed: the passable cell nearest to the map center, the first landmark is the farthest from it
+    cell = candidates[np.argmin(np.abs(candidates // w - h // 2) + np.abs(candidates % w - w // 2))]
+    nearest = dijkstra_box(np.array([cell], dtype=np.int64), costs, 0, 0, w, h, False).ravel()
+
+    cells, forward, reverse = [], [], []
+    for _ in range(min(count, candidates.size)):
+        score = np.where(np.isinf(nearest[candidates]), -1.0, nearest[candidates])
+        if cells and score.max() <= 0.0:
+            break  # every reachable cell already is a landmark
+        cell = int(candidates[np.argmax(score)])
+        source = np.array([cell], dtype=np.int64)
+        dist_from = dijkstra_box(source, costs, 0, 0, w, h, False).ravel()
+        cells.append(cell)
+        forward.append(dist_from.astype(np.float32))
+        reverse.append(dijkstra_box(source, costs, 0, 0, w, h, True).ravel().astype(np.float32))
+        nearest = dist_from if len(cells) == 1 else np.minimum(nearest, dist_from)
+    return np.array(cells, dtype=np.int64), np.stack(forward), np.stack(reverse)
+
+
+class LandmarkSet:
+    """
+    ALT (A*, landmarks, triangle inequality) preprocessing of one cost tensor.
+
+    The distance fields to and from LANDMARK_COUNT landmarks are rebuilt on a background thread
+    whenever the tensor version changes; until the new fields arrive the set is stale and
+    fields() returns None, searches then fall back to the plain octile heuristic.
+    """
+
+    def __init__(self, tensor: CostTensor, count: int = LANDMARK_COUNT):
+        self.tensor = tensor
+        self.count = count
+        self.cells = np.empty(0, dtype=np.int64)
+        self.forward: np.ndarray | None = None
+        self.reverse: np.ndarray | None = None
+        self.version = -1          # tensor version the fields describe
+        self.rebuilds = 0          # total, for profiling and tests
+        self._future: Future | None = None
+        self._building = -1        # tensor version being built
+
+    @property
+    def ready(self) -> bool:
+        return self.version == self.tensor.version and self.forward is not None
+
+    def update(self, wait: bool = False) -> bool:
+        """
+        Collect a finished rebuild and start a new one if the costs changed since.
+        Call it from the main thread (it refreshes the tensor). Returns ready.
+        """
+        if self._future is not None and (wait or self._future.done()):
+            try:
+                self.cells, self.forward, self.reverse = self._future.result()
+                self.version = self._building
+                self.rebuilds += 1
+            except Exception as e:
+                logger.error(f"Landmark rebuild failed: {e}")
+            self._future = None
+
+        costs = self.tensor.snapshot()
+        if self.version != self.tensor.version and self._future is None:
+            passable = ~self.tensor.obstacle_map & np.isfinite(self.tensor.penalty)
+            self._building = self.tensor.version
+            self._future = _background().submit(build_landmarks, costs, passable, self.count)
+            if wait:
+                return self.update(wait=True)
+        return self.ready
+
+    def fields(self) -> tuple[np.ndarray, np.ndarray] | None:
+        """(forward, reverse) distance fields if they match the current costs, else None."""
+        return (self.forward, self.reverse) if self.ready else None
+
+
+class LandmarkCache(dict):
+    """The LandmarkSet of each movement profile, on maps large enough to need one."""
+    MIN_TILES = 128 * 128  # smaller maps search fast enough on the octile bound alone
+
+    def fields(self, tensor: CostTensor) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        ALT distance fields for 'tensor', None while they are being (re)built in the background
+        or when the map is too small to need them.
+        """
+        h, w = tensor.height_map.shape
+        if h * w < self.MIN_TILES:
+            return None
+        landmarks = self.get(tensor.profile)
+        if landmarks is None:
+            landmarks = self[tensor.profile] = LandmarkSet(tensor)
+        landmarks.update()
+        return landmarks.fields()
@@ -0,0 +1,265 @@
+import numpy as np
+from numba import njit
+
+from agent import MoveMode
+from .astar_kernel import DIRS_X, DIRS_Y, HEAP_START, alt_heuristic, heap_grow, heap_pop, heap_push, octile_heuristic
+from .cost_tensor import CostTensor, MovementProfile
+
+STEEP_SLOPE = 0.15      # height difference to a neighbor above which a land tile must be climbed
+MODE_SWITCH_COST = 1.0  # entering or leaving water, starting or ending a climb: one straight step
+
+# search layers, in ModeLayers.modes order
+WALK, SWIM, CLIMB = 0, 1, 2
+
+
+def slope_map(height_map: np.ndarray, ys: slice = slice(None), xs: slice = slice(None)) -> np.ndarray:
+    """Largest height difference between each tile of height_map[ys, xs] and its 8 neighbors."""
+    h, w = height_map.shape
+    y0, y1, _ = ys.indices(h)
+    x0, x1, _ = xs.indices(w)
+    window = height_map[max(0, y0 - 1):y1 + 1, max(0, x0 - 1):x1 + 1]
+    window = np.pad(window, ((int(y0 == 0), int(y1 == h)), (int(x0 == 0), int(x1 == w))), mode="edge")
+    center = window[1:-1, 1:-1]
+    slope = np.zeros(center.shape, dtype=np.float64)
+    for dy in range(3):
+        for dx in range(3):
+            slope = np.maximum(slope, np.abs(window[dy:dy + y1 - y0, dx:dx + x1 - x0] - center))
+    return slope
+
+
+class ModeCostTensor(CostTensor):
+    """
+    Edge costs of one MovementProfile moving in one search layer: walking (the natural mode) on
+    land flatter than STEEP_SLOPE, swimming on water or climbing on any land. The penalty is
+    1 / the mode multiplier where the layer applies, inf elsewhere.
+    """
+
+    def __init__(self, profile: MovementProfile, layer: int, height_map: np.ndarray, obstacle_map: np.ndarray,
+                 water_map: np.ndarray):
+        self.layer = layer
+        super().__init__(profile, height_map, obstacle_map, water_map)
+
+    @property
+    def mode(self) -> MoveMode:
+        return (self.profile.natural_mode, MoveMode.SWIM, MoveMode.CLIMB)[self.layer]
+
+    def tile_penalty(self, ys: slice, xs: slice) -> np.ndarray:
+        water = self.water_map[ys, xs]
+        if self.layer == SWIM:
+            allowed = water
+        elif self.layer == CLIMB:
+            allowed = ~water
+        else:
+            allowed = ~water & (slope_map(self.height_map, ys, xs) <= STEEP_SLOPE)
+        factor = dict(self.profile.multipliers)[self.mode]
+        return np.where(allowed, 1.0 / factor if factor > 0 else np.inf, np.inf)
+
+    def mark_dirty(self, x0: int, y0: int, x1: int, y1: int):
+        # a height edit changes the slope, so the penalty, of the tiles around it too
+        super().mark_dirty(x0 - 1, y0 - 1, x1 + 1, y1 + 1)
+
+
+class ModeLayers:
+    """The walk, swim and climb cost tensors of one movement profile, refreshed together."""
+
+    def __init__(self, profile: MovementProfile, height_map: np.ndarray, obstacle_map: np.ndarray,
+                 water_map: np.ndarray):
+        self.profile = profile
+        self.tensors = tuple(ModeCostTensor(profile, layer, height_map, obstacle_map, water_map)
+                             for layer in (WALK, SWIM, CLIMB))
+
+    @property
+    def modes(self) -> tuple[MoveMode, ...]:
+        return tuple(tensor.mode for tensor in self.tensors)
+
+    @property
+    def min_penalty(self) -> float:
+        return min(tensor.min_penalty for tensor in self.tensors)
+
+    @property
+    def alt_admissible(self) -> bool:
+        """
+        Every layer costs at least the profile's CostTensor on every tile (climbing is not faster
+        than walking), so the ALT bound of its LandmarkSet is a lower bound here too.
+        """
+        factors = dict(self.profile.multipliers)
+        return factors[MoveMode.CLIMB] <= factors[self.profile.natural_mode]
+
+    def mark_dirty(self, x0: int, y0: int, x1: int, y1: int):
+        for tensor in self.tensors:
+            tensor.mark_dirty(x0, y0, x1, y1)
+
+    def snapshot(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Read-only (walk, swim, climb) costs, see CostTensor.snapshot."""
+        return tuple(tensor.snapshot() for tensor in self.tensors)
+
+
+@njit(cache=True, nogil=True)
+def _step_cost(walk, swim, climb, layer, y, x, k):
+    if layer == WALK:
+        return walk[y, x, k]
+    if layer == SWIM:
+        return swim[y, x, k]
+    return climb[y, x, k]
+
+
+@njit(cache=True, nogil=True)
+def multimodal_astar(start, goal, walk, swim, climb, min_penalty, switch_cost, forward, reverse):
+    """
+    A* over (tile, layer) states: each layer steps on its own edge costs and entering a tile in
+    another layer than the previous step costs 'switch_cost'. The first step picks its layer freely.
+    The heuristic is max(octile, ALT) over the landmark fields 'forward', 'reverse' ((k, H * W),
+    k may be 0), which must bound every layer from below (see ModeLayers.alt_admissible).
+
+    Returns:
+        (cells from start to goal, layer used to enter each cell), empty arrays if unreachable.
+        The start cell gets the layer of the first step.
+    """
+    h, w = walk.shape[:2]
+    n = h * w
+    g = np.full(3 * n, np.inf)
+    parent = np.full(3 * n, -1, dtype=np.int64)
+    closed = np.zeros(3 * n, dtype=np.bool_)
+    keys = np.empty(HEAP_START, dtype=np.float64)  # grown on demand
+    items = np.empty(HEAP_START, dtype=np.int64)
+
+    goal_forward = forward[:, goal].astype(np.float64)
+    goal_reverse = reverse[:, goal].astype(np.float64)
+    gx, gy = goal % w, goal // w
+    size = 0
+    for layer in range(3):
+        g[layer * n + start] = 0.0
+        size = heap_push(keys, items, size, 0.0, layer * n + start)
+
+    while size > 0:
+        state, size = heap_pop(keys, items, size)
+        if closed[state]:
+            continue
+        closed[state] = True
+        layer, cur = state // n, state % n
+
+        if cur == goal:
+            length = 1
+            s = state
+            while parent[s] >= 0:
+                s = parent[s]
+                length += 1
+            cells = np.empty(length, dtype=np.int64)
+            layers = np.empty(length, dtype=np.int64)
+            s = state
+            for i in range(length - 1, -1, -1):
+                cells[i], layers[i] = s % n, s // n
+                s = parent[s]
+            if length > 1:
+                layers[0] = layers[1]
+            return cells, layers
+
+        cx, cy = cur % w, cur // w
+        for k in range(8):
+            nx, ny = cx + DIRS_X[k], cy + DIRS_Y[k]
+            if nx < 0 or ny < 0 or nx >= w or ny >= h:
+                continue
+            nidx = ny * w + nx
+            estimate = -1.0  # computed once per tile, on the first layer that improves it
+            for next_layer in range(3):
+                cost = _step_cost(walk, swim, climb, next_layer, cy, cx, k)
+                if cost == np.inf:
+                    continue
+                nstate = next_layer * n + nidx
+                if closed[nstate]:
+                    continue
+                if next_layer != layer and parent[state] >= 0:
+                    cost += switch_cost
+                tentative = g[state] + cost
+                if tentative < g[nstate]:
+                    if estimate < 0.0:
+                        estimate = max(octile_heuristic(nx, ny, gx, gy, min_penalty),
+                                       alt_heuristic(forward, reverse, nidx, goal_forward, goal_reverse))
+                    if estimate == np.inf:
+                        break  # a landmark proves the goal cannot be reached from this tile
+                    g[nstate] = tentative
+                    parent[nstate] = state
+                    if size == keys.shape[0]:
+                        keys, items = heap_grow(keys, items)
+                    size = heap_push(keys, items, size, tentative + estimate, nstate)
+
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+
+class ModeRoute:
+    """
+    The (tile, mode) route of a move planned with plan_modes, priced on the ModeLayers snapshot it
+    was last checked against: repair() tells whether an edit changed what is left of it.
+    """
+
+    def __init__(self, layers: ModeLayers):
+        self.layers = layers
+        self.costs = layers.snapshot()
+
+    def cost(self, tiles: list[tuple[int, int]], modes: list[MoveMode], costs=None) -> float:
+        """
+        Cost of stepping into tiles[i + 1] in modes[i], with MODE_SWITCH_COST between steps in
+        different modes as multimodal_astar counts it; repeated tiles are skipped, inf if a step is not allowed.
+        """
+        costs = self.costs if costs is None else costs
+        order = self.layers.modes
+        total, previous = 0.0, -1
+        for (x0, y0), (x1, y1), mode in zip(tiles, tiles[1:], modes):
+            if (x0, y0) == (x1, y1):
+                continue
+            step = (x1 - x0, y1 - y0)
+            if max(abs(step[0]), abs(step[1])) > 1 or mode not in order:
+                return np.inf
+            k = next(k for k in range(8) if (DIRS_X[k], DIRS_Y[k]) == step)
+            layer = order.index(mode)
+            total += float(costs[layer][y0, x0, k])
+            if previous >= 0 and layer != previous:
+                total += MODE_SWITCH_COST
+            previous = layer
+        return total
+
+    def repair(self, tiles: list[tuple[int, int]], modes: list[MoveMode]) -> bool:
+        """Move on to the latest costs, True if the cost of the route changed with them."""
+        costs = self.layers.snapshot()
+        changed = self.cost(tiles, modes) != self.cost(tiles, modes, costs)
+        self.costs = costs
+        return changed
+
+
+def search_modes(costs: tuple[np.ndarray, np.ndarray, np.ndarray], min_penalty: float,
+                 start: tuple[int, int], goal: tuple[int, int],
+                 landmarks: tuple[np.ndarray, np.ndarray] | None = None) -> list[tuple[int, int, int]] | None:
+    """
+    (x, y, layer) from start to goal over snapshot (walk, swim, climb) costs, the layer of the step
+    entering each tile; None if unreachable. 'landmarks' are the ALT fields of the profile's
+    CostTensor, only when ModeLayers.alt_admissible.
+    """
+    walk, swim, climb = costs
+    h, w = walk.shape[:2]
+    if landmarks is None:
+        landmarks = (np.empty((0, h * w), dtype=np.float32), np.empty((0, h * w), dtype=np.float32))
+    cells, used = multimodal_astar(start[1] * w + start[0], goal[1] * w + goal[0], walk, swim, climb,
+                                   min_penalty, MODE_SWITCH_COST, *landmarks)
+    if len(cells) == 0:
+        return None
+    return [(int(i % w), int(i // w), int(layer)) for i, layer in zip(cells.tolist(), used.tolist())]
+
+
+def mode_waypoints(rows: list[tuple[int, int, int]], modes: tuple[MoveMode, ...], start: tuple[float, float],
+                   goal: tuple[float, float]) -> tuple[list[tuple[float, float]], list[MoveMode]]:
+    """Waypoints at the tile centers of search_modes rows, from 'start' to 'goal', with the MoveMode of each segment."""
+    path = [(x + 0.5, y + 0.5) for x, y, _ in rows]
+    path[0] = start
+    path[-1] = goal
+    return path, [modes[layer] for _, _, layer in rows]
+
+
+def plan_modes(layers: ModeLayers, start: tuple[int, int], goal: tuple[int, int],
+               landmarks: tuple[np.ndarray, np.ndarray] | None = None
+               ) -> tuple[list[tuple[int, int]], list[MoveMode]] | None:
+    """Tiles from start to goal with the MoveMode of the step entering each tile, None if unreachable."""
+    rows = search_modes(layers.snapshot(), layers.min_penalty, start, goal, landmarks)
+    if rows is None:
+        return None
+    modes = layers.modes
+    return [(x, y) for x, y, _ in rows], [modes[layer] for _, _, layer in rows]
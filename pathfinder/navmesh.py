@@ -0,0 +1,369 @@
+import numpy as np
+from numba import njit
+
+from .astar_kernel import heap_pop, heap_push
+from .cost_tensor import CHUNK_SIZE, CostTensor
+
+
+@njit(cache=True, nogil=True)
+def merge_rectangles(blocked, penalty, local):
+    """
+    Greedy rectangle cover of the free cells of one chunk window: from each uncovered cell, grow
+    right then down over free uncovered cells of the same penalty.
+
+    Parameters:
+        blocked, penalty: (h, w) cells of the window
+        local: (h, w) int32 output, rectangle label 1..n, 0 on blocked cells
+
+    Returns:
+        (n, 4) int64 rectangles (x0, y0, x1, y1) in window cells, ends exclusive.
+    """
+    h, w = blocked.shape
+    rects = np.empty((h * w, 4), dtype=np.int64)
+    local[:, :] = 0
+    count = 0
+    for y in range(h):
+        for x in range(w):
+            if blocked[y, x] or local[y, x] != 0:
+                continue
+            p = penalty[y, x]
+            xe = x + 1
+            while xe < w and not blocked[y, xe] and local[y, xe] == 0 and penalty[y, xe] == p:
+                xe += 1
+            ye = y + 1
+            while ye < h:
+                row_free = True
+                for xx in range(x, xe):
+                    if blocked[ye, xx] or local[ye, xx] != 0 or penalty[ye, xx] != p:
+                        row_free = False
+                        break
+                if not row_free:
+                    break
+                ye += 1
+            count += 1
+            local[y:ye, x:xe] = count
+            rects[count - 1, 0], rects[count - 1, 1] = x, y
+            rects[count - 1, 2], rects[count - 1, 3] = xe, ye
+    return rects[:count].copy()
+
+
+@njit(cache=True, nogil=True)
+def _region(local, offsets, chunk_size, x, y):
+    label = local[y, x]
+    if label == 0:
+        return -1
+    return offsets[y // chunk_size, x // chunk_size] + label - 1
+
+
+@njit(cache=True, nogil=True)
+def find_portals(local, offsets, chunk_size, rects):
+    """
+    Shared edges between rectangles, scanned along the right and bottom side of each one.
+
+    Returns:
+        (m, 2) int64 region pairs (a, b) and (m, 4) float64 portal segments (x0, y0, x1, y1) in
+        cell coordinates; each portal is listed once per direction.
+    """
+    h, w = local.shape
+    bound = 0
+    for r in range(rects.shape[0]):
+        bound += 2 * (rects[r, 2] - rects[r, 0] + rects[r, 3] - rects[r, 1])
+    pairs = np.empty((bound, 2), dtype=np.int64)
+    segments = np.empty((bound, 4), dtype=np.float64)
+    m = 0
+    for r in range(rects.shape[0]):
+        x0, y0, x1, y1 = rects[r, 0], rects[r, 1], rects[r, 2], rects[r, 3]
+        for side in range(2):
+            # side 0: column x1 right of the rectangle, side 1: row y1 below it
+            if (side == 0 and x1 >= w) or (side == 1 and y1 >= h):
+                continue
+            length = y1 - y0 if side == 0 else x1 - x0
+            i = 0
+            while i < length:
+                x, y = (x1, y0 + i) if side == 0 else (x0 + i, y1)
+                other = _region(local, offsets, chunk_size, x, y)
+                j = i + 1
+                while j < length:
+                    nx, ny = (x1, y0 + j) if side == 0 else (x0 + j, y1)
+                    if _region(local, offsets, chunk_size, nx, ny) != other:
+                        break
+                    j += 1
+                if other >= 0:
+                    if side == 0:
+                        sx0, sy0, sx1, sy1 = float(x1), float(y0 + i), float(x1), float(y0 + j)
+                    else:
+                        sx0, sy0, sx1, sy1 = float(x0 + i), float(y1), float(x0 + j), float(y1)
+                    pairs[m, 0], pairs[m, 1] = r, other
+                    pairs[m + 1, 0], pairs[m + 1, 1] = other, r
+                    for t in range(2):
+                        segments[m + t, 0], segments[m + t, 1] = sx0, sy0
+                        segments[m + t, 2], segments[m + t, 3] = sx1, sy1
+                    m += 2
+                i = j
+    return pairs[:m].copy(), segments[:m].copy()
+
+
+@njit(cache=True, nogil=True)
+def _crossing(px, py, segments, e, tx, ty):
+    """
+    Point of portal e where the line from (px, py) toward (tx, ty) crosses it, clamped to the
+    portal; the portal point nearest to (px, py) when the line runs parallel to it.
+    """
+    x0, y0, x1, y1 = segments[e, 0], segments[e, 1], segments[e, 2], segments[e, 3]
+    if x0 == x1:  # vertical portal
+        y = py if tx == px else py + (x0 - px) / (tx - px) * (ty - py)
+        return x0, min(max(y, y0), y1)
+    x = px if ty == py else px + (y0 - py) / (ty - py) * (tx - px)
+    return min(max(x, x0), x1), y0
+
+
+@njit(cache=True, nogil=True)
+def region_astar(start, goal, sx, sy, gx, gy, region_cost, indptr, neighbors, segments, min_cost):
+    """
+    A* over regions. Each region is entered at the point where its portal meets the line toward
+    the goal; crossing a region costs the distance between its entry and exit points times its
+    cost per cell.
+
+    Returns:
+        int64 portal (edge) indices from start to goal region, [-1] if unreachable.
+    """
+    r = region_cost.shape[0]
+    g = np.full(r, np.inf)
+    via = np.full(r, -1, dtype=np.int64)      # portal the region was entered through
+    came = np.full(r, -1, dtype=np.int64)
+    ex = np.empty(r, dtype=np.float64)
+    ey = np.empty(r, dtype=np.float64)
+    closed = np.zeros(r, dtype=np.bool_)
+    keys = np.empty(neighbors.shape[0] + 2, dtype=np.float64)
+    items = np.empty(neighbors.shape[0] + 2, dtype=np.int64)
+
+    g[start] = 0.0
+    ex[start], ey[start] = sx, sy
+    size = heap_push(keys, items, 0, 0.0, start)
+    while size > 0:
+        cur, size = heap_pop(keys, items, size)
+        if closed[cur]:
+            continue
+        closed[cur] = True
+        if cur == goal:
+            length = 0
+            node = cur
+            while came[node] >= 0:
+                length += 1
+                node = came[node]
+            route = np.empty(length, dtype=np.int64)
+            node = cur
+            for i in range(length - 1, -1, -1):
+                route[i] = via[node]
+                node = came[node]
+            return route
+
+        for e in range(indptr[cur], indptr[cur + 1]):
+            nxt = neighbors[e]
+            if closed[nxt]:
+                continue
+            px, py = _crossing(ex[cur], ey[cur], segments, e, gx, gy)
+            tentative = g[cur] + np.hypot(px - ex[cur], py - ey[cur]) * region_cost[cur]
+            if nxt == goal:
+                tentative += np.hypot(gx - px, gy - py) * region_cost[nxt]
+            if tentative < g[nxt]:
+                g[nxt] = tentative
+                via[nxt], came[nxt] = e, cur
+                ex[nxt], ey[nxt] = px, py
+                estimate = 0.0 if nxt == goal else np.hypot(gx - px, gy - py) * min_cost
+                size = heap_push(keys, items, size, tentative + estimate, nxt)
+    return np.full(1, -1, dtype=np.int64)
+
+
+@njit(cache=True, nogil=True)
+def _area2(ax, ay, bx, by, cx, cy):
+    return (cx - ax) * (by - ay) - (bx - ax) * (cy - ay)
+
+
+@njit(cache=True, nogil=True)
+def funnel(lefts, rights):
+    """
+    Simple stupid funnel: the shortest polyline through a corridor of portals.
+    lefts/rights: (n, 2) portal ends as seen walking the corridor, the first and last portals
+    are the start and goal points (both ends equal). Returns the (m, 2) waypoints.
+    """
+    n = lefts.shape[0]
+    out = np.empty((n + 1, 2), dtype=np.float64)
+    out[0] = lefts[0]
+    m = 1
+    ax, ay = lefts[0, 0], lefts[0, 1]
+    lx, ly, rx, ry = ax, ay, ax, ay
+    apex = left = right = 0
+    i = 1
+    while i < n:
+        nlx, nly, nrx, nry = lefts[i, 0], lefts[i, 1], rights[i, 0], rights[i, 1]
+        if _area2(ax, ay, rx, ry, nrx, nry) <= 0.0:
+            if (ax == rx and ay == ry) or _area2(ax, ay, lx, ly, nrx, nry) > 0.0:
+                rx, ry, right = nrx, nry, i
+            else:
+                out[m, 0], out[m, 1] = lx, ly  # right crossed over left: left becomes a corner
+                m += 1
+                ax, ay, apex = lx, ly, left
+                rx, ry, right = ax, ay, apex
+                i = apex + 1
+                continue
+        if _area2(ax, ay, lx, ly, nlx, nly) >= 0.0:
+            if (ax == lx and ay == ly) or _area2(ax, ay, rx, ry, nlx, nly) < 0.0:
+                lx, ly, left = nlx, nly, i
+            else:
+                out[m, 0], out[m, 1] = rx, ry
+                m += 1
+                ax, ay, apex = rx, ry, right
+                lx, ly, left = ax, ay, apex
+                i = apex + 1
+                continue
+        i += 1
+    if out[m - 1, 0] != lefts[n - 1, 0] or out[m - 1, 1] != lefts[n - 1, 1]:
+        out[m] = lefts[n - 1]
+        m += 1
+    return out[:m].copy()
+
+
+class NavMesh:
+    """
+    Navigation mesh of axis-aligned rectangles over a fine cell grid (the world's subdivision
+    cells), for one movement profile.
+
+    Free cells of equal terrain penalty are merged into rectangles chunk by chunk, neighbor
+    rectangles are joined by portals along their shared edges. Searches run A* over the
+    rectangles and straighten the corridor with the funnel algorithm. mark_dirty() flags the
+    chunks touching changed cells, refresh() merges only those again; slopes are not priced.
+    """
+
+    def __init__(self, obstacle: np.ndarray, penalty: np.ndarray, cells_per_tile: int = 1,
+                 chunk_size: int | None = None):
+        self.obstacle = obstacle               # (H, W) cells, read in place
+        self.penalty = penalty                 # (H / cells_per_tile, W / cells_per_tile) tiles, read in place
+        self.cells_per_tile = cells_per_tile
+        self.chunk_size = CHUNK_SIZE * cells_per_tile if chunk_size is None else chunk_size
+
+        h, w = obstacle.shape
+        cs = self.chunk_size
+        self.local = np.zeros((h, w), dtype=np.int32)
+        self.counts = np.zeros((-(-h // cs), -(-w // cs)), dtype=np.int64)
+        self.offsets = np.zeros_like(self.counts)
+        self._chunk_rects: dict[tuple[int, int], np.ndarray] = {}
+        self.rects = np.empty((0, 4), dtype=np.int64)
+        self.region_cost = np.empty(0, dtype=np.float64)   # per cell of distance, 1 + penalty
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.neighbors = np.empty(0, dtype=np.int64)
+        self.segments = np.empty((0, 4), dtype=np.float64)
+        self.chunks_merged = 0                              # total, for profiling and tests
+        self._dirty: set[tuple[int, int]] = {(cy, cx) for cy in range(self.counts.shape[0])
+                                             for cx in range(self.counts.shape[1])}
+
+    @property
+    def region_count(self) -> int:
+        self.refresh()
+        return self.rects.shape[0]
+
+    def mark_dirty(self, x0: int, y0: int, x1: int, y1: int):
+        """Cells [x0, x1) x [y0, y1) changed (obstacles or terrain)."""
+        h, w = self.local.shape
+        cs = self.chunk_size
+        x0, y0, x1, y1 = max(0, x0), max(0, y0), min(w, x1), min(h, y1)
+        for cy in range(y0 // cs, (y1 - 1) // cs + 1):
+            for cx in range(x0 // cs, (x1 - 1) // cs + 1):
+                self._dirty.add((cy, cx))
+
+    def refresh(self):
+        if not self._dirty:
+            return
+        h, w = self.local.shape
+        cs, n = self.chunk_size, self.cells_per_tile
+        for cy, cx in self._dirty:
+            ys, xs = slice(cy * cs, min(h, cy * cs + cs)), slice(cx * cs, min(w, cx * cs + cs))
+            tiles = self.penalty[ys.start // n:-(-ys.stop // n), xs.start // n:-(-xs.stop // n)]
+            penalty = np.repeat(np.repeat(tiles, n, axis=0), n, axis=1)
+            penalty = penalty[ys.start - ys.start // n * n:, xs.start - xs.start // n * n:]
+            penalty = np.ascontiguousarray(penalty[:ys.stop - ys.start, :xs.stop - xs.start])
+            blocked = np.asarray(self.obstacle[ys, xs], dtype=np.bool_) | ~np.isfinite(penalty)
+            local = np.empty(blocked.shape, dtype=np.int32)
+            rects = merge_rectangles(blocked, penalty, local)
+            self.local[ys, xs] = local
+            rects[:, [0, 2]] += xs.start
+            rects[:, [1, 3]] += ys.start
+            self._chunk_rects[(cy, cx)] = rects
+            self.counts[cy, cx] = len(rects)
+        self.chunks_merged += len(self._dirty)
+        self._dirty.clear()
+
+        counts = self.counts.ravel()
+        self.offsets = (np.cumsum(counts) - counts).reshape(self.counts.shape)
+        order = sorted(self._chunk_rects)  # row-major, same order as the offsets
+        self.rects = np.concatenate([self._chunk_rects[chunk] for chunk in order]) if order \
+            else np.empty((0, 4), dtype=np.int64)
+        self.region_cost = 1.0 + self.penalty[self.rects[:, 1] // n, self.rects[:, 0] // n]
+
+        pairs, segments = find_portals(self.local, self.offsets, cs, self.rects)
+        order = np.argsort(pairs[:, 0], kind="stable")
+        self.neighbors = pairs[order, 1]
+        self.segments = segments[order]
+        self.indptr = np.searchsorted(pairs[order, 0], np.arange(len(self.rects) + 1)).astype(np.int64)
+
+    def region_at(self, x: float, y: float) -> int:
+        """Rectangle holding the cell at (x, y) in cell coordinates, -1 if blocked or outside."""
+        self.refresh()
+        h, w = self.local.shape
+        cx, cy = int(x), int(y)
+        if not (0 <= cx < w and 0 <= cy < h) or self.local[cy, cx] == 0:
+            return -1
+        cs = self.chunk_size
+        return int(self.offsets[cy // cs, cx // cs] + self.local[cy, cx] - 1)
+
+    def find_path(self, start: tuple[float, float], goal: tuple[float, float]) -> list[tuple[float, float]] | None:
+        """Waypoints from start to goal in cell coordinates, None when either is blocked or no corridor joins them."""
+        a, b = self.region_at(*start), self.region_at(*goal)
+        if a < 0 or b < 0:
+            return None
+        if a == b:
+            return [start, goal]  # rectangles are convex
+        route = region_astar(a, b, start[0], start[1], goal[0], goal[1], self.region_cost, self.indptr,
+                             self.neighbors, self.segments, float(self.region_cost.min()))
+        if len(route) and route[0] < 0:
+            return None
+
+        lefts = np.empty((len(route) + 2, 2), dtype=np.float64)
+        rights = np.empty_like(lefts)
+        lefts[0] = rights[0] = start
+        lefts[-1] = rights[-1] = goal
+        region = a
+        for i, e in enumerate(route.tolist()):
+            x0, y0, x1, y1 = self.segments[e]
+            rx0, ry0, rx1, ry1 = self.rects[region]
+            # seen from inside the region being left, the right end is clockwise from the left one
+            cx, cy = 0.5 * (rx0 + rx1), 0.5 * (ry0 + ry1)
+            if (x0 - cx) * (y1 - cy) - (y0 - cy) * (x1 - cx) < 0:
+                lefts[i + 1], rights[i + 1] = (x0, y0), (x1, y1)
+            else:
+                lefts[i + 1], rights[i + 1] = (x1, y1), (x0, y0)
+            region = self.neighbors[e]
+        return [(float(x), float(y)) for x, y in funnel(lefts, rights)]
+
+
+class NavMeshCache(dict):
+    """One NavMesh per movement profile over the same cells, told about edits in tiles."""
+
+    def __init__(self, obstacle: np.ndarray, cells_per_tile: int):
+        super().__init__()
+        self.obstacle = obstacle
+        self.cells_per_tile = cells_per_tile
+
+    def mesh(self, tensor: CostTensor) -> NavMesh:
+        """Up to date mesh of the profile of 'tensor', which must be refreshed: the mesh reads its penalty."""
+        mesh = self.get(tensor.profile)
+        if mesh is None:
+            mesh = self[tensor.profile] = NavMesh(self.obstacle, tensor.penalty, self.cells_per_tile)
+        mesh.refresh()
+        return mesh
+
+    def mark_dirty(self, x0: int, y0: int, x1: int, y1: int):
+        """Tiles [x0, x1) x [y0, y1) changed."""
+        n = self.cells_per_tile
+        for mesh in self.values():
+            mesh.mark_dirty(x0 * n, y0 * n, x1 * n, y1 * n)
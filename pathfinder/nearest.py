@@ -0,0 +1,201 @@
+import numpy as np
+from collections import OrderedDict
+from typing import Callable
+
+from world import World
+from agent import Agent
+
+from .astar_kernel import DIRS_X, DIRS_Y, dijkstra_box
+from .cost_tensor import CostTensor, MovementProfile
+from .flow_field import flow_directions, trace_flow
+from .pathfinder import Pathfinder
+
+# feature finder: (pathfinder, argument after ':' or None) -> (H, W) bool mask of target tiles
+FeatureFinder = Callable[[Pathfinder, str | None], np.ndarray]
+
+
+def water_tiles(pathfinder: Pathfinder, arg: str | None = None) -> np.ndarray:
+    return pathfinder.water_map.copy()
+
+
+def tree_tiles(pathfinder: Pathfinder, species: str | None = None) -> np.ndarray:
+    """Tiles holding a tree, of one species ('tree:oak', names as in TREE_DATA) or any ('tree')."""
+    mask = np.zeros((pathfinder.height, pathfinder.width), dtype=np.bool_)
+    elements = World.get_instance().elements
+    species = species.lower() if species is not None else None
+    for obj in elements[elements != None]:  # noqa: E711, element-wise on the object array
+        if species is None or getattr(obj, "name", "").lower() == species:
+            x, y = obj.tile
+            mask[y, x] = True
+    return mask
+
+
+class TargetField:
+    """
+    Cost-to-nearest-target field of one feature class for one movement profile.
+
+    A single reverse multi-source Dijkstra from every target serves all nearest-target queries:
+    the nearest target and the path to it are read by following the flow directions, in
+    O(path length). Targets the profile cannot stand on (trees, water for walkers) are
+    approached from their passable neighbors.
+    """
+
+    def __init__(self, tensor: CostTensor, targets: np.ndarray):
+        self.profile = tensor.profile
+        self.tensor = tensor
+        self.version = tensor.version
+        self.costs = tensor.snapshot()  # kept to tell which edges later edits changed
+        self.chunk_versions = tensor.chunk_versions.copy()
+        self.targets_stale = False      # set on world edits, the targets are compared on next use
+        h, w = self.costs.shape[:2]
+        self.width, self.height = w, h
+
+        self.sources = self._sources(tensor, targets)
+        ys, xs = np.nonzero(self.sources)
+        cells = (ys * w + xs).astype(np.int64)
+        self.integration = dijkstra_box(cells, self.costs, 0, 0, w, h, True)
+        self.directions = flow_directions(self.costs, self.integration)
+
+    @staticmethod
+    def _sources(tensor: CostTensor, targets: np.ndarray) -> np.ndarray:
+        """Passable target tiles and the passable neighbors of the impassable ones."""
+        h, w = targets.shape
+        passable = ~tensor.obstacle_map & np.isfinite(tensor.penalty)
+        blocked = targets & ~passable
+        around = np.zeros_like(blocked)
+        padded = np.pad(blocked, 1)
+        for dy in range(3):
+            for dx in range(3):
+                around |= padded[dy:dy + h, dx:dx + w]
+        return (targets | around) & passable
+
+    def follow(self, tensor: CostTensor, targets: np.ndarray | None = None) -> bool:
+        """
+        Carry the field over to the current costs of 'tensor' (and 'targets', None: unchanged)
+        when no change alters it: the sources are the same, no changed edge lay on a shortest
+        route and none opens a shorter one.
+
+        Returns:
+            False when the field must be rebuilt.
+        """
+        if tensor is not self.tensor:
+            return False
+        if targets is not None and not np.array_equal(self._sources(tensor, targets), self.sources):
+            return False
+        costs = tensor.snapshot()
+        if tensor.version == self.version:
+            return True
+        cs = tensor.chunk_size
+        integration = self.integration
+        for cy, cx in zip(*np.nonzero(tensor.chunk_versions != self.chunk_versions)):
+            ys, xs = slice(cy * cs, (cy + 1) * cs), slice(cx * cs, (cx + 1) * cs)
+            old, new = self.costs[ys, xs], costs[ys, xs]
+            iy, ix, k = np.nonzero(old != new)
+            if len(k) == 0:
+                continue
+            y, x = iy + ys.start, ix + xs.start
+            before, after = old[iy, ix, k], new[iy, ix, k]
+            g_u, g_v = integration[y, x], integration[y + DIRS_Y[k], x + DIRS_X[k]]
+            tolerance = 1e-9 * np.maximum(1.0, np.where(np.isfinite(g_u), g_u, 0.0))
+            with np.errstate(invalid="ignore"):
+                shortcut = (after < before) & (after + g_v < g_u - tolerance)
+                cut = (after > before) & np.isfinite(g_u) & (np.abs(before + g_v - g_u) <= tolerance)
+            if shortcut.any() or cut.any():
+                return False
+        self.costs, self.chunk_versions, self.version = costs, tensor.chunk_versions.copy(), tensor.version
+        return True
+
+    def distance(self, x: float, y: float) -> float:
+        """Cost from (x, y) to the nearest target, inf when none is reachable."""
+        tx, ty = int(x), int(y)
+        if not (0 <= tx < self.width and 0 <= ty < self.height):
+            return np.inf
+        return float(self.integration[ty, tx])
+
+    def route(self, x: float, y: float) -> list[tuple[float, float]]:
+        """Tile-center waypoints from (x, y) to the nearest target, empty if none is reachable."""
+        if self.distance(x, y) == np.inf:
+            return []
+        cells = trace_flow(self.directions, int(y) * self.width + int(x))
+        return [(c % self.width + 0.5, c // self.width + 0.5) for c in cells.tolist()]
+
+    def nearest(self, x: float, y: float) -> tuple[int, int] | None:
+        """Tile where the route from (x, y) ends, None if no target is reachable."""
+        route = self.route(x, y)
+        return (int(route[-1][0]), int(route[-1][1])) if route else None
+
+
+class NearestTargetService:
+    """
+    "Walk to the nearest reachable X" for gathering-style tasks.
+
+    Feature classes are named: 'water', 'tree' or 'tree:<species>', plus whatever register() adds
+    (stockpiles, buildings ...). One TargetField is cached per (feature, movement profile) and
+    dropped when a world edit moves its targets or touches its routes, or the feature is
+    re-registered.
+    """
+    FIELD_CACHE = 16  # fields kept, least recently used dropped first
+
+    def __init__(self, pathfinder: Pathfinder):
+        self.pathfinder = pathfinder
+        self.features: dict[str, FeatureFinder] = {"water": water_tiles, "tree": tree_tiles}
+        self._fields: OrderedDict[tuple[str, MovementProfile], TargetField] = OrderedDict()
+        self.fields_built = 0  # total, for profiling and tests
+        World.get_instance().subscribe_changes(self.notify_cells_changed)
+
+    def close(self):
+        """Stop following world changes, call it when the service is dropped."""
+        World.get_instance().unsubscribe_changes(self.notify_cells_changed)
+
+    def register(self, name: str, finder: FeatureFinder):
+        """Add or replace a feature class; call it again when its targets moved."""
+        self.features[name] = finder
+        self.invalidate(name)
+
+    def invalidate(self, name: str | None = None):
+        """Forget the fields of feature 'name' (all features if None)."""
+        for key in [key for key in self._fields if name is None or key[0].split(":")[0] == name]:
+            del self._fields[key]
+
+    def notify_cells_changed(self, x0: int, y0: int, x1: int, y1: int):
+        # the edit may have moved targets: each field compares them on its next use (see field())
+        for field in self._fields.values():
+            field.targets_stale = True
+
+    def field(self, feature: str, agent: Agent) -> TargetField:
+        """Nearest-target field of 'feature' for the movement profile of 'agent'."""
+        name, _, arg = feature.partition(":")
+        if name not in self.features:
+            raise KeyError(f"Unknown feature class '{name}', known: {', '.join(self.features)}")
+        tensor = self.pathfinder.cost_tensor(agent)
+        key = (feature, tensor.profile)
+        field = self._fields.get(key)
+        targets = None
+        if field is not None:
+            if field.targets_stale:
+                targets = self.features[name](self.pathfinder, arg or None)
+            if field.follow(tensor, targets):
+                field.targets_stale = False
+            else:
+                field = None
+        if field is None:
+            if targets is None:
+                targets = self.features[name](self.pathfinder, arg or None)
+            field = TargetField(tensor, targets)
+            self.fields_built += 1
+            self._fields[key] = field
+            if len(self._fields) > self.FIELD_CACHE:
+                self._fields.popitem(last=False)
+        self._fields.move_to_end(key)
+        return field
+
+    def find_nearest(self, agent: Agent, feature: str) -> list[tuple[float, float]] | None:
+        """
+        Path from the agent to its nearest reachable target of 'feature', starting at the
+        agent position; None when no target can be reached.
+        """
+        route = self.field(feature, agent).route(agent.x, agent.y)
+        if not route:
+            return None
+        route[0] = (agent.x, agent.y)
+        return route
@@ -0,0 +1,147 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+import numpy as np
+
+PATH_CACHE_SIZE = 256    # paths kept
+CORRIDOR_MARGIN = 1      # tiles around a path whose edits invalidate it
+INDEX_CHUNK = 16         # tiles per side of the spatial index buckets
+
+
+class PathCache:
+    """
+    Bounded LRU cache of tile paths, thread safe.
+
+    Keys are (start tile, goal tile, movement profile, world version), plus "modes" for the
+    (x, y, layer) rows of mode searches (see ModeLayers). An entry is dropped when an
+    edit touches its corridor, the path tiles plus CORRIDOR_MARGIN, not on every world change.
+    Identical requests computed at the same time are deduplicated: the first caller searches,
+    the others wait for its result.
+    """
+
+    def __init__(self, capacity: int = PATH_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries: OrderedDict[Hashable, np.ndarray] = OrderedDict()   # key -> (n, 2) int tiles
+        self._index: dict[tuple[int, int], set[Hashable]] = {}             # chunk -> keys crossing it
+        self._pending: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._invalidations = 0
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def _chunks(self, tiles: np.ndarray) -> set[tuple[int, int]]:
+        lo = (tiles[:, :2] - CORRIDOR_MARGIN) // INDEX_CHUNK
+        hi = (tiles[:, :2] + CORRIDOR_MARGIN) // INDEX_CHUNK
+        chunks = set()
+        for (cx0, cy0), (cx1, cy1) in zip(lo.tolist(), hi.tolist()):
+            for cy in range(cy0, cy1 + 1):
+                for cx in range(cx0, cx1 + 1):
+                    chunks.add((cy, cx))
+        return chunks
+
+    def _remove(self, key: Hashable):
+        tiles = self._entries.pop(key)
+        for chunk in self._chunks(tiles):
+            keys = self._index.get(chunk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[chunk]
+
+    def get(self, key: Hashable) -> list[tuple[int, int]] | None:
+        with self._lock:
+            tiles = self._entries.get(key)
+            if tiles is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [tuple(t) for t in tiles.tolist()]
+
+    def put(self, key: Hashable, path: list[tuple[int, int]]):
+        with self._lock:
+            self._put(key, path)
+
+    def _put(self, key: Hashable, path: list[tuple[int, int]]):
+        if key in self._entries:
+            self._remove(key)
+        tiles = np.array(path, dtype=np.int64).reshape(len(path), -1)  # (x, y) or (x, y, layer) rows
+        self._entries[key] = tiles
+        for chunk in self._chunks(tiles):
+            self._index.setdefault(chunk, set()).add(key)
+        while len(self._entries) > self.capacity:
+            self._remove(next(iter(self._entries)))
+
+    def get_or_compute(self, key: Hashable,
+                       compute: Callable[[], list[tuple[int, int]] | None]) -> list[tuple[int, int]] | None:
+        """
+        Cached path for 'key', else compute() it once even if several threads ask at the same time.
+        Unreachable results (None) are not cached: any edit could open a way.
+        """
+        with self._lock:
+            tiles = self._entries.get(key)
+            if tiles is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return [tuple(t) for t in tiles.tolist()]
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._pending[key] = future
+                self.misses += 1
+                invalidations = self._invalidations
+            else:
+                self.deduplicated += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            path = compute()
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._pending.pop(key, None)
+            # a result computed while its area was edited may already be stale
+            if path is not None and invalidations == self._invalidations:
+                self._put(key, path)
+        future.set_result(path)
+        return path
+
+    def invalidate_box(self, x0: int, y0: int, x1: int, y1: int) -> int:
+        """Drop the paths whose corridor touches tiles [x0, x1) x [y0, y1), returns how many."""
+        with self._lock:
+            self._invalidations += 1
+            candidates = set()
+            for cy in range((y0 - CORRIDOR_MARGIN) // INDEX_CHUNK, (y1 - 1 + CORRIDOR_MARGIN) // INDEX_CHUNK + 1):
+                for cx in range((x0 - CORRIDOR_MARGIN) // INDEX_CHUNK, (x1 - 1 + CORRIDOR_MARGIN) // INDEX_CHUNK + 1):
+                    candidates |= self._index.get((cy, cx), set())
+
+            dropped = 0
+            for key in candidates:
+                tiles = self._entries[key]
+                xs, ys = tiles[:, 0], tiles[:, 1]
+                hit = ((xs >= x0 - CORRIDOR_MARGIN) & (xs < x1 + CORRIDOR_MARGIN) &
+                       (ys >= y0 - CORRIDOR_MARGIN) & (ys < y1 + CORRIDOR_MARGIN))
+                if hit.any():
+                    self._remove(key)
+                    dropped += 1
+            return dropped
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += 1
+            self._entries.clear()
+            self._index.clear()
@@ -0,0 +1,173 @@
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+from agent import Agent
+from .astar_kernel import astar_kernel
+from .landmarks import astar_landmarks
+from .cost_tensor import MovementProfile
+from .multimodal import mode_waypoints, search_modes
+from .pathfinder import Pathfinder
+
+import logging
+logger = logging.getLogger("pathfinder")
+
+PATH_WORKERS = 2         # search threads, the numba kernels release the GIL
+LATENCY_WINDOW = 256     # requests kept for the latency statistics
+
+
+class PathService:
+    """
+    Off-frame path requests.
+
+    request() snapshots the cost tensor of the agent's movement profile (read-only, see
+    CostTensor.snapshot) and queues the search on a thread pool. Identical requests in flight
+    are served once through the Pathfinder's PathCache. Results are handed back on the main
+    thread by poll(), call it once per frame; a result is dropped if the agent got a newer
+    request meanwhile or the world was swapped.
+
+    Requests with 'modes' search the walk/swim/climb ModeLayers instead, cached and deduplicated
+    the same way under their own keys; their callback gets the planned move mode of every segment too.
+    """
+
+    def __init__(self, pathfinder: Pathfinder, workers: int = PATH_WORKERS):
+        self.pathfinder = pathfinder
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="path")
+        self._done: deque[tuple[Future, Agent, Callable | None, int]] = deque()
+        self._latest: dict[Agent, Future] = {}
+        self._lock = threading.Lock()
+        self._queued = 0
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)  # seconds, request to result
+        self.completed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests submitted and not finished yet."""
+        return self._queued
+
+    def request(self, agent: Agent, goal: tuple[float, float],
+                on_done: Callable[..., None] | None = None, modes: bool = False) -> Future:
+        """
+        Queue a path search for 'agent' toward 'goal'. on_done(path) runs in poll() on the main thread,
+        path is None when the goal cannot be reached. With 'modes' it is on_done(path, modes),
+        see Pathfinder.find_path_modes.
+        """
+        if modes:
+            return self._request_modes(agent, goal, on_done)
+        finder = self.pathfinder
+        start = (agent.x, agent.y)
+        resolved = finder.resolve_goal(start, goal, agent)
+        goal = goal if resolved is None else resolved
+        start_tile = int(start[0]), int(start[1])
+        goal_tile = int(goal[0]), int(goal[1])
+        tensor = finder.cost_tensor(agent)
+        costs, min_penalty = tensor.snapshot(), tensor.min_penalty
+        fields = finder.landmark_fields(tensor)  # immutable arrays, safe to read from the workers
+        key = (start_tile, goal_tile, MovementProfile.of(agent), finder.world_version)
+        width, version = finder.width, finder.world_version
+
+        def search():
+            if resolved is None:
+                return None  # rejected by the reachability index, nothing to flood
+            start_cell, goal_cell = start_tile[1] * width + start_tile[0], goal_tile[1] * width + goal_tile[0]
+            if fields is not None:
+                cells, _ = astar_landmarks(start_cell, goal_cell, costs, min_penalty, *fields)
+            else:
+                cells = astar_kernel(start_cell, goal_cell, costs, min_penalty)
+            return [(int(i % width), int(i // width)) for i in cells] if len(cells) else None
+
+        def task():
+            tiles = finder.path_cache.get_or_compute(key, search)
+            if tiles is None or version != finder.world_version:
+                return None
+            path = [(x + 0.5, y + 0.5) for x, y in tiles]
+            path[0] = start
+            path[-1] = goal
+            return path
+
+        return self._submit(agent, task, on_done, version)
+
+    def _request_modes(self, agent: Agent, goal: tuple[float, float], on_done) -> Future:
+        finder = self.pathfinder
+        start = (agent.x, agent.y)
+        resolved = finder.resolve_goal(start, goal, agent)
+        goal = goal if resolved is None else resolved
+        start_tile = int(start[0]), int(start[1])
+        goal_tile = int(goal[0]), int(goal[1])
+        layers = finder.mode_layers(agent)
+        costs, min_penalty, move_modes = layers.snapshot(), layers.min_penalty, layers.modes
+        fields = finder.mode_landmark_fields(agent)
+        key = (start_tile, goal_tile, layers.profile, finder.world_version, "modes")
+        version = finder.world_version
+
+        def search():
+            if resolved is None:
+                return None
+            return search_modes(costs, min_penalty, start_tile, goal_tile, fields)
+
+        def task():
+            rows = finder.path_cache.get_or_compute(key, search)
+            if rows is None or version != finder.world_version:
+                return None, None
+            return mode_waypoints(rows, move_modes, start, goal)
+
+        return self._submit(agent, task, None if on_done is None else lambda result: on_done(*result), version)
+
+    def _submit(self, agent: Agent, task: Callable, on_done, version: int) -> Future:
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+        future = self._executor.submit(task)
+        self._latest[agent] = future
+        future.add_done_callback(lambda f: self._finished(f, agent, on_done, submitted, version))
+        return future
+
+    def _finished(self, future: Future, agent: Agent, on_done, submitted: float, version: int):
+        with self._lock:
+            self._queued -= 1
+            self.completed += 1
+            self.latencies.append(time.perf_counter() - submitted)
+            self._done.append((future, agent, on_done, version))
+
+    def poll(self) -> int:
+        """Deliver the finished requests on the calling (main) thread, returns how many were delivered."""
+        with self._lock:
+            done, self._done = self._done, deque()
+        delivered = 0
+        for future, agent, on_done, version in done:
+            if self._latest.get(agent) is future:
+                del self._latest[agent]
+            else:
+                continue  # superseded by a newer order
+            if version != self.pathfinder.world_version:
+                continue
+            if future.exception() is not None:
+                logger.error(f"Path request failed: {future.exception()}")
+                continue
+            if on_done is not None:
+                on_done(future.result())
+            delivered += 1
+        return delivered
+
+    def cancel(self, agent: Agent):
+        """Forget the pending request of 'agent', its result will not be delivered."""
+        self._latest.pop(agent, None)
+
+    def stats(self) -> dict[str, float]:
+        """Queue depth and latency of the last requests in milliseconds."""
+        with self._lock:
+            latencies = np.array(self.latencies) * 1000.0
+        return {
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "latency_mean_ms": float(latencies.mean()) if latencies.size else 0.0,
+            "latency_p95_ms": float(np.percentile(latencies, 95)) if latencies.size else 0.0,
+            "latency_max_ms": float(latencies.max()) if latencies.size else 0.0,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
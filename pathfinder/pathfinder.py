@@ -1,8 +1,20 @@
 import numpy as np
 import math
-import heapq
+from typing import Callable
 from world import World
-from agent import Agent
+from agent import Agent, MoveMode
+
+from .astar_kernel import astar_kernel
+from .cost_tensor import CHUNK_SIZE, CostTensor, MovementProfile, ProfileCache, build_edge_costs, lowest_penalty
+from .hpa import HierarchicalGraph, HierarchicalSearch
+from .flow_field import FlowField, FlowFieldCache
+from .path_cache import PathCache
+from .incremental import FAILED, IncrementalSearch
+from .dstar_lite import MoveTracker
+from .reachability import ReachabilityCache, ReachabilityIndex
+from .landmarks import LandmarkCache, astar_landmarks
+from .multimodal import ModeLayers, mode_waypoints, search_modes
+from .navmesh import NavMesh, NavMeshCache
 
 # ------------------- Movement Cost -------------------
 def movement_cost(from_x: int, from_y: int, to_x: int, to_y: int,
@@ -25,93 +37,262 @@ def heuristic(x1: int, y1: int, x2: int, y2: int) -> float:
     """Euclidean distance heuristic for A*."""
     return math.hypot(x2 - x1, y2 - y1)
 
+# ------------------- Terrain penalty -------------------
+def terrain_penalty_grid(agent: Agent, width: int, height: int) -> np.ndarray:
+    """
+    Per tile terrain penalty (agent.base_speed / agent.speed_at) for the A* kernel.
+    Tiles the agent cannot move on (speed 0) get an infinite penalty.
+    """
+    penalty = np.empty((height, width), dtype=np.float64)
+    for y in range(height):
+        for x in range(width):
+            speed = agent.speed_at(x, y)
+            penalty[y, x] = agent.base_speed / speed if speed > 0 else np.inf
+    return penalty
+
 # ------------------- A* Search -------------------
 def astar_find_path(start_x: int, start_y: int, goal_x: int, goal_y: int,
                     width: int, height: int,
                     height_map: np.ndarray,
                     obstacle_map: np.ndarray,
-                    agent: Agent) -> list[tuple[int, int]] | None:
+                    agent: Agent,
+                    edge_costs: np.ndarray | None = None,
+                    min_penalty: float = 0.0) -> list[tuple[int, int]] | None:
     """
-    A* search for pathfinding on a grid.
+    A* search for pathfinding on a grid, the search itself runs in astar_kernel.
+    'edge_costs' is a precomputed (H, W, 8) cost tensor (see CostTensor), built from the maps and
+    terrain_penalty_grid(agent) when missing.
     Returns list of (x, y) tiles from start to goal, or None if unreachable.
     """
-    # Priority queue: (f_score, x, y, g_score)
-    open_list = []
-    heapq.heappush(open_list, (heuristic(start_x, start_y, goal_x, goal_y),
-                               start_x, start_y, 0.0))
-    
-    # Maps to track path and costs
-    parent_map = -np.ones((height, width), dtype=np.int64)
-    g_map = np.full((height, width), np.inf, dtype=np.float64)
-    g_map[start_y, start_x] = 0.0
-
-    # 8 possible movement directions
-    dirs = [(-1, -1), (-1, 0), (-1, 1),
-            (0, -1),          (0, 1),
-            (1, -1),  (1, 0), (1, 1)]
-
-    while open_list:
-        f_curr, x_curr, y_curr, g_curr = heapq.heappop(open_list)
-
-        # Goal reached: reconstruct path
-        if x_curr == goal_x and y_curr == goal_y:
-            path = []
-            idx = y_curr * width + x_curr
-            while idx >= 0:
-                y = idx // width
-                x = idx % width
-                path.append((x, y))
-                idx = parent_map[y, x]
-            return path[::-1]  # reverse path
-
-        # Explore neighbors
-        for dx, dy in dirs:
-            nx, ny = x_curr + dx, y_curr + dy
-            if 0 <= nx < width and 0 <= ny < height:
-                if obstacle_map[ny, nx]:
-                    continue
-
-                # Prevent diagonal corner cutting
-                if dx != 0 and dy != 0:
-                    if obstacle_map[y_curr, nx] and obstacle_map[ny, x_curr]:
-                        continue
-
-                tentative_g = g_curr + movement_cost(x_curr, y_curr, nx, ny, height_map, agent)
-                if tentative_g < g_map[ny, nx]:
-                    g_map[ny, nx] = tentative_g
-                    f_new = tentative_g + heuristic(nx, ny, goal_x, goal_y)
-                    heapq.heappush(open_list, (f_new, nx, ny, tentative_g))
-                    parent_map[ny, nx] = y_curr * width + x_curr
-
-    # Path not found
-    return None
+    if edge_costs is None:
+        penalty = terrain_penalty_grid(agent, width, height)
+        edge_costs = build_edge_costs(np.ascontiguousarray(height_map, dtype=np.float64),
+                                      np.ascontiguousarray(obstacle_map, dtype=np.bool_),
+                                      penalty)
+        min_penalty = lowest_penalty(penalty)
+
+    cells = astar_kernel(start_y * width + start_x, goal_y * width + goal_x, edge_costs, min_penalty)
+    if len(cells) == 0:
+        return None
+    return [(int(i % width), int(i // width)) for i in cells]
 
 # ------------------- Pathfinder Wrapper -------------------
 class Pathfinder:
     """Wrapper for A* pathfinding in a World."""
+    HPA_MIN_DISTANCE = CHUNK_SIZE  # moves this long are searched on the HierarchicalGraph
+    SLICED_MIN_DISTANCE = 2 * CHUNK_SIZE  # player moves this long are planned over frames (start_search)
+    GOAL_SNAP_RADIUS = 4  # tiles searched around an unreachable goal for a reachable one
 
     def __init__(self):
+        self.world_version = 0
+        self.path_cache = PathCache()
+        self.reset()
+        World.get_instance().subscribe_changes(self.notify_cells_changed)
+
+    def close(self):
+        """Stop following world changes, call it when the pathfinder is dropped."""
+        World.get_instance().unsubscribe_changes(self.notify_cells_changed)
+
+    def reset(self):
+        """Re-read the world layers, call it after the world was regenerated."""
         world = World.get_instance()
-        # Convert height and obstacle maps to NumPy arrays
-        self.height_map = np.array(world.topology, dtype=np.float64)
-        self.obstacle_map = np.array(world.obstacle, dtype=np.bool_)
+        self.world_version += 1  # cached paths of the previous world never match again
         self.width = world.size_x
         self.height = world.size_y
+        self.height_map = np.empty((self.height, self.width), dtype=np.float64)
+        self.obstacle_map = np.empty((self.height, self.width), dtype=np.bool_)
+        self.water_map = np.empty((self.height, self.width), dtype=np.bool_)
+        self._read_layers(0, 0, self.width, self.height)
+        maps = self.height_map, self.obstacle_map, self.water_map
+        # one per movement profile, built on first use
+        self._tensors = ProfileCache(lambda profile: CostTensor(profile, *maps))
+        self._hierarchies = ProfileCache(lambda profile: HierarchicalGraph(self._tensors[profile]))
+        self._mode_layers = ProfileCache(lambda profile: ModeLayers(profile, *maps))
+        self._reachability = ReachabilityCache(self.obstacle_map, self.water_map)
+        self._landmarks = LandmarkCache()
+        self._navmeshes = NavMeshCache(world.obstacle, world.gen.config.TILE_SUBDIVISIONS)
+        self._flow_fields = FlowFieldCache()
+        self.moves = MoveTracker(self)
+
+    def _read_layers(self, x0: int, y0: int, x1: int, y1: int):
+        """
+        Copy the world layers of tiles [x0, x1) x [y0, y1) at tile resolution: sub-tile heights
+        are averaged and a tile is an obstacle when all its cells are.
+        """
+        world = World.get_instance()
+        N = world.gen.config.TILE_SUBDIVISIONS
+        h, w = y1 - y0, x1 - x0
+        topology = np.asarray(world.topology[y0 * N:y1 * N, x0 * N:x1 * N], dtype=np.float64)
+        obstacle = np.asarray(world.obstacle[y0 * N:y1 * N, x0 * N:x1 * N], dtype=np.bool_)
+        self.height_map[y0:y1, x0:x1] = topology.reshape(h, N, w, N).mean(axis=(1, 3))
+        self.obstacle_map[y0:y1, x0:x1] = obstacle.reshape(h, N, w, N).all(axis=(1, 3))
+        tiles = world.tiles[y0:y1, x0:x1]
+        self.water_map[y0:y1, x0:x1] = [[tile is not None and tile.is_water for tile in row] for row in tiles]
+
+    def notify_cells_changed(self, x0: int, y0: int, x1: int, y1: int):
+        """Terrain, topology or obstacles of tiles [x0, x1) x [y0, y1) changed."""
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(self.width, x1), min(self.height, y1)
+        if x0 >= x1 or y0 >= y1:
+            return
+        self._read_layers(x0, y0, x1, y1)
+        # hierarchies, landmarks and flow fields follow the tensor versions
+        for cache in (self._tensors, self._reachability, self._mode_layers, self._navmeshes):
+            cache.mark_dirty(x0, y0, x1, y1)
+        self.path_cache.invalidate_box(x0, y0, x1, y1)
+        self.moves.edited = True
+
+    def cost_tensor(self, agent: Agent) -> CostTensor:
+        """Up to date edge costs for the movement profile of 'agent'."""
+        tensor = self._tensors[MovementProfile.of(agent)]
+        tensor.refresh()
+        return tensor
+
+    def hierarchy(self, agent: Agent) -> HierarchicalGraph:
+        """HPA* abstract graph for the movement profile of 'agent', built on its cost tensor."""
+        return self._hierarchies[self.cost_tensor(agent).profile]
+
+    def mode_layers(self, agent: Agent) -> ModeLayers:
+        """Walk, swim and climb edge costs for the movement profile of 'agent'."""
+        return self._mode_layers[MovementProfile.of(agent)]
+
+    def navmesh(self, agent: Agent) -> NavMesh:
+        """Navigation mesh over the subdivision cells for the movement profile of 'agent'."""
+        return self._navmeshes.mesh(self.cost_tensor(agent))
+
+    def landmark_fields(self, tensor: CostTensor) -> tuple[np.ndarray, np.ndarray] | None:
+        """ALT distance fields for 'tensor', None while they are rebuilt or on small maps (see LandmarkCache)."""
+        return self._landmarks.fields(tensor)
+
+    def mode_landmark_fields(self, agent: Agent) -> tuple[np.ndarray, np.ndarray] | None:
+        """ALT fields usable by the mode search of 'agent' (see ModeLayers.alt_admissible), else None."""
+        if not self.mode_layers(agent).alt_admissible:
+            return None
+        return self.landmark_fields(self.cost_tensor(agent))
+
+    def reachability(self, agent: Agent) -> ReachabilityIndex:
+        """Connected components for the way 'agent' moves (walking only, or walking and swimming)."""
+        return self._reachability.index(MovementProfile.of(agent))
+
+    def on_map(self, point: tuple[float, float]) -> tuple[float, float]:
+        """'point' if it lies on the map, else the center of the nearest border tile."""
+        x, y = point
+        if not 0 <= x < self.width:
+            x = min(max(x, 0.5), self.width - 0.5)
+        if not 0 <= y < self.height:
+            y = min(max(y, 0.5), self.height - 0.5)
+        return x, y
+
+    def resolve_goal(self, start: tuple[float, float], goal: tuple[float, float],
+                     agent: Agent) -> tuple[float, float] | None:
+        """
+        'goal' if it can be reached from 'start', else the center of the nearest reachable tile
+        within GOAL_SNAP_RADIUS; None when there is none.
+        Goals off the map are first moved onto the center of the nearest border tile.
+        Starts on tiles the agent cannot stand on (e.g. stuck in water) are left to the search.
+        """
+        goal = self.on_map(goal)
+        goal_tile = int(goal[0]), int(goal[1])
+        snapped = self._reachability.resolve(MovementProfile.of(agent), (int(start[0]), int(start[1])),
+                                             goal_tile, self.GOAL_SNAP_RADIUS)
+        if snapped is None:
+            return None
+        return goal if snapped == goal_tile else (snapped[0] + 0.5, snapped[1] + 0.5)
+
+    def flow_field(self, goal: tuple[float, float], agent: Agent) -> FlowField:
+        """
+        Flow field toward the tile of 'goal' for the movement profile of 'agent',
+        reused by every group order to the same tile until the costs change.
+        """
+        goal = self.on_map(goal)
+        return self._flow_fields.get(self.cost_tensor(agent), (int(goal[0]), int(goal[1])))
+
+    def start_search(self, start: tuple[float, float], goal: tuple[float, float],
+                     agent: Agent) -> HierarchicalSearch | IncrementalSearch:
+        """
+        Resumable search to advance over several frames (see Manager.add_search).
+        Moves spanning HPA_MIN_DISTANCE tiles get a HierarchicalSearch, the abstract route is found
+        here and only its refinement is sliced; shorter ones, or those HPA cannot route, get an
+        IncrementalSearch. The goal is resolved first (see resolve_goal), an unreachable one gives an
+        already failed search.
+        """
+        resolved = self.resolve_goal(start, goal, agent)
+        target = self.on_map(goal) if resolved is None else resolved
+        start_tile, goal_tile = (int(start[0]), int(start[1])), (int(target[0]), int(target[1]))
+        if resolved is not None and max(abs(goal_tile[0] - start_tile[0]),
+                                        abs(goal_tile[1] - start_tile[1])) >= self.HPA_MIN_DISTANCE:
+            search = HierarchicalSearch(self.hierarchy(agent), start_tile[1] * self.width + start_tile[0],
+                                        goal_tile[1] * self.width + goal_tile[0])
+            if search.status != FAILED:
+                return search
+        tensor = self.cost_tensor(agent)
+        search = IncrementalSearch(tensor, start_tile, goal_tile, self.landmark_fields(tensor))
+        if resolved is None:
+            search.status = FAILED
+        return search
+
+    def track_move(self, agent: Agent, command, goal: tuple[float, float]):
+        """
+        Keep the route of 'command' (a MoveCommand of 'agent' toward 'goal') repaired while the world
+        changes. The D* Lite search only runs once an edit happens during the move.
+        Moves planned with modes (find_path_modes) are watched as a ModeRoute instead: an edit that
+        changes the cost of their route replans them over the mode layers.
+        """
+        self.moves.track(agent, command, goal)
+
+    def repair_moves(self, add_search: Callable | None = None) -> int:
+        """
+        Repair the tracked moves after edits, call it once per frame.
+        Moves whose command finished or was replaced are dropped.
+
+        The first D* Lite search of a move is handed to 'add_search' (Manager.add_search) to run on
+        the per-frame node budget, its route is compared with the one the agent follows once done;
+        without 'add_search' it runs here. Later edits repair the search in place and the waypoints
+        are swapped only when the route changed.
+
+        Returns:
+            Number of routes swapped this call.
+        """
+        return self.moves.repair(add_search)
+
+    def search_tiles(self, start_tile: tuple[int, int], goal_tile: tuple[int, int], agent: Agent) -> list[tuple[int, int]] | None:
+        """Uncached search, list of (x, y) tiles from start to goal or None if unreachable."""
+        distance = max(abs(goal_tile[0] - start_tile[0]), abs(goal_tile[1] - start_tile[1]))
+        if distance >= self.HPA_MIN_DISTANCE:
+            cells = self.hierarchy(agent).find_path(start_tile[1] * self.width + start_tile[0],
+                                                    goal_tile[1] * self.width + goal_tile[0])
+            return None if cells is None else [(int(i % self.width), int(i // self.width)) for i in cells]
+
+        tensor = self.cost_tensor(agent)
+        fields = self.landmark_fields(tensor)
+        if fields is not None:
+            cells, _ = astar_landmarks(start_tile[1] * self.width + start_tile[0],
+                                       goal_tile[1] * self.width + goal_tile[0],
+                                       tensor.costs, tensor.min_penalty, *fields)
+            return [(int(i % self.width), int(i // self.width)) for i in cells] if len(cells) else None
+        return astar_find_path(start_tile[0], start_tile[1],
+                               goal_tile[0], goal_tile[1],
+                               self.width, self.height,
+                               self.height_map,
+                               self.obstacle_map,
+                               agent,
+                               tensor.costs,
+                               tensor.min_penalty)
 
     def find_path(self, start: tuple[float, float], goal: tuple[float, float], agent: Agent) -> list[tuple[float, float]] | None:
         """
         Find path from start to goal for a given agent.
-        Returns list of float positions (tile centers).
+        Returns list of float positions (tile centers), ending at the snapped goal when 'goal'
+        itself cannot be reached (see resolve_goal); None if nothing near it can.
         """
+        goal = self.resolve_goal(start, goal, agent)
+        if goal is None:
+            return None
         start_tile = int(start[0]), int(start[1])
         goal_tile = int(goal[0]), int(goal[1])
 
-        path_tiles = astar_find_path(start_tile[0], start_tile[1],
-                                     goal_tile[0], goal_tile[1],
-                                     self.width, self.height,
-                                     self.height_map,
-                                     self.obstacle_map,
-                                     agent)
+        key = (start_tile, goal_tile, MovementProfile.of(agent), self.world_version)
+        path_tiles = self.path_cache.get_or_compute(key, lambda: self.search_tiles(start_tile, goal_tile, agent))
         if path_tiles is None:
             return None
 
@@ -120,3 +301,39 @@ class Pathfinder:
         path[0] = start
         path[-1] = goal
         return path
+
+    def find_path_modes(self, start: tuple[float, float], goal: tuple[float, float],
+                        agent: Agent) -> tuple[list[tuple[float, float]], list[MoveMode]] | None:
+        """
+        Like find_path, searched over (tile, move mode) states: swimming is priced at the swim
+        multiplier and slopes steeper than STEEP_SLOPE must be climbed.
+        Returns (waypoints, modes), modes[i] the mode of the segment ending at waypoints[i].
+        """
+        goal = self.resolve_goal(start, goal, agent)
+        if goal is None:
+            return None
+        start_tile = int(start[0]), int(start[1])
+        goal_tile = int(goal[0]), int(goal[1])
+        layers = self.mode_layers(agent)
+        fields = self.mode_landmark_fields(agent)
+
+        key = (start_tile, goal_tile, layers.profile, self.world_version, "modes")
+        rows = self.path_cache.get_or_compute(
+            key, lambda: search_modes(layers.snapshot(), layers.min_penalty, start_tile, goal_tile, fields))
+        if rows is None:
+            return None
+        return mode_waypoints(rows, layers.modes, start, goal)
+
+    def find_path_navmesh(self, start: tuple[float, float], goal: tuple[float, float],
+                          agent: Agent) -> list[tuple[float, float]] | None:
+        """
+        Any-angle path from start to goal over the navigation mesh, corners at obstacle cell
+        corners; None if the goal cannot be reached (after resolve_goal).
+        """
+        goal = self.resolve_goal(start, goal, agent)
+        if goal is None:
+            return None
+        mesh = self.navmesh(agent)
+        N = mesh.cells_per_tile
+        path = mesh.find_path((start[0] * N, start[1] * N), (goal[0] * N, goal[1] * N))
+        return None if path is None else [(x / N, y / N) for x, y in path]
@@ -0,0 +1,218 @@
+import numpy as np
+from numba import njit
+
+from agent import MoveMode
+from .astar_kernel import DIRS_X, DIRS_Y
+from .cost_tensor import CHUNK_SIZE, MovementProfile, ProfileCache
+
+
+@njit(cache=True, nogil=True)
+def _step_open(passable, obstacle_map, x, y, k):
+    """Same rule as fill_edge_costs: the step enters a passable tile and does not cut between two obstacles."""
+    h, w = passable.shape
+    dx, dy = DIRS_X[k], DIRS_Y[k]
+    nx, ny = x + dx, y + dy
+    if nx < 0 or ny < 0 or nx >= w or ny >= h or not passable[ny, nx]:
+        return False
+    return not (dx != 0 and dy != 0 and obstacle_map[y, nx] and obstacle_map[ny, x])
+
+
+@njit(cache=True, nogil=True)
+def label_chunk(passable, obstacle_map, local, y0, y1, x0, x1):
+    """
+    Flood-fill the passable tiles of [x0, x1) x [y0, y1) with chunk-local labels 1..n, 0 elsewhere.
+    Returns n.
+    """
+    stack = np.empty((y1 - y0) * (x1 - x0), dtype=np.int64)
+    w = passable.shape[1]
+    local[y0:y1, x0:x1] = 0
+    count = 0
+    for y in range(y0, y1):
+        for x in range(x0, x1):
+            if not passable[y, x] or local[y, x] != 0:
+                continue
+            count += 1
+            local[y, x] = count
+            stack[0] = y * w + x
+            top = 1
+            while top > 0:
+                top -= 1
+                cx, cy = stack[top] % w, stack[top] // w
+                for k in range(8):
+                    nx, ny = cx + DIRS_X[k], cy + DIRS_Y[k]
+                    if nx < x0 or ny < y0 or nx >= x1 or ny >= y1 or local[ny, nx] != 0:
+                        continue
+                    if _step_open(passable, obstacle_map, cx, cy, k):
+                        local[ny, nx] = count
+                        stack[top] = ny * w + nx
+                        top += 1
+    return count
+
+
+@njit(cache=True, nogil=True)
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+@njit(cache=True, nogil=True)
+def join_chunks(passable, obstacle_map, local, offsets, total, chunk_size):
+    """
+    Union the chunk-local components connected across chunk borders.
+    Returns the component root of each of the 'total' global labels (offsets[chunk] + local label - 1).
+    """
+    h, w = local.shape
+    parent = np.arange(total)
+    for y in range(h):
+        for x in range(w):
+            if local[y, x] == 0:
+                continue
+            bx, by = x % chunk_size, y % chunk_size
+            if 0 < bx < chunk_size - 1 and 0 < by < chunk_size - 1:
+                continue  # inner tile, all its steps stay in the chunk
+            a = offsets[y // chunk_size, x // chunk_size] + local[y, x] - 1
+            for k in range(8):
+                nx, ny = x + DIRS_X[k], y + DIRS_Y[k]
+                if nx < 0 or ny < 0 or nx >= w or ny >= h:
+                    continue
+                if nx // chunk_size == x // chunk_size and ny // chunk_size == y // chunk_size:
+                    continue
+                if local[ny, nx] == 0 or not _step_open(passable, obstacle_map, x, y, k):
+                    continue
+                b = offsets[ny // chunk_size, nx // chunk_size] + local[ny, nx] - 1
+                ra, rb = _find(parent, a), _find(parent, b)
+                if ra != rb:
+                    parent[max(ra, rb)] = min(ra, rb)
+    for i in range(total):
+        parent[i] = _find(parent, i)
+    return parent
+
+
+@njit(cache=True, nogil=True)
+def snap_to_component(local, offsets, roots, chunk_size, x, y, component, radius):
+    """Nearest tile (Chebyshev rings, then Euclidean within the ring) of 'component' around (x, y), (-1, -1) if none."""
+    h, w = local.shape
+    for r in range(1, radius + 1):
+        best, bx, by = np.inf, -1, -1
+        for ny in range(max(0, y - r), min(h, y + r + 1)):
+            for nx in range(max(0, x - r), min(w, x + r + 1)):
+                if max(abs(nx - x), abs(ny - y)) != r or local[ny, nx] == 0:
+                    continue
+                if roots[offsets[ny // chunk_size, nx // chunk_size] + local[ny, nx] - 1] != component:
+                    continue
+                d = (nx - x) ** 2 + (ny - y) ** 2
+                if d < best:
+                    best, bx, by = d, nx, ny
+        if bx >= 0:
+            return bx, by
+    return -1, -1
+
+
+class ReachabilityIndex:
+    """
+    Connected components of the tiles a movement kind can stand on (walking only, or walking
+    and swimming), so an unreachable goal is rejected without flooding the map.
+
+    Tiles are labeled per chunk and the chunk components are joined across borders with a
+    union-find: mark_dirty() relabels only the chunks touching changed tiles, the join is redone
+    over chunk components on the next query.
+    """
+
+    def __init__(self, walk: bool, swim: bool, obstacle_map: np.ndarray, water_map: np.ndarray,
+                 chunk_size: int = CHUNK_SIZE):
+        self.walk, self.swim = walk, swim
+        self.obstacle_map = obstacle_map
+        self.water_map = water_map
+        self.chunk_size = chunk_size
+
+        h, w = obstacle_map.shape
+        self.local = np.zeros((h, w), dtype=np.int64)
+        self.counts = np.zeros((-(-h // chunk_size), -(-w // chunk_size)), dtype=np.int64)
+        self.offsets = np.zeros_like(self.counts)
+        self.roots = np.zeros(0, dtype=np.int64)
+        self.chunks_labeled = 0   # total, for profiling and tests
+        self._dirty: set[tuple[int, int]] = {(cy, cx) for cy in range(self.counts.shape[0])
+                                             for cx in range(self.counts.shape[1])}
+
+    @staticmethod
+    def kind(profile: MovementProfile) -> tuple[bool, bool]:
+        """(walks, swims) of a movement profile: the only thing reachability depends on."""
+        factors = dict(profile.multipliers)
+        return factors[profile.natural_mode] > 0, factors[MoveMode.SWIM] > 0
+
+    def passable(self) -> np.ndarray:
+        land = ~self.water_map if self.walk else np.zeros_like(self.water_map)
+        water = self.water_map if self.swim else np.zeros_like(self.water_map)
+        return ~self.obstacle_map & (land | water)
+
+    def mark_dirty(self, x0: int, y0: int, x1: int, y1: int):
+        h, w = self.local.shape
+        cs = self.chunk_size
+        x0, y0 = max(0, x0 - 1), max(0, y0 - 1)
+        x1, y1 = min(w, x1 + 1), min(h, y1 + 1)
+        for cy in range(y0 // cs, (y1 - 1) // cs + 1):
+            for cx in range(x0 // cs, (x1 - 1) // cs + 1):
+                self._dirty.add((cy, cx))
+
+    def refresh(self):
+        if not self._dirty:
+            return
+        h, w = self.local.shape
+        cs = self.chunk_size
+        passable = self.passable()
+        for cy, cx in self._dirty:
+            self.counts[cy, cx] = label_chunk(passable, self.obstacle_map, self.local,
+                                              cy * cs, min(h, cy * cs + cs), cx * cs, min(w, cx * cs + cs))
+        self.chunks_labeled += len(self._dirty)
+        self._dirty.clear()
+        counts = self.counts.ravel()
+        self.offsets = (np.cumsum(counts) - counts).reshape(self.counts.shape)
+        self.roots = join_chunks(passable, self.obstacle_map, self.local, self.offsets, int(counts.sum()), cs)
+
+    def component(self, x: int, y: int) -> int:
+        """Component id of tile (x, y), -1 when the tile cannot be stood on or is off the map."""
+        self.refresh()
+        h, w = self.local.shape
+        if not (0 <= x < w and 0 <= y < h):
+            return -1
+        label = self.local[y, x]
+        if label == 0:
+            return -1
+        cs = self.chunk_size
+        return int(self.roots[self.offsets[y // cs, x // cs] + label - 1])
+
+    def reachable(self, start: tuple[int, int], goal: tuple[int, int]) -> bool:
+        a = self.component(*start)
+        return a >= 0 and a == self.component(*goal)
+
+    def snap(self, goal: tuple[int, int], component: int, radius: int) -> tuple[int, int] | None:
+        """Nearest tile of 'component' within 'radius' tiles of 'goal' (goal itself if it belongs to it)."""
+        if self.component(*goal) == component:
+            return goal
+        x, y = snap_to_component(self.local, self.offsets, self.roots, self.chunk_size,
+                                 goal[0], goal[1], component, radius)
+        return None if x < 0 else (int(x), int(y))
+
+
+class ReachabilityCache(ProfileCache):
+    """One ReachabilityIndex per movement kind (see ReachabilityIndex.kind), all over the same maps."""
+
+    def __init__(self, obstacle_map: np.ndarray, water_map: np.ndarray):
+        super().__init__(lambda kind: ReachabilityIndex(*kind, obstacle_map, water_map))
+
+    def index(self, profile: MovementProfile) -> ReachabilityIndex:
+        return self[ReachabilityIndex.kind(profile)]
+
+    def resolve(self, profile: MovementProfile, start: tuple[int, int], goal: tuple[int, int],
+                radius: int) -> tuple[int, int] | None:
+        """
+        Tile 'goal' if it can be reached from tile 'start', else the nearest reachable tile within
+        'radius'; None when there is none. Starts the profile cannot stand on keep 'goal'.
+        """
+        index = self.index(profile)
+        component = index.component(*start)
+        if component < 0:
+            return goal
+        return index.snap(goal, component, radius)
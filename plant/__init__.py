@@ -0,0 +1 @@
+from .plant import PlantModel, PLANT_DATA, PLANT_NAMES, PLANT_COLORS, load_plants, parse_plants
@@ -0,0 +1,115 @@
+import csv
+import json
+import numpy as np
+from pathlib import Path
+from pydantic import BaseModel, ConfigDict
+
+from terrain import TERRAIN_DATA, load_terrains_data
+
+import logging
+logger = logging.getLogger("plant")
+
+DEFAULT_PLANT_COLOR = (70, 150, 60)
+
+
+class PlantModel(BaseModel):
+    """A ground-cover plant. Plants live as uint8 codes in World.ground_cover, code 0 is bare ground."""
+    name: str
+    code: int
+    abundance: float = 1.0            # relative weight when seeding a cell
+    color: tuple[int, int, int] = DEFAULT_PLANT_COLOR
+    harvest_yield: int = 1            # items collected when harvested
+    description: str = ""
+
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+
+PLANT_DATA: dict[str, PlantModel] = {}
+PLANT_NAMES: list[str] = [""]          # code -> name, code 0 = no plant
+PLANT_COLORS: np.ndarray = np.zeros((256, 3), dtype=np.uint8)  # code -> RGB lookup table
+
+
+def _singular(name: str) -> str:
+    """'Grasses' -> 'grass', 'Water lilies' -> 'water lily', 'Reeds' -> 'reed', for the plural vegetation.csv names."""
+    name = name.strip().lower()
+    if name.endswith(("sses", "shes", "ches", "xes")):
+        return name[:-2]
+    if name.endswith("ies"):
+        return name[:-3] + "y"
+    if name.endswith("s") and not name.endswith("ss"):
+        return name[:-1]
+    return name
+
+
+def _read_vegetation_csv(path: Path) -> dict[str, tuple[float, tuple[int, int, int]]]:
+    """Rows by lowercase name, under both the name as written and its singular."""
+    rows = {}
+    with open(path, "r", newline="") as f:
+        for row in csv.reader(f):
+            try:
+                name, abundance, r, g, b = row[0], float(row[1]), int(row[2]), int(row[3]), int(row[4])
+            except (ValueError, IndexError):
+                continue  # header lines
+            rows[name.strip().lower()] = (abundance, (r, g, b))
+            rows.setdefault(_singular(name), (abundance, (r, g, b)))
+    return rows
+
+
+def parse_plants(plants_file: str | Path, vegetation_file: str | Path, terrains: dict) -> dict[str, PlantModel]:
+    """
+    Builds the plant models from the plants listed by terrains (wild ground cover),
+    with abundance and color from vegetation.csv, plus the cultivable plants of
+    plants_data.json. Codes are assigned in a stable order.
+    """
+    vegetation = _read_vegetation_csv(vegetation_file)
+    with open(plants_file, "r") as f:
+        cultivable = json.load(f)
+
+    wild = sorted({p for terrain in terrains.values() for p in terrain.vegetation.plants})
+    names = wild + [name for name in cultivable if name not in wild]
+    if len(names) > 255:
+        raise ValueError(f"Too many plants for a uint8 layer: {len(names)}")
+
+    plants = {}
+    for code, name in enumerate(names, start=1):
+        abundance, color = vegetation.get(name.strip().lower(), (1.0, DEFAULT_PLANT_COLOR))
+        extra = cultivable.get(name, {})
+        plants[name] = PlantModel(
+            name=name,
+            code=code,
+            abundance=abundance,
+            color=color,
+            harvest_yield=extra.get("yield", 1),
+            description=extra.get("description", ""),
+        )
+    logger.info(f"Parsed {len(plants)} plants ({len(wild)} wild)")
+    return plants
+
+
+def load_plants(plants_file: str | Path | None = None, vegetation_file: str | Path | None = None) -> dict[str, PlantModel]:
+    """
+    Populates PLANT_DATA, PLANT_NAMES and PLANT_COLORS.
+    Default files go through the data catalog, explicit files are always parsed.
+    Returns PLANT_DATA.
+    """
+    if plants_file is None and vegetation_file is None:
+        import catalog
+        plants = catalog.get("plants")
+    else:
+        project_root = Path(__file__).resolve().parent.parent
+        if len(TERRAIN_DATA) == 0:
+            load_terrains_data()
+        plants = parse_plants(plants_file or project_root / "json_files" / "plants_data.json",
+                              vegetation_file or project_root / "json_files" / "vegetation.csv",
+                              TERRAIN_DATA)
+
+    PLANT_DATA.clear()
+    PLANT_DATA.update(plants)
+    PLANT_NAMES[:] = [""] + [None] * len(plants)
+    PLANT_COLORS[:] = 0
+    for plant in plants.values():
+        PLANT_NAMES[plant.code] = plant.name
+        PLANT_COLORS[plant.code] = plant.color
+
+    logger.info(f"Loaded {len(PLANT_DATA)} plants")
+    return PLANT_DATA
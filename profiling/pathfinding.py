@@ -0,0 +1,392 @@
+"""
+Pathfinding benchmark: every planner on the same grid scenarios.
+
+Scenarios come from MovingAI benchmark files (profiling/maps/*.map with their .map.scen) and
+from seeded WorldGen worlds. All planners see the same passability grid with uniform terrain
+cost, so their path costs compare against one optimum (a Dijkstra under the game's movement
+rules). Results carry the git commit, keep the JSON of two commits and compare them:
+
+    python -m profiling.pathfinding                          # human readable
+    python -m profiling.pathfinding --json --out new.json    # machine readable
+    python -m profiling.pathfinding --compare old.json       # time ratios against an older run
+"""
+import hashlib
+import json
+import math
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MAPS_DIR = Path(__file__).resolve().parent / "maps"
+
+MOVING_AI_PASSABLE = ".GS"   # ground and swamp; trees, water and out of bounds are blocked
+WORLD_SEEDS = (1, 2)
+WORLD_SIZE = 64              # tiles per side of the generated worlds
+WORLD_SCENARIOS = 10         # random start/goal pairs per world
+REPEATS = 3                  # timed runs per query, the fastest is kept
+
+
+@dataclass(frozen=True)
+class Scenario:
+    start: tuple[int, int]
+    goal: tuple[int, int]
+    reference: float | None = None   # optimal length given by the scenario file, if any
+
+
+@dataclass
+class BenchMap:
+    name: str
+    blocked: np.ndarray              # (H, W) bool
+    scenarios: list[Scenario]
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(np.packbits(self.blocked).tobytes()).hexdigest()[:12]
+
+
+# ------------------- Scenario sources -------------------
+def load_map(path: str | Path) -> np.ndarray:
+    """MovingAI .map file -> (H, W) bool grid, True where blocked."""
+    with open(path, "r") as f:
+        header = {}
+        for line in f:
+            line = line.strip()
+            if line == "map":
+                break
+            key, _, value = line.partition(" ")
+            header[key] = value
+        height, width = int(header["height"]), int(header["width"])
+        rows = [next(f).rstrip("\n") for _ in range(height)]
+    return np.array([[c not in MOVING_AI_PASSABLE for c in row[:width]] for row in rows], dtype=np.bool_)
+
+
+def load_scenarios(path: str | Path) -> list[Scenario]:
+    """MovingAI .scen file (version 1): bucket, map, width, height, start x/y, goal x/y, optimal length."""
+    scenarios = []
+    with open(path, "r") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 9 or fields[0] == "version":
+                continue
+            sx, sy, gx, gy = map(int, fields[4:8])
+            scenarios.append(Scenario((sx, sy), (gx, gy), float(fields[8])))
+    return scenarios
+
+
+def load_moving_ai(map_path: str | Path) -> BenchMap:
+    map_path = Path(map_path)
+    scen_path = map_path.with_name(map_path.name + ".scen")
+    return BenchMap(map_path.name, load_map(map_path), load_scenarios(scen_path) if scen_path.exists() else [])
+
+
+def world_map(seed: int, size: int = WORLD_SIZE, count: int = WORLD_SCENARIOS) -> BenchMap:
+    """Seeded WorldGen world at tile resolution, water counts as blocked (walkers only)."""
+    from world import World, WorldGen, WorldGenConfig
+    from pathfinder import Pathfinder
+
+    random.seed(seed)
+    np.random.seed(seed)
+    World(WorldGen(WorldGenConfig(WIDTH=size, HEIGHT=size, TILE_SUBDIVISIONS=2))).generate()
+    finder = Pathfinder()
+    blocked = finder.obstacle_map | finder.water_map
+
+    rng = np.random.default_rng(seed)
+    free = np.argwhere(~blocked)
+    scenarios = []
+    for _ in range(count):
+        (sy, sx), (gy, gx) = free[rng.integers(len(free), size=2)]
+        scenarios.append(Scenario((int(sx), int(sy)), (int(gx), int(gy))))
+    return BenchMap(f"world-{seed}", blocked, scenarios)
+
+
+def default_maps() -> list[BenchMap]:
+    maps = [load_moving_ai(path) for path in sorted(MAPS_DIR.glob("*.map"))]
+    return maps + [world_map(seed) for seed in WORLD_SEEDS]
+
+
+# ------------------- Planners -------------------
+class UniformProfile:
+    """Stands in for a MovementProfile: no terrain penalty, only step lengths."""
+
+    def penalty(self, water_map: np.ndarray) -> np.ndarray:
+        return np.zeros(water_map.shape, dtype=np.float64)
+
+
+def uniform_tensor(blocked: np.ndarray):
+    from pathfinder import CostTensor
+    zeros = np.zeros(blocked.shape, dtype=np.float64)
+    tensor = CostTensor(UniformProfile(), zeros, blocked, np.zeros(blocked.shape, dtype=np.bool_))
+    tensor.refresh()
+    return tensor
+
+
+@dataclass(frozen=True)
+class Planner:
+    """
+    setup(tensor, blocked) builds the per-map state (timed once), query(state, start, goal) returns
+    the waypoints [(x, y), ...] at tile centers or None, expanded(state, start, goal) the cells it
+    expands for that query when the planner can tell.
+    """
+    name: str
+    query: Callable[[Any, tuple[int, int], tuple[int, int]], list[tuple[float, float]] | None]
+    setup: Callable[[Any, np.ndarray], Any] = lambda tensor, blocked: tensor
+    expanded: Callable[[Any, tuple[int, int], tuple[int, int]], int] | None = None
+
+
+def _tile_centers(tiles) -> list[tuple[float, float]] | None:
+    return None if tiles is None else [(x + 0.5, y + 0.5) for x, y in tiles]
+
+
+def _astar(tensor, start, goal):
+    from pathfinder.pathfinder import astar_find_path
+    h, w = tensor.costs.shape[:2]
+    return _tile_centers(astar_find_path(start[0], start[1], goal[0], goal[1], w, h, tensor.height_map,
+                                         tensor.obstacle_map, None, tensor.costs, tensor.min_penalty))
+
+
+def _astar_expanded(tensor, start, goal):
+    from pathfinder import IncrementalSearch
+    search = IncrementalSearch(tensor, start, goal)
+    search.advance(tensor.costs.shape[0] * tensor.costs.shape[1])
+    return search.expanded
+
+
+def _hpa_setup(tensor, blocked):
+    from pathfinder import HierarchicalGraph
+    graph = HierarchicalGraph(tensor)
+    graph.update()
+    return graph
+
+
+def _hpa(graph, start, goal):
+    w = graph.width
+    cells = graph.find_path(start[1] * w + start[0], goal[1] * w + goal[0])
+    return None if cells is None else _tile_centers([(int(i % w), int(i // w)) for i in cells])
+
+
+def _alt_setup(tensor, blocked):
+    from pathfinder import LandmarkSet
+    landmarks = LandmarkSet(tensor)
+    landmarks.update(wait=True)
+    return tensor, landmarks.fields()
+
+
+def _alt_search(state, start, goal):
+    from pathfinder.landmarks import astar_landmarks
+    tensor, fields = state
+    w = tensor.costs.shape[1]
+    return astar_landmarks(start[1] * w + start[0], goal[1] * w + goal[0], tensor.costs, tensor.min_penalty, *fields)
+
+
+def _alt(state, start, goal):
+    cells, _ = _alt_search(state, start, goal)
+    w = state[0].costs.shape[1]
+    return _tile_centers([(int(i % w), int(i // w)) for i in cells]) if len(cells) else None
+
+
+def _dstar(tensor, start, goal):
+    from pathfinder import DStarLite
+    return _tile_centers(DStarLite(tensor, start, goal).path())
+
+
+def _dstar_expanded(tensor, start, goal):
+    from pathfinder import DStarLite
+    return DStarLite(tensor, start, goal).expanded
+
+
+def _theta(grid, start, goal):
+    from world.pathfinding import find_path
+    return find_path(start[0], start[1], goal[0], goal[1], grid) or None
+
+
+def _smoothed(grid, start, goal):
+    from world.pathfinding import find_path_smoothed
+    return find_path_smoothed(start[0], start[1], goal[0], goal[1], grid) or None
+
+
+def _navmesh_setup(tensor, blocked):
+    from pathfinder import NavMesh
+    mesh = NavMesh(blocked, np.zeros(blocked.shape, dtype=np.float64))
+    mesh.refresh()
+    return mesh
+
+
+def _navmesh(mesh, start, goal):
+    return mesh.find_path((start[0] + 0.5, start[1] + 0.5), (goal[0] + 0.5, goal[1] + 0.5))
+
+
+def _topology_grid(tensor, blocked):
+    return np.where(blocked, 1.0, 0.0)
+
+
+PLANNERS: dict[str, Planner] = {planner.name: planner for planner in (
+    Planner("astar", _astar, expanded=_astar_expanded),
+    Planner("alt", _alt, setup=_alt_setup, expanded=lambda state, start, goal: _alt_search(state, start, goal)[1]),
+    Planner("hpa", _hpa, setup=_hpa_setup),
+    Planner("navmesh", _navmesh, setup=_navmesh_setup),
+    Planner("dstar_lite", _dstar, expanded=_dstar_expanded),
+    Planner("lazy_theta", _theta, setup=_topology_grid),
+    Planner("astar_smoothed", _smoothed, setup=_topology_grid),
+)}
+
+
+# ------------------- Measurements -------------------
+def path_length(path: list[tuple[float, float]]) -> float:
+    """Euclidean length through the waypoints, the cost of a path under uniform terrain."""
+    return sum(math.hypot(x1 - x0, y1 - y0) for (x0, y0), (x1, y1) in zip(path, path[1:]))
+
+
+def optimal_lengths(tensor, start: tuple[int, int]) -> np.ndarray:
+    from pathfinder.astar_kernel import dijkstra_box
+    h, w = tensor.costs.shape[:2]
+    sources = np.array([start[1] * w + start[0]], dtype=np.int64)
+    return dijkstra_box(sources, tensor.costs, 0, 0, w, h, False)
+
+
+def _measure(fn: Callable[[], Any], repeats: int) -> tuple[Any, float, int]:
+    """(result, fastest wall time in s, peak traced bytes of the first run)."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    best = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    for _ in range(repeats - 1):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return result, best, peak
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(maps: list[BenchMap] | None = None, planners: list[str] | None = None,
+                  repeats: int = REPEATS) -> dict:
+    """
+    Run every planner on every scenario.
+
+    Returns:
+        JSON-ready dict: commit, per-map checksum and setup times, one record per (planner, scenario)
+        with wall time, nodes expanded, peak memory and cost ratio against the optimum, and a
+        per-planner summary.
+    """
+    maps = default_maps() if maps is None else maps
+    selected = [PLANNERS[name] for name in (planners or PLANNERS)]
+    report = {"commit": git_commit(), "python": sys.version.split()[0], "maps": {}, "runs": []}
+
+    for bench in maps:
+        tensor = uniform_tensor(bench.blocked)
+        states, setup_times = {}, {}
+        for planner in selected:
+            t0 = time.perf_counter()
+            states[planner.name] = planner.setup(tensor, bench.blocked)
+            setup_times[planner.name] = time.perf_counter() - t0
+        report["maps"][bench.name] = {"checksum": bench.checksum, "shape": list(bench.blocked.shape),
+                                      "scenarios": len(bench.scenarios), "setup_s": setup_times}
+
+        for i, scenario in enumerate(bench.scenarios):
+            optimum = float(optimal_lengths(tensor, scenario.start)[scenario.goal[1], scenario.goal[0]])
+            for planner in selected:
+                state = states[planner.name]
+                query = lambda: planner.query(state, scenario.start, scenario.goal)
+                if i == 0:
+                    query()  # compile and warm caches outside the measurement
+                path, seconds, peak = _measure(query, repeats)
+                cost = path_length(path) if path else math.inf
+                report["runs"].append({
+                    "map": bench.name, "scenario": i, "planner": planner.name,
+                    "start": list(scenario.start), "goal": list(scenario.goal),
+                    "time_s": seconds, "peak_bytes": peak,
+                    "expanded": planner.expanded(state, scenario.start, scenario.goal) if planner.expanded else None,
+                    "waypoints": len(path) if path else 0,
+                    "cost": cost if path else None,
+                    "optimal": optimum if math.isfinite(optimum) else None,
+                    "reference": scenario.reference,
+                    "cost_ratio": cost / optimum if path and math.isfinite(optimum) and optimum > 0 else None,
+                    "correct": (path is not None) == math.isfinite(optimum),
+                })
+
+    report["summary"] = summarize(report["runs"])
+    return report
+
+
+def summarize(runs: list[dict]) -> dict[str, dict]:
+    summary = {}
+    for name in dict.fromkeys(run["planner"] for run in runs):
+        mine = [run for run in runs if run["planner"] == name]
+        ratios = [run["cost_ratio"] for run in mine if run["cost_ratio"] is not None]
+        expanded = [run["expanded"] for run in mine if run["expanded"] is not None]
+        summary[name] = {
+            "queries": len(mine),
+            "time_median_s": statistics.median(run["time_s"] for run in mine),
+            "time_total_s": sum(run["time_s"] for run in mine),
+            "peak_bytes_max": max(run["peak_bytes"] for run in mine),
+            "expanded_mean": statistics.mean(expanded) if expanded else None,
+            "cost_ratio_mean": statistics.mean(ratios) if ratios else None,
+            "cost_ratio_max": max(ratios) if ratios else None,
+            "waypoints_mean": statistics.mean(run["waypoints"] for run in mine),
+            "incorrect": sum(not run["correct"] for run in mine),
+        }
+    return summary
+
+
+def compare(old: dict, new: dict) -> dict[str, float]:
+    """Per planner, median time of 'new' over 'old' on the scenarios both ran (same map checksum)."""
+    same_maps = {name for name, info in new["maps"].items()
+                 if old["maps"].get(name, {}).get("checksum") == info["checksum"]}
+    old_times = {(r["map"], r["scenario"], r["planner"]): r["time_s"] for r in old["runs"] if r["map"] in same_maps}
+    ratios: dict[str, list[float]] = {}
+    for run in new["runs"]:
+        before = old_times.get((run["map"], run["scenario"], run["planner"]))
+        if before:
+            ratios.setdefault(run["planner"], []).append(run["time_s"] / before)
+    return {name: statistics.median(values) for name, values in ratios.items()}
+
+
+def format_report(report: dict) -> str:
+    lines = [f"Pathfinding benchmark @ {report['commit']}",
+             f"  {'planner':<16}{'median':>11}{'expanded':>10}{'cost ratio':>12}{'worst':>8}{'waypts':>8}{'peak KiB':>10}{'wrong':>7}"]
+    for name, s in report["summary"].items():
+        expanded = f"{s['expanded_mean']:.0f}" if s["expanded_mean"] is not None else "-"
+        mean = f"{s['cost_ratio_mean']:.3f}" if s["cost_ratio_mean"] is not None else "-"
+        worst = f"{s['cost_ratio_max']:.3f}" if s["cost_ratio_max"] is not None else "-"
+        lines.append(f"  {name:<16}{s['time_median_s'] * 1000:>8.3f} ms{expanded:>10}{mean:>12}{worst:>8}"
+                     f"{s['waypoints_mean']:>8.1f}{s['peak_bytes_max'] / 1024:>10.0f}{s['incorrect']:>7}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+    sys.path.insert(0, str(PROJECT_ROOT))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    parser.add_argument("--compare", help="JSON report of an older run to compare times with")
+    parser.add_argument("--planners", nargs="+", choices=list(PLANNERS), help="planners to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    args = parser.parse_args()
+
+    result = run_benchmark(planners=args.planners, repeats=args.repeats)
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, indent=1))
+    print(json.dumps(result) if args.json else format_report(result))
+    if args.compare:
+        ratios = compare(json.loads(Path(args.compare).read_text()), result)
+        print("Median time vs " + args.compare + ": " +
+              ", ".join(f"{name} x{ratio:.2f}" for name, ratio in ratios.items()))
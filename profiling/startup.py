@@ -0,0 +1,161 @@
+"""
+Cold-start timing harness for the game entry points.
+
+Measures time-to-first-frame broken down into import, data load, world generation,
+texture load, simulation set-up (manager, pathfinder, path service), the first path
+search and the first frame with its manager update. Run it in a fresh interpreter
+to get cold numbers:
+
+    python -m profiling.startup            # human readable
+    python -m profiling.startup --json     # machine readable, used by the budget test
+"""
+import os
+import sys
+import json
+import time
+import importlib
+from contextlib import contextmanager
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules imported by world_sim.py before the window opens
+ENTRY_POINT_MODULES = (
+    "tree", "terrain", "plant", "world", "catalog", "knowledge_tree", "minimap", "controls", "camera",
+    "rendering", "character", "collision", "pathfinder", "manager", "pygame_interface",
+)
+
+# Optional dependencies that must only be imported inside the functions using them
+LAZY_MODULES = ("graphviz", "matplotlib", "PIL", "pympler", "scipy.ndimage")
+
+# Cold-start budget in seconds per phase (generous enough for slow CI machines,
+# tight enough to catch an eager heavy import or an uncached numba compile)
+STARTUP_BUDGET_S = {
+    "import": 6.0,
+    "data": 2.0,
+    "generation": 15.0,
+    "textures": 3.0,
+    "simulation": 2.0,
+    "first_path": 3.0,
+    "first_frame": 1.0,
+    "total": 25.0,
+}
+
+
+class StartupReport(dict):
+    """phase name -> seconds, plus per-module import times."""
+
+    def __init__(self):
+        super().__init__()
+        self.imports: dict[str, float] = {}
+        self.lazy_loaded: list[str] = []
+
+    @property
+    def total(self) -> float:
+        return sum(self.values())
+
+    def over_budget(self, budget: dict[str, float] = STARTUP_BUDGET_S) -> dict[str, float]:
+        phases = dict(self, total=self.total)
+        return {name: t for name, t in phases.items() if name in budget and t > budget[name]}
+
+    def to_json(self) -> str:
+        return json.dumps({"phases": dict(self), "total": self.total,
+                           "imports": self.imports, "lazy_loaded": self.lazy_loaded})
+
+    def __str__(self):
+        lines = ["Startup time:"]
+        for name, t in self.items():
+            lines.append(f"  {name:<12} {t * 1000:>9.1f} ms")
+        lines.append(f"  {'total':<12} {self.total * 1000:>9.1f} ms")
+        lines.append("Imports:")
+        for name, t in sorted(self.imports.items(), key=lambda kv: -kv[1]):
+            lines.append(f"  {name:<18} {t * 1000:>9.1f} ms")
+        if self.lazy_loaded:
+            lines.append(f"Eagerly imported optional modules: {', '.join(self.lazy_loaded)}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def _phase(report: StartupReport, name: str):
+    t0 = time.perf_counter()
+    yield
+    report[name] = time.perf_counter() - t0
+
+
+def measure_startup(config=None, textures: bool = True) -> StartupReport:
+    """
+    Replays world_sim.py start-up phase by phase. Call it in a fresh process,
+    modules already imported are not measured.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    report = StartupReport()
+
+    with _phase(report, "import"):
+        for name in ENTRY_POINT_MODULES:
+            t0 = time.perf_counter()
+            importlib.import_module(name)
+            report.imports[name] = time.perf_counter() - t0
+    report.lazy_loaded = [m for m in LAZY_MODULES if m in sys.modules]
+
+    from tree import load_trees
+    from terrain import TERRAIN_DATA, load_terrains_data
+    from plant import load_plants
+    from world import World, WorldGen, WorldGenConfig
+    with _phase(report, "data"):
+        load_terrains_data()
+        load_trees()
+        load_plants()
+
+    with _phase(report, "generation"):
+        config = config or WorldGenConfig(WIDTH=50, HEIGHT=50, TILE_SUBDIVISIONS=4)
+        World(WorldGen(config=config)).generate()
+
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((320, 200))
+
+    with _phase(report, "textures"):
+        if textures:
+            from tree import TREE_DATA
+            paths = {t.texture for t in TERRAIN_DATA.values() if t.texture}
+            paths |= {t.texture for t in TREE_DATA.values() if t.texture}
+            for path in paths:
+                path = PROJECT_ROOT / path
+                if path.is_file():
+                    pygame.image.load(str(path)).convert_alpha()
+
+    from character import Human
+    from manager import Manager
+    from pathfinder import Pathfinder, PathService
+    with _phase(report, "simulation"):
+        rowan, clara = Human("Rowan", age=20), Human("Clara", age=20)
+        rowan.x, rowan.y = 10, 10
+        clara.x, clara.y = 20, 20
+        manager = Manager(agents=[rowan, clara])
+        # what PGIAgentControl builds, without its camera
+        path_finder = Pathfinder()
+        path_service = PathService(path_finder)
+
+    with _phase(report, "first_path"):
+        # the first order builds the cost tensor, reachability labels and landmarks of the profile
+        path_finder.find_path((rowan.x, rowan.y), (clara.x, clara.y), rowan)
+
+    with _phase(report, "first_frame"):
+        path_service.poll()
+        path_finder.repair_moves(manager.add_search)
+        manager.resume()
+        manager.update()
+        screen.fill((0, 0, 0))
+        pygame.display.flip()
+
+    path_service.shutdown()
+    path_finder.close()
+    pygame.quit()
+    return report
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(PROJECT_ROOT))
+    startup = measure_startup()
+    print(startup.to_json() if "--json" in sys.argv else startup)
@@ -4,4 +4,6 @@ from .pgi_agent_control import PGIAgentControl
 from .pgi_agent_path_painter import PGIAgentPathPainter
 from .pgi_world_painter import PGIWorldPainter
 from .pgi_world_object_painter import PGIWorldObjectPainter
-from .pgi_world_object_set_painter import PGIWorldObjectSetPainter
\ No newline at end of file
+from .pgi_world_object_set_painter import PGIWorldObjectSetPainter
+from .pgi_progress_overlay import PGIProgressOverlay
+from .pgi_texture_registry import clear_texture_caches
@@ -1,9 +1,11 @@
 import pygame
 
 from camera import Camera
+from controls import FORMATION_KEY, GATHER_KEYS
 from manager import Manager
 from agent import Agent, MoveMode
-from pathfinder import Pathfinder
+from pathfinder import Formation, NearestTargetService, Pathfinder, PathService
+from pathfinder.formation import FORMATIONS
 import commands
 
 import logging
@@ -18,8 +20,16 @@ class PGIAgentControl:
         self.camera: Camera = Camera.get_instance()
         self.manager: Manager = manager
         self.path_finder = Pathfinder()
+        self.path_service = PathService(self.path_finder)
+        self.nearest = NearestTargetService(self.path_finder)
+        self.formation: str | None = None  # shape of group orders, None: each agent on the flow field
 
     def command_agents(self, events):
+        # hand over the paths searched off-frame since the last frame
+        self.path_service.poll()
+        # reroute the moves whose path an edit of the world cut or made cheaper
+        self.path_finder.repair_moves(self.manager.add_search)
+
         if len(self.manager.selection) == 0:
             # No selected agents to command
             return
@@ -30,10 +40,16 @@ class PGIAgentControl:
                 running = False
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:  # Right click
                 mx,my = pygame.mouse.get_pos()
-                world_pos = self.camera.screen_to_world(screen_x=mx,screen_y=my)
+                # clicks past the map edge order a move to the border
+                world_pos = self.path_finder.on_map(self.camera.screen_to_world(screen_x=mx,screen_y=my))
 
                 time_now = pygame.time.get_ticks()
                 global last_right_click_time
+                group_order = len(self.manager.selection) > 1
+                if group_order and self.formation is not None and time_now - last_right_click_time > DOUBLE_CLICK_TIME:
+                    self._formation_order(world_pos)
+                    last_right_click_time = time_now
+                    continue
                 for agent_id in self.manager.selection:
                     agent = self.manager.agents[agent_id]
                     """
@@ -42,16 +58,92 @@ class PGIAgentControl:
                     """
                     if time_now - last_right_click_time <= DOUBLE_CLICK_TIME:
                         agent.set_move_mode(MoveMode.RUN)
+                    elif group_order:
+                        # one flow field per movement profile serves the whole group
+                        self.path_service.cancel(agent)
+                        agent.commands.clear()
+                        agent.set_move_mode(MoveMode.WALK)
+                        field = self.path_finder.flow_field(goal=world_pos, agent=agent)
+                        agent.assign_command(commands.FlowFieldCommand(field, world_pos))
+                        logger.debug(f"command assigned to {agent_id}: FlowFieldCommand, from {(agent.x,agent.y)} to {world_pos}")
+                    elif self._is_long_move(agent, world_pos):
+                        # HPA route refined over frames: the agent starts on the refined part right away
+                        self.path_service.cancel(agent)
+                        agent.commands.clear()
+                        agent.set_move_mode(MoveMode.WALK)
+                        command = commands.MoveCommand([])
+                        command.planning = True
+                        agent.assign_command(command)
+                        search = self.path_finder.start_search((agent.x, agent.y), world_pos, agent)
+                        self.manager.add_search(search, on_progress=lambda s, agent=agent, command=command, goal=world_pos:
+                                                self._follow_search(agent, command, s, goal))
                     else:
-                        # Find path
+                        # Find path off-frame, the MoveCommand is assigned when the result arrives
                         agent.commands.clear()
                         agent.set_move_mode(MoveMode.WALK)
-                        path = self.path_finder.find_path(start=(agent.x,agent.y),goal=world_pos, agent=agent)
-                        agent.assign_command(commands.MoveCommand(path))
-                        logger.debug(f"command assigned to {agent_id}: MoveCommnad, from {(agent.x,agent.y)} to {world_pos}")
+                        self.path_service.request(agent, world_pos, modes=True,
+                                                  on_done=lambda path, modes, agent=agent: self._assign_path(agent, path, modes))
 
                 last_right_click_time = time_now
+            # --- cycle the formation of group orders
+            elif event.type == pygame.KEYDOWN and event.key == FORMATION_KEY:
+                shapes = (None,) + FORMATIONS
+                self.formation = shapes[(shapes.index(self.formation) + 1) % len(shapes)]
+                logger.info(f"Group orders in formation: {self.formation or 'none'}")
+            # --- gather: each selected agent walks to its nearest reachable target
+            elif event.type == pygame.KEYDOWN and event.key in GATHER_KEYS:
+                self._gather_order(GATHER_KEYS[event.key])
             # --- Esc: clear selection
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 self.manager.selection.clear()
-                logger.debug("Selection cleared with Esc")
\ No newline at end of file
+                logger.debug("Selection cleared with Esc")
+
+    def _formation_order(self, goal: tuple[float, float]):
+        """One reference path for the selection, every agent on its slot (see pathfinder.Formation)."""
+        agents = [self.manager.agents[agent_id] for agent_id in self.manager.selection]
+        for agent in agents:
+            self.path_service.cancel(agent)
+            agent.commands.clear()
+            agent.set_move_mode(MoveMode.WALK)
+        formation = Formation(self.path_finder, agents, goal, self.formation)
+        self.manager.broadcast(commands.FormationCommand(formation), self.manager.selection)
+        logger.debug(f"{len(agents)} agents ordered to {goal} in {self.formation} formation")
+
+    def _gather_order(self, feature: str):
+        """Send every selected agent to its nearest reachable target of 'feature'."""
+        for agent_id in self.manager.selection:
+            agent = self.manager.agents[agent_id]
+            self.path_service.cancel(agent)
+            agent.commands.clear()
+            agent.set_move_mode(MoveMode.WALK)
+            self._assign_path(agent, self.nearest.find_nearest(agent, feature))
+
+    def _assign_path(self, agent: Agent, path: list[tuple[float, float]] | None, modes: list[MoveMode] | None = None):
+        if path is None:
+            logger.debug(f"no path for {agent.id} from {(agent.x,agent.y)}")
+            return
+        command = commands.MoveCommand(path, modes)
+        agent.assign_command(command)
+        self.path_finder.track_move(agent, command, path[-1])
+        logger.debug(f"command assigned to {agent.id}: MoveCommnad, from {(agent.x,agent.y)} to {path[-1]}")
+
+    def _is_long_move(self, agent: Agent, goal: tuple[float, float]) -> bool:
+        return max(abs(goal[0] - agent.x), abs(goal[1] - agent.y)) >= self.path_finder.SLICED_MIN_DISTANCE
+
+    def _follow_search(self, agent: Agent, command: commands.MoveCommand, search, goal: tuple[float, float]):
+        """Feed the partial path of a time-sliced search to the agent's MoveCommand."""
+        if command not in agent.commands:
+            self.manager.cancel_search(search)  # the agent got another order
+            return
+        command.planning = not search.done
+        tiles = search.path()
+        if tiles is None:
+            logger.debug(f"no path for {agent.id} to {goal}")
+            command.replace_path([])
+            return
+        path = [(x + 0.5, y + 0.5) for x, y in tiles]
+        if search.found:
+            path[-1] = goal
+        command.replace_path(path, position=(agent.x, agent.y))
+        if search.found:
+            self.path_finder.track_move(agent, command, goal)
@@ -0,0 +1,29 @@
+import pygame
+
+
+class PGIProgressOverlay:
+    """Draws a centered progress bar with the current stage name."""
+
+    def __init__(self, width: int = 400, height: int = 24):
+        self.width = width
+        self.height = height
+        self.font = pygame.font.SysFont(None, 28)
+
+    def draw(self, surface: pygame.Surface, stage: str, progress: float):
+        sw, sh = surface.get_size()
+        x = (sw - self.width) // 2
+        y = (sh - self.height) // 2
+
+        # dim the frame behind the bar
+        shade = pygame.Surface((sw, sh), pygame.SRCALPHA)
+        shade.fill((0, 0, 0, 140))
+        surface.blit(shade, (0, 0))
+
+        frame = pygame.Rect(x, y, self.width, self.height)
+        fill = pygame.Rect(x, y, int(self.width * max(0.0, min(progress, 1.0))), self.height)
+        pygame.draw.rect(surface, (40, 40, 40), frame)
+        pygame.draw.rect(surface, (0, 180, 80), fill)
+        pygame.draw.rect(surface, (255, 255, 255), frame, 2)
+
+        text = self.font.render(f"Generating world: {stage} ({progress:.0%})", True, (255, 255, 255))
+        surface.blit(text, (x, y - text.get_height() - 6))
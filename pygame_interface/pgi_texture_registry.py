@@ -6,6 +6,9 @@ from camera import Camera
 # Global cache: (texture_id, tile_size) -> Surface
 SURFACE_CACHE: dict[tuple[int, int], pygame.Surface] = {}
 
+# Tile textures: (path, tile_size) -> Surface, shared by all PGITilePainter
+TILE_TEXTURE_CACHE: dict[tuple[str, int], pygame.Surface] = {}
+
 # Unique texture IDs
 from itertools import count
 TEXTURE_REGISTRY: dict[str, int] = {}
@@ -20,6 +23,11 @@ def register_texture(path: str) -> int:
     TEXTURE_REGISTRY[path] = tex_id
     return tex_id
 
+def clear_texture_caches():
+    """Drop every scaled surface, textures are reloaded on next use (data hot reload)."""
+    SURFACE_CACHE.clear()
+    TILE_TEXTURE_CACHE.clear()
+
 def preload_texture_zoom_levels(path: str) -> int:
     """
     Precompute and cache scaled surfaces for all zoom steps based on the Camera.
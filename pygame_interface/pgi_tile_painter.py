@@ -1,8 +1,6 @@
 import pygame
 from world import Tile  # your Tile class
-
-# shared cache for all painters
-_TEXTURE_CACHE = {}
+from .pgi_texture_registry import TILE_TEXTURE_CACHE as _TEXTURE_CACHE  # shared cache for all painters
 
 class PGITilePainter(pygame.sprite.Sprite):
     """Sprite wrapper for a Tile with caching of rendered image."""
@@ -63,6 +63,7 @@ class PGIWorldPainter(pygame.sprite.Group):
 
     def reset(self):
         """Call this when the world regenerates."""
+        self.empty()
         self.tile_sprites.clear()
-        self._last_cam_state = (None, None, None)
+        self._last_camera_state = (None, None, None)
         self._visible_range = (0, 0, 0, 0)
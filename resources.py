@@ -16,23 +16,36 @@ class Resource:
     def __repr__(self):
         return self.__str__()
 
-def load_resource_data(filename="resources_data.csv"):
+def parse_resource_file(filename) -> dict[str, Resource]:
+    resources = {}
+    with open(filename, "r") as f:
+        lines = f.readlines()
+        for line in lines[1:]:  # skip header
+            data = line.strip().split(",")
+            if len(data) >= 5:
+                name = data[0]
+                abundance = float(data[1])
+                r, g, b = int(data[2]), int(data[3]), int(data[4])
+                resources[name] = Resource(name, (r,g,b), abundance=abundance)
+    return resources
+
+def load_resource_data(filename=None):
+    """
+    Fill RESOURCE_DATA. The default json_files/resources_data.csv is read through
+    the data catalog, independently of the current directory.
+    """
     global RESOURCE_DATA
     RESOURCE_DATA = {}
     try:
-        with open("resources_data.csv", "r") as f:
-            lines = f.readlines()
-            for line in lines[1:]:  # skip header
-                data = line.strip().split(",")
-                if len(data) >= 5:
-                    name = data[0]
-                    abundance = float(data[1])
-                    r, g, b = int(data[2]), int(data[3]), int(data[4])
-                    RESOURCE_DATA[name] = Resource(name,(r,g,b),abundance)
+        if filename is None:
+            import catalog
+            RESOURCE_DATA = dict(catalog.get("resources"))
+        else:
+            RESOURCE_DATA = parse_resource_file(filename)
     except Exception as e:
         logger.error(f"Error loading resource data: {e}")
 
 if __name__ == "__main__":
-    load_resource_data("resources_data.csv")
+    load_resource_data()
 
     print(RESOURCE_DATA)
\ No newline at end of file
@@ -5,7 +5,6 @@ import json
 from pydantic import BaseModel, Field
 import math
 
-from graphviz import Digraph
 
 # Single skill data
 class SkillData(BaseModel):
@@ -18,6 +17,18 @@ class ClassesData(BaseModel):
     classes: dict[str, list[str]] # class name -> list of skill names
 # --------------------------
 
+def parse_classes_file(filepath: str | Path) -> ClassesData:
+    """Parse and validate the skills/classes JSON file."""
+    with open(filepath, "r") as f:
+        raw_data = json.load(f)
+
+    # Convert to ClassesData by injecting 'name' into each skill
+    for skill_name, skill_dict in raw_data['skills'].items():
+        skill_dict['name'] = skill_name
+
+    return ClassesData.model_validate(raw_data)
+
+
 class Skill:
     def __init__(self, name: str, level: int = 0, triggers: dict[str,float] = {}):
         self.name = name
@@ -108,17 +119,13 @@ class SkillSet:
     def LoadSkillSet(cls, class_name: str, filepath: str = None) -> "SkillSet":
         """
         Load skills for a given class name from JSON using modern Pydantic validation.
+        The default file is validated once through the data catalog.
         """
-        filepath = filepath or cls.skill_data_file
-
-        with open(filepath, "r") as f:
-            raw_data = json.load(f)
-
-        # Convert to ClassesData by injecting 'name' into each skill
-        for skill_name, skill_dict in raw_data['skills'].items():
-            skill_dict['name'] = skill_name
-
-        validated_data = ClassesData.model_validate(raw_data)
+        if filepath is None:
+            import catalog
+            validated_data = catalog.get("skills")
+        else:
+            validated_data = parse_classes_file(filepath)
 
         if class_name not in validated_data.classes:
             raise ValueError(f"No skill set defined for class '{class_name}'")
@@ -1,3 +1,4 @@
 from .terrain import TERRAIN_DATA
 from .terrain import Terrain
-from .terrain import load_terrains_data
\ No newline at end of file
+from .terrain import load_terrains_data
+from .terrain import parse_terrains_file
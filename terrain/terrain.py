@@ -48,32 +48,44 @@ class Terrain(BaseModel):
         return cls(**data)
 
 
+def parse_terrains_file(json_file_path: str | Path) -> dict[str, Terrain]:
+    """
+    Parses and validates a terrains JSON file, returns name → Terrain.
+    """
+    with open(json_file_path, "r") as f:
+        data = json.load(f)
+
+    logger.info(f"Loading terrains data: {len(data)} entries")
+    terrains = {}
+    for terrain_info in data:
+        try:
+            terrain = Terrain.from_dict(terrain_info)
+            terrains[terrain.name] = terrain
+            logger.info(f" {terrain.name:>15}: OK!")
+        except ValidationError as e:
+            logger.info(f" {terrain_info.get('name')}: FAILED!. Validation failed for terrain: {terrain_info}. Error: {e}")
+    return terrains
+
+
 def load_terrains_data(json_file_path: str | None = None):
 
     """
     Loads terrain data with validation, storing into TERRAIN_DATA for fast access.
+    The default file goes through the data catalog (validated once, cached in binary).
     """
     logger.info(f"Loading Terrains data ...")
     try:
         if json_file_path is None:
-            project_root = Path(__file__).resolve().parent.parent
-            json_file_path = project_root / "json_files" / "terrains_data.json"
-            logger.info(f"... resolving json file path : {json_file_path}")
-        with open(json_file_path, "r") as f:
-            data = json.load(f)
+            import catalog
+            terrains = catalog.get("terrains")
+        else:
+            terrains = parse_terrains_file(json_file_path)
     except Exception as e:
         logger.error(f"Error loading terrain data from {json_file_path}: {e}")
         return
 
     TERRAIN_DATA.clear()
-    logger.info(f"Loading terrains data: {len(data)} entries")
-    for terrain_info in data:
-        try:
-            terrain = Terrain.from_dict(terrain_info)
-            TERRAIN_DATA[terrain.name] = terrain
-            logger.info(f" {terrain.name:>15}: OK!")
-        except ValidationError as e:
-            logger.info(f" {terrain.name}: FAILED!. Validation failed for terrain: {terrain_info}. Error: {e}")
+    TERRAIN_DATA.update(terrains)
 
 
 if __name__ == "__main__":
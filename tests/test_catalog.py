@@ -0,0 +1,114 @@
+import json
+
+from catalog import DataCatalog
+
+
+def test_catalog_reuses_binary_until_source_changes(tmp_path):
+    source = tmp_path / "data.json"
+    source.write_text(json.dumps({"a": 1}))
+    cache_file = tmp_path / "catalog.pkl"
+    calls = []
+
+    def build():
+        calls.append(1)
+        return json.loads(source.read_text())
+
+    catalog = DataCatalog(cache_file)
+    catalog.register("data", [source], build)
+    assert catalog.get("data") == {"a": 1}
+    assert catalog.get("data") == {"a": 1}
+    assert len(calls) == 1          # once per process
+
+    fresh = DataCatalog(cache_file)  # new process: served from the binary file
+    fresh.register("data", [source], build)
+    assert fresh.get("data") == {"a": 1}
+    assert len(calls) == 1
+
+    source.write_text(json.dumps({"a": 2}))
+    fresh.invalidate("data")
+    assert fresh.get("data") == {"a": 2}
+    assert len(calls) == 2
+
+
+def test_unpicklable_data_is_served_but_not_cached(tmp_path):
+    cache_file = tmp_path / "catalog.pkl"
+    catalog = DataCatalog(cache_file)
+    catalog.register("data", [], lambda: {"parse": lambda text: text})  # lambdas cannot be pickled
+
+    assert catalog.get("data")["parse"]("x") == "x"
+    assert list(tmp_path.iterdir()) == []  # no catalog, no leftover .tmp file
+
+
+def test_default_data_sets_load(tmp_path, monkeypatch):
+    import catalog
+    from knowledge_tree import KnowledgeTree
+
+    # cache to a scratch file, not the project's pkl_files/catalog.pkl
+    monkeypatch.setattr(catalog.CATALOG, "cache_file", tmp_path / "catalog.pkl")
+    monkeypatch.setattr(catalog.CATALOG, "_disk", None)
+
+    assert "grassland" in catalog.get("terrains")
+    assert "oak" in catalog.get("trees")
+    assert "Human" in catalog.get("skills").classes
+    assert len(catalog.get("resources")) > 0
+    assert "reed" in catalog.get("plants")
+
+    # every character gets its own knowledge tree
+    first, second = KnowledgeTree.LoadTree(), KnowledgeTree.LoadTree()
+    assert first is not second
+    name = next(iter(first.root))
+    first.root[name].unlocked = not first.root[name].unlocked
+    assert first.root[name].unlocked != second.root[name].unlocked
+
+
+def test_one_unpicklable_entry_leaves_the_others_cached(tmp_path):
+    source = tmp_path / "data.json"
+    source.write_text(json.dumps({"a": 1}))
+    cache_file = tmp_path / "catalog.pkl"
+    calls = []
+
+    def build():
+        calls.append(1)
+        return json.loads(source.read_text())
+
+    catalog = DataCatalog(cache_file)
+    catalog.register("data", [source], build)
+    catalog.register("parsers", [], lambda: {"parse": lambda text: text})
+    assert catalog.get("data") == {"a": 1}
+    assert catalog.get("parsers")["parse"]("x") == "x"
+
+    fresh = DataCatalog(cache_file)
+    fresh.register("data", [source], build)
+    assert fresh.get("data") == {"a": 1}
+    assert len(calls) == 1
+
+
+def test_editing_a_loader_module_reparses(tmp_path, monkeypatch):
+    import catalog.catalog as catalog_module
+
+    source = tmp_path / "data.json"
+    source.write_text(json.dumps({"a": 1}))
+    loader = tmp_path / "loader.py"
+    loader.write_text("VERSION = 1\n")
+    monkeypatch.setattr(catalog_module, "module_file", lambda name: loader)
+    cache_file = tmp_path / "catalog.pkl"
+    calls = []
+
+    def build():
+        calls.append(1)
+        return json.loads(source.read_text())
+
+    def load():
+        catalog = DataCatalog(cache_file)
+        catalog.register("data", [source], build, ["loader"])
+        return catalog.get("data")
+
+    load()
+    load()
+    assert len(calls) == 1
+    loader.write_text("VERSION = 2\n")
+    load()
+    assert len(calls) == 2
+    monkeypatch.setattr(catalog_module, "CATALOG_FORMAT", catalog_module.CATALOG_FORMAT + 1)
+    load()
+    assert len(calls) == 3
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from world import World, WorldGen, WorldGenConfig
+from character import Human
+from collision import CollisionResolver, orca_velocities, resolve_moves
+from commands import MoveCommand
+
+
+def sweep(obstacle, start, end, radius=0.25, cells_per_tile=1):
+    out_x, out_y = np.empty(1), np.empty(1)
+    blocked = resolve_moves(obstacle, cells_per_tile, np.array([start[0]]), np.array([start[1]]),
+                            np.array([end[0]]), np.array([end[1]]), np.array([radius]), out_x, out_y)
+    return (out_x[0], out_y[0]), blocked
+
+
+def test_blocked_moves_slide_along_the_wall():
+    obstacle = np.zeros((10, 10), dtype=np.bool_)
+    obstacle[:, 5] = True
+
+    (x, y), blocked = sweep(obstacle, (3.5, 2.5), (6.5, 5.5))
+    assert blocked == 1
+    assert x == pytest.approx(5 - 0.25)
+    assert y > 2.5  # kept the motion along the wall
+
+    # a single fast step does not tunnel through a one cell wall
+    (x, y), _ = sweep(obstacle, (1.5, 1.5), (9.5, 1.5))
+    assert x == pytest.approx(5 - 0.25) and y == pytest.approx(1.5)
+
+    (x, y), blocked = sweep(obstacle, (1.5, 1.5), (3.25, 7.75))
+    assert (x, y) == (3.25, 7.75) and blocked == 0
+
+
+def test_resolver_sweeps_agents_at_subdivision_resolution():
+    world = World(WorldGen(WorldGenConfig(WIDTH=10, HEIGHT=10, TILE_SUBDIVISIONS=4))).generate()
+    world.obstacle[:, :] = False
+    world.obstacle[8:12, 8:12] = True  # one tree on tile (2, 2)
+    walker, idle = Human("Walker", age=20), Human("Idle", age=20)
+    walker.x, walker.y = 1.5, 2.5
+    idle.x, idle.y = 2.5, 2.5  # stands inside the tree but did not move: left alone
+    before = np.array([(walker.x, walker.y), (idle.x, idle.y)])
+
+    walker.x = 3.5
+    assert CollisionResolver().resolve([walker, idle], before) == 1
+    assert walker.x == pytest.approx(2 - walker.RADIUS) and walker.y == pytest.approx(2.5)
+    assert (idle.x, idle.y) == (2.5, 2.5)
+
+
+def test_orca_separates_stacked_agents_and_passes_head_on():
+    dt = 0.1
+    xs, ys = np.array([5.0, 5.0, 5.0]), np.array([5.0, 5.0, 5.0])
+    vx, vy = np.zeros(3), np.zeros(3)
+    for _ in range(20):
+        out_vx, out_vy = np.empty(3), np.empty(3)
+        orca_velocities(xs, ys, vx, vy, np.full(3, 0.25), np.full(3, 1.0), dt, 2.0, 10, 1.0, out_vx, out_vy)
+        xs, ys = xs + out_vx * dt, ys + out_vy * dt
+    gaps = np.hypot(xs[:, None] - xs[None, :], ys[:, None] - ys[None, :])[np.triu_indices(3, 1)]
+    assert gaps.min() >= 0.5 - 1e-6
+
+    # two agents walking into each other swerve instead of meeting
+    xs, ys = np.array([0.0, 4.0]), np.array([0.0, 0.0])
+    closest = np.inf
+    for _ in range(60):
+        to_goal = np.array([4.0, 0.0]) - xs
+        vx, vy = np.sign(to_goal) * np.minimum(np.abs(to_goal) / dt, 1.0), np.zeros(2)
+        out_vx, out_vy = np.empty(2), np.empty(2)
+        orca_velocities(xs, ys, vx, vy, np.full(2, 0.25), np.full(2, 1.0), dt, 2.0, 10, 1.0, out_vx, out_vy)
+        xs, ys = xs + out_vx * dt, ys + out_vy * dt
+        closest = min(closest, np.hypot(xs[1] - xs[0], ys[1] - ys[0]))
+    assert closest >= 0.5 - 1e-6 and abs(ys[0]) > 0
+
+
+def test_agents_ordered_to_one_point_spread_around_it():
+    from manager import Manager
+
+    world = World(WorldGen(WorldGenConfig(WIDTH=30, HEIGHT=30, TILE_SUBDIVISIONS=2))).generate()
+    world.obstacle[:, :] = False
+    agents = [Human(f"Walker {i}", age=20) for i in range(12)]
+    goal = (15.5, 15.5)
+    for i, agent in enumerate(agents):
+        angle = 2 * np.pi * i / len(agents)
+        agent.x, agent.y = goal[0] + 5 * np.cos(angle), goal[1] + 5 * np.sin(angle)
+        agent.assign_command(MoveCommand([goal]))
+    manager = Manager(agents=agents)
+    manager.resume()
+
+    for _ in range(2000):
+        manager.update_agents(0.05)
+        if all(not agent.commands for agent in agents):
+            break
+    assert all(not agent.commands for agent in agents)  # every move ended, none pushes forever
+    xy = np.array([(agent.x, agent.y) for agent in agents])
+    gaps = np.hypot(xy[:, None, 0] - xy[None, :, 0], xy[:, None, 1] - xy[None, :, 1])[np.triu_indices(len(agents), 1)]
+    assert gaps.min() >= 2 * Human.RADIUS * 0.9
+    assert np.hypot(*(xy - goal).T).max() <= 2.5
+
+
+def test_avoidance_caps_speeds_without_tile_lookups(monkeypatch):
+    from collision import CrowdAvoidance
+
+    world = World(WorldGen(WorldGenConfig(WIDTH=10, HEIGHT=10))).generate()
+    agents = [Human("Left", age=20), Human("Right", age=20)]
+    agents[0].x, agents[0].y = 4.5, 5.0
+    agents[1].x, agents[1].y = 5.5, 5.0
+    before = np.array([(agent.x, agent.y) for agent in agents])
+    agents[0].x, agents[1].x = 4.6, 5.4  # walking into each other
+
+    lookups = []
+    get_tile = World.get_tile
+    monkeypatch.setattr(World, "get_tile", lambda self, x, y: lookups.append((x, y)) or get_tile(self, x, y))
+    CrowdAvoidance().avoid(agents, before, 0.1)
+    assert lookups == []
@@ -0,0 +1,64 @@
+import json
+import os
+
+import numpy as np
+
+from catalog import DataCatalog, DataWatcher
+from knowledge_tree import KnowledgeTree
+from world.ground_cover import remap_codes
+
+
+def _touch(path, content):
+    path.write_text(content)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))  # coarse mtime filesystems
+
+
+def test_watcher_reloads_only_changed_data(tmp_path):
+    first, second = tmp_path / "first.json", tmp_path / "second.json"
+    first.write_text(json.dumps({"v": 1}))
+    second.write_text(json.dumps({"v": 1}))
+
+    catalog = DataCatalog(tmp_path / "catalog.pkl")
+    catalog.register("first", [first], lambda: json.loads(first.read_text()))
+    catalog.register("second", [second], lambda: json.loads(second.read_text()))
+    catalog.get("first"), catalog.get("second")
+
+    watcher = DataWatcher(catalog, interval=0)
+    received = []
+    watcher.subscribe("first", received.append)
+    assert watcher.poll(force=True) == []
+
+    _touch(first, json.dumps({"v": 2}))
+    assert watcher.poll(force=True) == ["first"]
+    assert received == [{"v": 2}]
+    assert catalog.get("first") == {"v": 2}
+
+
+def test_watcher_keeps_previous_data_on_invalid_file(tmp_path):
+    source = tmp_path / "data.json"
+    source.write_text(json.dumps({"v": 1}))
+    catalog = DataCatalog(tmp_path / "catalog.pkl")
+    catalog.register("data", [source], lambda: json.loads(source.read_text()))
+    catalog.get("data")
+
+    watcher = DataWatcher(catalog, interval=0)
+    _touch(source, "{ not json")
+    assert watcher.poll(force=True) == []
+    assert catalog.get("data") == {"v": 1}
+
+
+def test_remap_ground_cover_codes_by_name():
+    layer = np.array([[0, 1, 2], [3, 2, 1]], dtype=np.uint8)
+    remap_codes(layer, ["", "grass", "fern", "moss"], ["", "fern", "grass"])
+    np.testing.assert_array_equal(layer, [[0, 2, 1], [0, 1, 2]])
+
+
+def test_restore_unlocks_keeps_character_progress():
+    old = KnowledgeTree.LoadTree()
+    name = next(n for n, item in old.root.items() if not item.unlocked)
+    old[name].unlocked = True
+
+    fresh = KnowledgeTree.LoadTree().restore_unlocks(old)
+    assert fresh.knows(name)
+    assert not KnowledgeTree.LoadTree().knows(name)
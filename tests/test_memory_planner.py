@@ -0,0 +1,82 @@
+import gc
+
+import numpy as np
+import pytest
+
+from world import WorldGen, WorldGenConfig, plan_world_memory, WorldGenMemoryError
+
+
+def test_default_config_fits():
+    plan = plan_world_memory(WorldGenConfig())
+    assert plan.fits
+    assert plan["topology"].dtype == np.float32
+    assert plan["topology"].storage == "dense"
+    assert plan.peak_bytes >= plan.resident_bytes
+
+
+def test_topology_dtype_downgraded_for_large_maps():
+    config = WorldGenConfig(WIDTH=400, HEIGHT=400, TILE_SUBDIVISIONS=10, MEMORY_BUDGET_MB=100_000)
+    plan = plan_world_memory(config, budget_mb=200, auto_storage=False)
+    assert plan["topology"].dtype == np.float16
+
+
+def test_numeric_layers_spill_to_memmap(tmp_path):
+    config = WorldGenConfig(WIDTH=200, HEIGHT=200, TILE_SUBDIVISIONS=10, MEMMAP_DIR=str(tmp_path))
+    dense = plan_world_memory(config, budget_mb=10_000, auto_storage=False)
+    # budget just below the dense peak but above the object layers
+    budget_mb = (dense.peak_bytes - 1) / 1024 ** 2
+    plan = plan_world_memory(config, budget_mb=budget_mb)
+    assert plan.fits
+    assert plan["topology"].storage == "memmap"
+    topo = plan.allocate("topology")
+    assert isinstance(topo, np.memmap)
+    assert topo.shape == (2000, 2000)
+
+    # the spill directory belongs to the plan
+    spill = plan.memmap_dir
+    assert spill.parent == tmp_path and (spill / "topology.dat").exists()
+    del topo
+    plan.cleanup()
+    assert not spill.exists()
+    plan = plan_world_memory(config, budget_mb=budget_mb)
+    spill = plan.memmap_dir
+    plan.allocate("topology")
+    del plan
+    gc.collect()
+    assert not spill.exists()
+
+
+def test_worldgen_fails_before_allocating():
+    config = WorldGenConfig(WIDTH=1000, HEIGHT=1000, TILE_SUBDIVISIONS=10, MEMORY_BUDGET_MB=64)
+    with pytest.raises(WorldGenMemoryError) as err:
+        WorldGen(config)
+    assert "elements" in str(err.value)
+
+
+def test_spilled_world_pickles_into_its_own_spill_dir(tmp_path):
+    import pickle
+    from tree import Tree, TREE_DATA
+
+    config = WorldGenConfig(WIDTH=20, HEIGHT=20, TILE_SUBDIVISIONS=2, MEMMAP_DIR=str(tmp_path))
+    dense = plan_world_memory(config, budget_mb=10_000, auto_storage=False)
+    config.MEMORY_BUDGET_MB = (dense.peak_bytes - 1) / 1024 ** 2
+    gen = WorldGen(config)
+    gen.generate()
+    assert gen.memory_plan["topology"].storage == "memmap"
+
+    copy = pickle.loads(pickle.dumps(gen))
+    spill = copy.memory_plan.memmap_dir
+    assert spill.parent == tmp_path and spill != gen.memory_plan.memmap_dir
+    assert isinstance(copy.topology, np.memmap) and (spill / "topology.dat").exists()
+    np.testing.assert_array_equal(copy.topology, gen.topology)
+
+    trees = [obj for obj in copy.elements.flat if isinstance(obj, Tree)]
+    if trees:  # no forest on this small map otherwise
+        trees[0].log_yield = -1
+        copy.relink_trees()
+        assert trees[0].log_yield == TREE_DATA[trees[0].name].log_yield
+
+    del copy
+    gc.collect()
+    assert not spill.exists()
+    assert gen.memory_plan.memmap_dir.exists()
@@ -0,0 +1,908 @@
+import heapq
+import math
+
+import numpy as np
+import pytest
+
+from world import World, WorldGen, WorldGenConfig
+from character import Human
+from agent import MoveMode
+from commands import FlowFieldCommand, FormationCommand, MoveCommand
+from pathfinder import (CostTensor, DStarLite, FlowField, Formation, HierarchicalGraph, HierarchicalSearch, IncrementalSearch, LandmarkSet,
+                        ModeLayers, MovementProfile, NavMesh, NearestTargetService, PathCache, Pathfinder, PathService, ReachabilityIndex, TargetField)
+from pathfinder.pathfinder import astar_find_path, movement_cost, terrain_penalty_grid
+from pathfinder.astar_kernel import DIRS_X, DIRS_Y, astar_kernel
+from pathfinder.cost_tensor import build_edge_costs
+
+
+@pytest.fixture(scope="module")
+def world():
+    return World(WorldGen(WorldGenConfig(WIDTH=30, HEIGHT=30, TILE_SUBDIVISIONS=2))).generate()
+
+
+@pytest.fixture
+def agent(world):
+    return Human("Tester", age=20)
+
+
+def path_cost(path, height_map, agent):
+    return sum(movement_cost(x0, y0, x1, y1, height_map, agent) for (x0, y0), (x1, y1) in zip(path, path[1:]))
+
+
+def reference_cost(start, goal, height_map, obstacle_map, agent):
+    """Plain Dijkstra with the Python movement_cost, the optimum A* must reach."""
+    h, w = height_map.shape
+    dist = {start: 0.0}
+    heap = [(0.0, start)]
+    while heap:
+        d, (x, y) = heapq.heappop(heap)
+        if (x, y) == goal:
+            return d
+        if d > dist[(x, y)]:
+            continue
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                nx, ny = x + dx, y + dy
+                if (dx, dy) == (0, 0) or not (0 <= nx < w and 0 <= ny < h) or obstacle_map[ny, nx]:
+                    continue
+                if dx and dy and obstacle_map[y, nx] and obstacle_map[ny, x]:
+                    continue
+                nd = d + movement_cost(x, y, nx, ny, height_map, agent)
+                if nd < dist.get((nx, ny), math.inf):
+                    dist[(nx, ny)] = nd
+                    heapq.heappush(heap, (nd, (nx, ny)))
+    return None
+
+
+def test_kernel_finds_optimal_path(world, agent):
+    rng = np.random.default_rng(3)
+    height_map = rng.random((world.size_y, world.size_x)) * 0.2
+    obstacle_map = rng.random((world.size_y, world.size_x)) < 0.2
+    obstacle_map[0, 0] = obstacle_map[-1, -1] = False
+    goal = (world.size_x - 1, world.size_y - 1)
+
+    path = astar_find_path(0, 0, *goal, world.size_x, world.size_y, height_map, obstacle_map, agent)
+    expected = reference_cost((0, 0), goal, height_map, obstacle_map, agent)
+    if expected is None:
+        assert path is None
+    else:
+        assert path[0] == (0, 0) and path[-1] == goal
+        assert path_cost(path, height_map, agent) == pytest.approx(expected)
+
+
+def test_kernel_reports_unreachable_goal(world, agent):
+    height_map = np.zeros((10, 10))
+    obstacle_map = np.zeros((10, 10), dtype=bool)
+    obstacle_map[:, 5] = True
+    assert astar_find_path(0, 0, 9, 9, 10, 10, height_map, obstacle_map, agent) is None
+
+
+def test_pathfinder_uses_tile_resolution_layers(world, agent):
+    finder = Pathfinder()
+    assert finder.height_map.shape == (world.size_y, world.size_x)
+    assert finder.obstacle_map.shape == (world.size_y, world.size_x)
+
+    path = finder.find_path((1.2, 1.7), (25.5, 20.5), agent)
+    assert path[0] == (1.2, 1.7) and path[-1] == (25.5, 20.5)
+
+    tensor = finder.cost_tensor(agent)
+    assert tensor is finder.cost_tensor(Human("Other", age=30))  # shared per movement profile
+    np.testing.assert_allclose(tensor.penalty, terrain_penalty_grid(agent, world.size_x, world.size_y))
+
+
+def test_cost_tensor_matches_movement_cost(world, agent):
+    finder = Pathfinder()
+    costs = finder.cost_tensor(agent).costs
+    assert costs.shape == (world.size_y, world.size_x, 8) and costs.dtype == np.float32
+    for k, (dx, dy) in enumerate(zip(DIRS_X, DIRS_Y)):
+        x, y = 10, 12
+        expected = movement_cost(x, y, x + dx, y + dy, finder.height_map, agent)
+        assert costs[y, x, k] == pytest.approx(expected, rel=1e-6)
+    assert np.isinf(costs[0, 0, 0])  # leaves the map
+
+
+def test_cost_tensor_rebuilds_only_changed_chunks(world, agent):
+    finder = Pathfinder()
+    tensor = finder.cost_tensor(agent)
+    built = tensor.chunks_rebuilt
+    assert built == 4  # 30x30 tiles, 16 tile chunks
+
+    N = world.gen.config.TILE_SUBDIVISIONS
+    world.obstacle[5 * N:6 * N, 5 * N:6 * N] = True
+    try:
+        world.notify_changed(5, 5, 6, 6)
+        finder.cost_tensor(agent)
+        assert tensor.chunks_rebuilt == built + 1
+        assert finder.obstacle_map[5, 5]
+        east = next(k for k in range(8) if (DIRS_X[k], DIRS_Y[k]) == (1, 0))
+        assert np.isinf(tensor.costs[5, 4, east])  # step (4,5) -> (5,5) blocked
+    finally:
+        world.obstacle[5 * N:6 * N, 5 * N:6 * N] = False
+        world.notify_changed(5, 5, 6, 6)
+
+
+def synthetic_tensor(agent, size=64, seed=5, density=0.25):
+    rng = np.random.default_rng(seed)
+    height_map = rng.random((size, size)) * 0.1
+    obstacle_map = rng.random((size, size)) < density
+    obstacle_map[0, 0] = obstacle_map[-1, -1] = False
+    water_map = np.zeros((size, size), dtype=bool)
+    return CostTensor(MovementProfile.of(agent), height_map, obstacle_map, water_map)
+
+
+def cells_cost(cells, costs):
+    w = costs.shape[1]
+    total = 0.0
+    for a, b in zip(cells, cells[1:]):
+        k = next(k for k in range(8) if (DIRS_X[k], DIRS_Y[k]) == (b % w - a % w, b // w - a // w))
+        total += costs[a // w, a % w, k]
+    return total
+
+
+def test_hpa_path_is_valid_and_near_optimal(agent):
+    tensor = synthetic_tensor(agent)
+    graph = HierarchicalGraph(tensor)
+    start, goal = 0, 64 * 64 - 1
+
+    cells = graph.find_path(start, goal)
+    optimal = astar_kernel(start, goal, tensor.costs, tensor.min_penalty)
+    assert cells[0] == start and cells[-1] == goal
+    assert np.isfinite(cells_cost(cells, tensor.costs))
+    assert cells_cost(cells, tensor.costs) <= 1.25 * cells_cost(optimal, tensor.costs)
+
+
+def test_hpa_fails_fast_when_unreachable(agent):
+    tensor = synthetic_tensor(agent, density=0.0)
+    tensor.obstacle_map[:, 40] = True
+    graph = HierarchicalGraph(tensor)
+    assert graph.find_path(0, 64 * 64 - 1) is None
+    assert graph.find_path(0, 64 * 10 + 30) is not None
+
+
+def test_hpa_search_refines_the_abstract_route_over_frames(agent):
+    tensor = synthetic_tensor(agent)
+    graph = HierarchicalGraph(tensor)
+    start, goal = 0, 64 * 64 - 1
+    search = HierarchicalSearch(graph, start, goal)
+    prefixes = []
+    while not search.done:
+        assert search.advance(100) <= 100
+        prefixes.append(len(search.path()))
+    assert search.found and len(prefixes) > 2 and prefixes[0] < prefixes[-2]  # the prefix grows
+    assert [y * 64 + x for x, y in search.path()] == graph.find_path(start, goal).tolist()
+
+    # a cluster walled off after the abstract search: the rest is rerouted around it
+    search = HierarchicalSearch(graph, start, goal)
+    tensor.obstacle_map[16:32, 16:32] = True
+    tensor.mark_dirty(16, 16, 32, 32)
+    while not search.done:
+        search.advance(1000)
+    cells = [y * 64 + x for x, y in search.path()]
+    assert search.found and cells[0] == start and cells[-1] == goal
+    assert np.isfinite(cells_cost(cells, tensor.costs))
+
+    tensor.obstacle_map[:, 40] = True
+    tensor.mark_dirty(40, 0, 41, 64)
+    assert HierarchicalSearch(graph, start, goal).done  # fails fast, like find_path
+
+
+def test_hpa_rebuilds_only_changed_clusters(agent):
+    tensor = synthetic_tensor(agent)
+    graph = HierarchicalGraph(tensor)
+    graph.update()
+    assert graph.clusters_rebuilt == 16
+
+    tensor.obstacle_map[20:24, 20:24] = True  # inside cluster (1, 1)
+    tensor.mark_dirty(20, 20, 24, 24)
+    graph.update()
+    assert graph.clusters_rebuilt - 16 <= 5  # the cluster and at most its 4 neighbors
+
+
+def test_flow_field_integration_is_optimal_cost(agent):
+    tensor = synthetic_tensor(agent, size=32)
+    field = FlowField(tensor, (31, 31))
+    start = 0
+    optimal = astar_kernel(start, 32 * 32 - 1, tensor.costs, tensor.min_penalty)
+    assert field.integration[0, 0] == pytest.approx(cells_cost(optimal, tensor.costs), rel=1e-6)
+
+    route = field.route(0.5, 0.5)
+    cells = [int(y) * 32 + int(x) for x, y in route]
+    assert cells[-1] == 32 * 32 - 1
+    assert cells_cost(cells, tensor.costs) == pytest.approx(field.integration[0, 0], rel=1e-6)
+
+
+def test_group_order_shares_one_flow_field(world, agent):
+    finder = Pathfinder()
+    other = Human("Other", age=30)
+    field = finder.flow_field((20.5, 20.5), agent)
+    assert finder.flow_field((20.2, 20.9), other) is field
+
+    ys, xs = np.nonzero(np.isfinite(field.integration))
+    far = np.argmax(field.integration[ys, xs])
+    agent.x, agent.y = xs[far] + 0.5, ys[far] + 0.5
+    command = FlowFieldCommand(field, (20.5, 20.5))
+    for _ in range(10000):
+        if command.execute(agent, dt=0.1):
+            break
+    assert (agent.x, agent.y) == (20.5, 20.5)
+
+
+def test_path_cache_invalidates_only_touched_corridors():
+    cache = PathCache(capacity=2)
+    cache.put("a", [(0, 0), (1, 1), (2, 2)])
+    cache.put("b", [(40, 40), (41, 40)])
+    assert cache.invalidate_box(20, 20, 25, 25) == 0
+    assert cache.invalidate_box(3, 3, 4, 4) == 1     # next to (2, 2): inside the corridor
+    assert "a" not in cache and cache.get("b") == [(40, 40), (41, 40)]
+
+    cache.put("c", [(5, 5)])
+    cache.put("d", [(6, 6)])
+    assert "b" not in cache and len(cache) == 2       # least recently used evicted
+
+
+def test_path_cache_deduplicates_in_flight_requests():
+    import threading
+    import time
+
+    cache = PathCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return [(0, 0), (1, 0)]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [[(0, 0), (1, 0)]] * 4
+    assert cache.deduplicated == 3
+
+
+def test_pathfinder_reuses_cached_paths(world, agent):
+    finder = Pathfinder()
+    first = finder.find_path((2.5, 2.5), (8.5, 9.5), agent)
+    second = finder.find_path((2.2, 2.9), (8.1, 9.7), agent)  # same tiles
+    assert finder.path_cache.hits == 1
+    assert first[1:-1] == second[1:-1]
+
+    x, y = map(int, first[len(first) // 2])
+    world.notify_changed(x, y, x + 1, y + 1)
+    assert len(finder.path_cache) == 0
+
+
+def test_cost_snapshot_is_not_written_by_refresh(agent):
+    tensor = synthetic_tensor(agent, size=32, density=0.0)
+    snapshot = tensor.snapshot()
+    before = snapshot.copy()
+    tensor.obstacle_map[10, 10] = True
+    tensor.mark_dirty(10, 10, 11, 11)
+    tensor.refresh()
+    np.testing.assert_array_equal(snapshot, before)
+    assert not snapshot.flags.writeable
+    east = next(k for k in range(8) if (DIRS_X[k], DIRS_Y[k]) == (1, 0))
+    assert np.isinf(tensor.costs[10, 9, east])
+
+
+def test_path_service_delivers_on_poll(world, agent):
+    import time
+
+    service = PathService(Pathfinder())
+    try:
+        agent.x, agent.y = 1.5, 1.5
+        delivered = []
+        stale = service.request(agent, (25.5, 25.5), on_done=delivered.append)
+        latest = service.request(agent, (20.5, 22.5), on_done=delivered.append)  # newer order wins
+        stale.result(timeout=10)
+        latest.result(timeout=10)
+        deadline = time.time() + 10
+        while not delivered and time.time() < deadline:
+            service.poll()
+            time.sleep(0.01)
+
+        assert len(delivered) == 1 and delivered[0][-1] == (20.5, 22.5)
+        stats = service.stats()
+        assert stats["queue_depth"] == 0 and stats["completed"] == 2
+        assert stats["latency_max_ms"] > 0
+    finally:
+        service.shutdown()
+
+
+def test_incremental_search_resumes_to_the_optimal_path(agent):
+    tensor = synthetic_tensor(agent, size=48)
+    search = IncrementalSearch(tensor, (0, 0), (47, 47))
+    partial_lengths = []
+    while not search.done:
+        assert search.advance(50) <= 50
+        if not search.done:
+            partial_lengths.append(len(search.path()))
+
+    optimal = astar_kernel(0, 48 * 48 - 1, tensor.costs, tensor.min_penalty)
+    cells = [y * 48 + x for x, y in search.path()]
+    assert search.found and cells[0] == 0 and cells[-1] == 48 * 48 - 1
+    assert cells_cost(cells, tensor.costs) == pytest.approx(cells_cost(optimal, tensor.costs), rel=1e-6)
+    assert len(partial_lengths) > 1 and partial_lengths[0] > 1  # a partial path was available early
+    assert search._keys.shape[0] < 8 * 48 * 48  # the open list grew with the search, not sized to the grid
+
+
+def test_manager_advances_searches_within_budget(world, agent):
+    from manager import Manager
+
+    manager = Manager(agents=[agent])
+    manager.search_budget = 10
+    search = Pathfinder().start_search((1.5, 1.5), (28.5, 28.5), agent)
+    assert isinstance(search, HierarchicalSearch)  # long enough for HPA, only the refinement is sliced
+    progress = []
+    manager.add_search(search, on_progress=lambda s: progress.append(s.expanded))
+    manager.advance_searches()
+    assert progress == [10]
+    while manager.searches:
+        manager.advance_searches()
+    assert search.found
+
+
+def test_long_move_follows_the_hpa_search_through_the_controller(world, agent, monkeypatch):
+    from camera import Camera
+    from manager import Manager
+    from pygame_interface.pgi_agent_control import PGIAgentControl
+
+    monkeypatch.setattr(Camera, "get_instance", lambda: None, raising=False)
+    manager = Manager(agents=[agent])
+    control = PGIAgentControl(manager)
+    try:
+        agent.x, agent.y = 1.5, 1.5
+        goal = (28.5, 28.5)
+        command = MoveCommand([])
+        command.planning = True
+        agent.commands.clear()
+        agent.assign_command(command)
+        search = control.path_finder.start_search((agent.x, agent.y), goal, agent)
+        assert isinstance(search, HierarchicalSearch)
+        manager.add_search(search, on_progress=lambda s: control._follow_search(agent, command, s, goal))
+        while manager.searches:
+            manager.advance_searches()
+        assert search.found and not command.planning
+        assert command.path[-1] == goal
+        assert control.path_finder.moves._moves[-1][1] is command  # tracked once found
+    finally:
+        control.path_service.shutdown()
+        control.path_finder.close()
+        agent.commands.clear()
+
+
+def test_move_command_replace_path_skips_passed_waypoints(agent):
+    command = MoveCommand([])
+    command.planning = True
+    assert command.execute(agent, dt=0.1) is False  # waits for its path
+    command.replace_path([(0.5, 0.5), (1.5, 1.5), (2.5, 2.5), (3.5, 3.5)], position=(2.4, 2.6))
+    assert list(command.path) == [(2.5, 2.5), (3.5, 3.5)]
+
+
+def mode_layers(agent, size=24):
+    """A lake on the left half, a steep ridge across the right half with one walkable gap."""
+    height_map = np.zeros((size, size))
+    height_map[:, 16:] = np.where(np.arange(size)[:, None] % 2 == 0, 0.0, 0.4)  # corrugated: steep everywhere
+    height_map[20:, 16:] = 0.0
+    water_map = np.zeros((size, size), dtype=bool)
+    water_map[4:20, 4:12] = True
+    obstacle_map = np.zeros((size, size), dtype=bool)
+    return ModeLayers(MovementProfile.of(agent), height_map, obstacle_map, water_map)
+
+
+def test_multimodal_search_is_optimal_over_mode_states(agent):
+    from pathfinder.multimodal import MODE_SWITCH_COST, multimodal_astar
+
+    layers = mode_layers(agent)
+    walk, swim, climb = costs = layers.snapshot()
+    w = walk.shape[1]
+    start, goal = 10 * w + 1, 10 * w + 22
+    none = np.empty((0, walk.shape[0] * w), dtype=np.float32)
+    cells, used = multimodal_astar(start, goal, walk, swim, climb, layers.min_penalty, MODE_SWITCH_COST, none, none)
+
+    # reference: Dijkstra over (cell, layer), the first step free to pick its layer
+    dist = {(start, layer): 0.0 for layer in range(3)}
+    heap = [(0.0, start, layer) for layer in range(3)]
+    best = math.inf
+    while heap:
+        d, cell, layer = heapq.heappop(heap)
+        if cell == goal:
+            best = d
+            break
+        if d > dist[(cell, layer)]:
+            continue
+        for k in range(8):
+            nx, ny = cell % w + DIRS_X[k], cell // w + DIRS_Y[k]
+            if not (0 <= nx < w and 0 <= ny < w):
+                continue
+            for nl in range(3):
+                step = costs[nl][cell // w, cell % w, k] + (MODE_SWITCH_COST if nl != layer and cell != start else 0)
+                key = (ny * w + nx, nl)
+                if d + step < dist.get(key, math.inf):
+                    dist[key] = d + step
+                    heapq.heappush(heap, (d + step, ny * w + nx, nl))
+
+    def total(cells, used):
+        steps = sum(costs[b][a // w, a % w, next(k for k in range(8) if (DIRS_X[k], DIRS_Y[k]) == (c % w - a % w, c // w - a // w))]
+                    for a, c, b in zip(cells, cells[1:], used[1:]))
+        return steps + MODE_SWITCH_COST * np.count_nonzero(used[2:] != used[1:-1])
+
+    assert total(cells, used) == pytest.approx(best, rel=1e-5)
+    water = layers.tensors[0].water_map.ravel()
+    assert all(water[c] == (layer == 1) for c, layer in zip(cells[1:], used[1:]))  # swims exactly on water
+
+    # the ALT bound of the profile's CostTensor keeps the mode search optimal
+    from pathfinder.landmarks import build_landmarks
+    walk_tensor = layers.tensors[0]
+    tensor = CostTensor(layers.profile, walk_tensor.height_map, walk_tensor.obstacle_map, walk_tensor.water_map)
+    _, forward, reverse = build_landmarks(tensor.refresh(), np.isfinite(tensor.penalty) & ~tensor.obstacle_map, 4)
+    assert layers.alt_admissible
+    cells, used = multimodal_astar(start, goal, walk, swim, climb, layers.min_penalty, MODE_SWITCH_COST, forward, reverse)
+    assert total(cells, used) == pytest.approx(best, rel=1e-5)
+
+
+def test_find_path_modes_drives_the_move_command(world, agent, monkeypatch):
+    finder = Pathfinder()
+    finder._mode_layers[MovementProfile.of(agent)] = mode_layers(agent, size=30)
+    agent.x, agent.y = 1.5, 10.5
+    path, modes = finder.find_path_modes((1.5, 10.5), (22.5, 10.5), agent)
+    assert len(path) == len(modes)
+    assert finder.find_path_modes((1.5, 10.5), (22.5, 10.5), agent) == (path, modes)
+    assert finder.path_cache.hits == 1  # cached under its own key
+    assert modes[0] == MoveMode.WALK and MoveMode.SWIM in modes and modes[-1] == MoveMode.CLIMB  # the goal is steep
+
+    command = MoveCommand(path, modes)
+    monkeypatch.setattr(World, "get_tile", lambda *args: pytest.fail("tile looked up while moving"))
+    speeds = {}
+    while command.path:
+        command.execute(agent, dt=0.05)
+        speeds[agent.path_mode] = agent.speed
+    assert speeds[MoveMode.SWIM] == pytest.approx(speeds[MoveMode.WALK] * 0.5)
+    assert command.execute(agent, dt=0.05) and agent.path_mode is None
+
+
+def crosses_blocked(blocked, a, b):
+    """True if the segment a-b passes through the inside of a blocked cell (touching corners is fine)."""
+    for t in np.linspace(0.0, 1.0, int(math.dist(a, b) * 20) + 2)[1:-1]:
+        x, y = a[0] + t * (b[0] - a[0]), a[1] + t * (b[1] - a[1])
+        if min(abs(x - round(x)), abs(y - round(y))) > 1e-7 and blocked[int(y), int(x)]:
+            return True
+    return False
+
+
+def test_repair_replans_mode_moves_over_the_mode_layers(world, agent):
+    finder = Pathfinder()
+    layers = finder._mode_layers[MovementProfile.of(agent)] = mode_layers(agent, size=30)
+    agent.x, agent.y = 1.5, 10.5
+    path, modes = finder.find_path_modes((1.5, 10.5), (22.5, 10.5), agent)
+    command = MoveCommand(path, modes)
+    agent.commands.clear()
+    agent.assign_command(command)
+    finder.track_move(agent, command, path[-1])
+    try:
+        world.notify_changed(29, 0, 30, 1)  # nowhere near the route
+        assert finder.repair_moves() == 0 and list(command.modes) == modes
+
+        x, y = map(int, path[len(path) // 2])
+        layers.tensors[0].obstacle_map[y, x] = True  # shared by the three layers
+        world.notify_changed(x, y, x + 1, y + 1)
+        assert finder.repair_moves() == 1
+        assert (x + 0.5, y + 0.5) not in command.path
+        assert len(command.modes) == len(command.path) and command.modes[-1] == MoveMode.CLIMB
+    finally:
+        agent.commands.clear()
+
+
+def test_navmesh_paths_are_free_and_any_angle(agent):
+    rng = np.random.default_rng(1)
+    blocked = np.zeros((64, 64), dtype=bool)
+    for _ in range(25):
+        (x, y), (w, h) = rng.integers(0, 64, 2), rng.integers(1, 10, 2)
+        blocked[y:y + h, x:x + w] = True
+    mesh = NavMesh(blocked, np.zeros((64, 64)))
+    assert mesh.region_count < np.count_nonzero(~blocked) // 20
+    costs = build_edge_costs(np.zeros((64, 64)), blocked, np.zeros((64, 64)))
+
+    free = np.argwhere(~blocked)
+    for (sy, sx), (gy, gx) in free[rng.integers(len(free), size=(20, 2))]:
+        path = mesh.find_path((sx + 0.5, sy + 0.5), (gx + 0.5, gy + 0.5))
+        cells = astar_kernel(sy * 64 + sx, gy * 64 + gx, costs, 0.0)
+        assert (path is None) == (len(cells) == 0)
+        if path is None:
+            continue
+        assert path[0] == (sx + 0.5, sy + 0.5) and path[-1] == (gx + 0.5, gy + 0.5)
+        assert not any(crosses_blocked(blocked, a, b) for a, b in zip(path, path[1:]))
+        length = sum(math.dist(a, b) for a, b in zip(path, path[1:]))
+        assert length <= 1.05 * cells_cost(cells, costs) + 1e-9
+
+
+def test_navmesh_remerges_only_edited_chunks(world, agent):
+    blocked = np.zeros((64, 64), dtype=bool)
+    mesh = NavMesh(blocked, np.zeros((64, 64)), chunk_size=16)
+    assert mesh.find_path((8.5, 2.5), (8.5, 30.5)) == [(8.5, 2.5), (8.5, 30.5)]  # open field: straight
+    assert mesh.chunks_merged == 16
+    blocked[20, 0:15] = True  # a wall inside chunk (1, 0)
+    mesh.mark_dirty(0, 20, 15, 21)
+    path = mesh.find_path((8.5, 2.5), (8.5, 30.5))
+    assert mesh.chunks_merged == 17
+    assert path == [(8.5, 2.5), (15.0, 20.0), (15.0, 21.0), (8.5, 30.5)]  # around the end of the wall
+    assert not any(crosses_blocked(blocked, a, b) for a, b in zip(path, path[1:]))
+
+    finder = Pathfinder()
+    path = finder.find_path_navmesh((1.5, 1.5), (28.5, 28.5), agent)
+    if path is not None:
+        assert path[0] == (1.5, 1.5) and path[-1] == (28.5, 28.5)
+
+
+def test_broadcast_gives_each_agent_its_own_command(world, agent):
+    from manager import Manager
+
+    other = Human("Other", age=30)
+    manager = Manager(agents=[agent, other])
+    manager.broadcast(MoveCommand([(1.5, 1.5), (2.5, 2.5)]), [agent.id, other.id])
+    mine, theirs = agent.commands[-1], other.commands[-1]
+    assert mine is not theirs
+    agent.x, agent.y = 1.5, 1.5
+    mine.execute(agent, dt=0.1)
+    assert len(mine.path) == 1 and len(theirs.path) == 2
+
+
+def test_formation_slots_follow_one_reference_path(world, agent):
+    from pathfinder.formation import slot_offsets
+
+    assert slot_offsets("line", 3).tolist() == [[-1.0, 0.0], [0.0, 0.0], [1.0, 0.0]]
+    assert slot_offsets("wedge", 3)[0, 1] < slot_offsets("wedge", 3)[1, 1]  # the tip leads
+    finder = Pathfinder()
+    finder.height_map[:] = 0.0
+    finder.water_map[:] = False
+    finder.obstacle_map[:] = False
+    finder.obstacle_map[15, :] = True
+    finder.obstacle_map[15, 10] = False  # a one tile gate
+
+    agents = [agent] + [Human(f"H{i}", age=30) for i in range(3)]
+    for i, a in enumerate(agents):
+        a.x, a.y = 8.5 + i, 5.5
+    formation = Formation(finder, agents, (10.5, 25.5), "box")
+    assert sorted(formation.slots.values()) == [0, 1, 2, 3]
+    tensor = finder.cost_tensor(agent)
+    ends = set()
+    for a in agents:
+        path = formation.path_for(a)
+        tiles = [(int(x), int(y)) for x, y in path]
+        assert tiles[0] == (int(a.x), int(a.y)) and (10, 15) in tiles  # all squeeze through the gate
+        steps = [k for t, u in zip(tiles, tiles[1:]) for k in range(8) if (DIRS_X[k], DIRS_Y[k]) == (u[0] - t[0], u[1] - t[1])]
+        assert len(steps) == len(tiles) - 1
+        assert all(np.isfinite(tensor.costs[t[1], t[0], k]) for t, k in zip(tiles, steps))
+        ends.add(tiles[-1])
+    assert len(ends) == 4 and finder.path_cache.misses == 1  # one search, the slots are derived
+
+    command = FormationCommand(formation)
+    assert list(command.for_agent(agents[1]).path) == formation.path_for(agents[1])
+
+
+def test_dstar_lite_repairs_to_the_optimal_path(agent):
+    tensor = synthetic_tensor(agent, size=48, density=0.15)
+    planner = DStarLite(tensor, (0, 0), (47, 47))
+    first = planner.expanded
+    tiles = planner.path()
+
+    # wall off the middle of the route, the agent has walked a few tiles meanwhile
+    x, y = tiles[len(tiles) // 2]
+    tensor.obstacle_map[y - 1:y + 2, x - 1:x + 2] = True
+    tensor.mark_dirty(x - 1, y - 1, x + 2, y + 2)
+    assert planner.repair(tensor, tiles[3])
+
+    optimal = astar_kernel(tiles[3][1] * 48 + tiles[3][0], 48 * 48 - 1, tensor.costs, tensor.min_penalty)
+    cells = [cy * 48 + cx for cx, cy in planner.path()]
+    assert cells[0] == optimal[0] and cells[-1] == 48 * 48 - 1
+    assert (x, y) not in planner.path()
+    assert cells_cost(cells, tensor.costs) == pytest.approx(cells_cost(optimal, tensor.costs), rel=1e-6)
+    assert planner.expanded - first < first  # repaired, not searched again
+
+
+def test_tracked_move_is_rerouted_around_an_edit(world, agent):
+    finder = Pathfinder()
+    agent.x, agent.y = 2.5, 2.5
+    path = finder.find_path((2.5, 2.5), (12.5, 12.5), agent)
+    command = MoveCommand(path)
+    agent.commands.clear()
+    agent.assign_command(command)
+    finder.track_move(agent, command, path[-1])
+    assert finder.repair_moves() == 0  # nothing changed
+
+    N = world.gen.config.TILE_SUBDIVISIONS
+    x, y = map(int, path[len(path) // 2])
+    world.obstacle[y * N:(y + 1) * N, x * N:(x + 1) * N] = True
+    try:
+        world.notify_changed(x, y, x + 1, y + 1)
+        assert finder.repair_moves() == 1
+        assert (x + 0.5, y + 0.5) not in command.path
+        assert command.path[-1] == (12.5, 12.5)
+    finally:
+        world.obstacle[y * N:(y + 1) * N, x * N:(x + 1) * N] = False
+        world.notify_changed(x, y, x + 1, y + 1)
+        agent.commands.clear()
+
+
+def test_tracked_move_plans_on_the_frame_budget_and_ignores_far_edits(world, agent):
+    finder = Pathfinder()
+    agent.x, agent.y = 2.5, 2.5
+    path = finder.find_path((2.5, 2.5), (12.5, 12.5), agent)
+    command = MoveCommand(path)
+    agent.commands.clear()
+    agent.assign_command(command)
+    finder.track_move(agent, command, path[-1])
+    assert finder.moves._moves[-1][3]._g is None  # no search state until an edit comes
+
+    N = world.gen.config.TILE_SUBDIVISIONS
+    searches = []
+    try:
+        for x in (29, 28):  # far from the route
+            world.obstacle[0:N, x * N:(x + 1) * N] = True
+            world.notify_changed(x, 0, x + 1, 1)
+            assert finder.repair_moves(lambda search, on_progress: searches.append((search, on_progress))) == 0
+            planner, on_progress = searches[0]
+            while not planner.done:
+                assert planner.advance(4) <= 4
+                on_progress(planner)
+        assert len(searches) == 1  # the second edit repaired the finished search in place
+        assert planner.expanded > 4 and list(command.path) == path
+    finally:
+        world.obstacle[0:N, 28 * N:30 * N] = False
+        world.notify_changed(28, 0, 30, 1)
+        agent.commands.clear()
+
+
+def test_goals_off_the_map_move_to_its_border(world, agent):
+    finder = Pathfinder()
+    for goal in ((40.2, 5.5), (-2.3, 5.5), (5.5, -0.4), (29.9, 31.0)):
+        path = finder.find_path((5.5, 5.5), goal, agent)
+        assert path is not None
+        x, y = path[-1]
+        assert 0 <= x < finder.width and 0 <= y < finder.height
+    assert finder.reachability(agent).component(-2, 5) == -1
+    assert finder.on_map((40.2, -3.0)) == (finder.width - 0.5, 0.5)
+
+
+def test_reachability_agrees_with_search(agent):
+    tensor = synthetic_tensor(agent, size=48, density=0.4)
+    tensor.refresh()
+    index = ReachabilityIndex(True, False, tensor.obstacle_map, tensor.water_map)
+    rng = np.random.default_rng(1)
+    free = np.argwhere(~tensor.obstacle_map)
+    for _ in range(40):
+        (sy, sx), (gy, gx) = free[rng.integers(len(free), size=2)]
+        found = len(astar_kernel(sy * 48 + sx, gy * 48 + gx, tensor.costs, tensor.min_penalty)) > 0
+        assert index.reachable((sx, sy), (gx, gy)) == found
+
+
+def test_reachability_relabels_only_edited_chunks(agent):
+    tensor = synthetic_tensor(agent, size=64, density=0.0)
+    index = ReachabilityIndex(True, False, tensor.obstacle_map, tensor.water_map)
+    assert index.reachable((0, 0), (63, 63))
+    labeled = index.chunks_labeled
+
+    tensor.obstacle_map[:, 40] = True
+    index.mark_dirty(40, 0, 41, 64)
+    assert not index.reachable((0, 0), (63, 63))
+    assert index.chunks_labeled - labeled == 4  # the chunk column holding the wall
+    assert index.snap((41, 5), index.component(0, 0), radius=2) == (39, 5)
+
+
+def test_find_path_snaps_or_rejects_enclosed_goals(world, agent):
+    finder = Pathfinder()
+    N = world.gen.config.TILE_SUBDIVISIONS
+    obstacle = world.obstacle.copy()
+    world.obstacle[:] = False
+    world.obstacle[11 * N:14 * N, 11 * N:14 * N] = True  # a walled-in tile at (12, 12)
+    world.obstacle[12 * N:13 * N, 12 * N:13 * N] = False
+    try:
+        world.notify_changed(0, 0, world.size_x, world.size_y)
+        path = finder.find_path((5.5, 5.5), (12.5, 12.5), agent)
+        if path is not None:  # None only if water cuts the way for this seed
+            assert max(abs(path[-1][0] - 12.5), abs(path[-1][1] - 12.5)) == 2
+
+        finder.GOAL_SNAP_RADIUS = 1
+        assert finder.find_path((5.5, 5.5), (12.5, 12.5), agent) is None
+        assert finder.start_search((5.5, 5.5), (12.5, 12.5), agent).done
+    finally:
+        world.obstacle[:] = obstacle
+        world.notify_changed(0, 0, world.size_x, world.size_y)
+
+
+def test_target_field_leads_to_the_cheapest_target(agent):
+    tensor = synthetic_tensor(agent, size=48, density=0.15)
+    tensor.obstacle_map[40, 40] = tensor.obstacle_map[5, 30] = False
+    targets = np.zeros((48, 48), dtype=bool)
+    targets[40, 40] = targets[5, 30] = True
+    field = TargetField(tensor, targets)
+
+    start = next((x, y) for y in range(48) for x in range(48) if np.isfinite(field.distance(x, y)) and x + y > 20)
+    costs = {goal: cells_cost(astar_kernel(start[1] * 48 + start[0], goal[1] * 48 + goal[0],
+                                           tensor.costs, tensor.min_penalty), tensor.costs)
+             for goal in ((40, 40), (30, 5))}
+    assert field.nearest(*start) == min(costs, key=costs.get)
+    assert field.distance(*start) == pytest.approx(min(costs.values()), rel=1e-5)
+    route = [int(y) * 48 + int(x) for x, y in field.route(*start)]
+    assert cells_cost(route, tensor.costs) == pytest.approx(field.distance(*start), rel=1e-5)
+
+
+def test_target_field_survives_only_edits_that_leave_it_unchanged(agent):
+    tensor = synthetic_tensor(agent, size=48, density=0.15)
+    targets = np.zeros((48, 48), dtype=bool)
+    targets[40, 40] = targets[5, 30] = True
+    rng = np.random.default_rng(3)
+    kept = rebuilt = 0
+    for y, x in rng.integers(0, 48, size=(40, 2)):
+        field = TargetField(tensor, targets)
+        tensor.obstacle_map[y, x] = not tensor.obstacle_map[y, x]
+        tensor.mark_dirty(x, y, x + 1, y + 1)
+        if field.follow(tensor):
+            kept += 1
+            fresh = TargetField(tensor, targets)
+            np.testing.assert_allclose(field.integration, fresh.integration, rtol=1e-9)
+        else:
+            rebuilt += 1
+        tensor.obstacle_map[y, x] = not tensor.obstacle_map[y, x]
+        tensor.mark_dirty(x, y, x + 1, y + 1)
+    assert kept and rebuilt
+
+
+def test_nearest_target_service_caches_fields(world, agent):
+    finder = Pathfinder()
+    service = NearestTargetService(finder)
+    depot = np.zeros((finder.height, finder.width), dtype=bool)
+    free = np.argwhere(~finder.obstacle_map & ~finder.water_map)
+    depot[tuple(free[len(free) // 2])] = True
+    service.register("stockpile", lambda pathfinder, arg: depot)
+
+    agent.x, agent.y = free[0][1] + 0.5, free[0][0] + 0.5
+    path = service.find_nearest(agent, "stockpile")
+    if path is not None:  # the depot may sit on another island for this seed
+        assert path[0] == (agent.x, agent.y)
+        assert (int(path[-1][0]), int(path[-1][1])) == (free[len(free) // 2][1], free[len(free) // 2][0])
+    service.find_nearest(agent, "stockpile")
+    assert service.fields_built == 1
+
+    world.notify_changed(0, 0, 1, 1)  # nothing actually changed: the field is kept
+    service.find_nearest(agent, "stockpile")
+    assert service.fields_built == 1
+    depot[:] = False
+    depot[tuple(free[0])] = True  # the stockpile moved
+    world.notify_changed(0, 0, 1, 1)
+    service.find_nearest(agent, "stockpile")
+    assert service.fields_built == 2
+    with pytest.raises(KeyError):
+        service.field("quarry", agent)
+
+    service.close()
+    finder.close()
+    world.notify_changed(0, 0, 1, 1)
+    service.find_nearest(agent, "stockpile")
+    assert service.fields_built == 2  # neither is told any more, the field stays
+
+
+def test_gather_order_sends_the_selection_to_the_nearest_target(world, agent, monkeypatch):
+    from camera import Camera
+    from manager import Manager
+    from pygame_interface.pgi_agent_control import PGIAgentControl
+
+    monkeypatch.setattr(Camera, "get_instance", lambda: None, raising=False)
+    manager = Manager(agents=[agent])
+    control = PGIAgentControl(manager)
+    try:
+        free = np.argwhere(~control.path_finder.obstacle_map & ~control.path_finder.water_map)
+        agent.x, agent.y = free[0][1] + 0.5, free[0][0] + 0.5
+        manager.selection.add(agent.id)
+        expected = control.nearest.find_nearest(agent, "water")
+        control._gather_order("water")
+        if expected is None:  # no reachable water for this seed
+            assert not agent.commands
+        else:
+            assert list(agent.commands[-1].path)[-1] == expected[-1]
+            assert control.path_finder.moves._moves[-1][1] is agent.commands[-1]
+    finally:
+        control.path_service.shutdown()
+        control.nearest.close()
+        control.path_finder.close()
+        agent.commands.clear()
+        manager.selection.clear()
+
+
+def test_change_listeners_are_kept_on_reinit_and_dropped_with_their_owner(world):
+    import gc
+
+    gc.collect()
+    listening = len(world._listeners())
+    finder = Pathfinder()
+    dropped = Pathfinder()
+    World(world.gen).adopt(world.gen)  # constructing the singleton again keeps its listeners
+    assert len(world._listeners()) == listening + 2
+    del dropped
+    gc.collect()
+    assert world._listeners()[-1] == finder.notify_cells_changed
+    assert len(world._listeners()) == listening + 1
+    finder.close()
+    assert len(world._listeners()) == listening
+
+
+def hilly_tensor(agent, size=96):
+    tensor = synthetic_tensor(agent, size=size, density=0.15)
+    ramp = np.arange(size)
+    tensor.height_map[:] = np.add.outer(np.sin(ramp / 9.0), np.cos(ramp / 7.0)) * 2
+    tensor.water_map[40:60, 10:90] = True
+    tensor.mark_dirty(0, 0, size, size)
+    tensor.refresh()
+    return tensor
+
+
+def test_alt_heuristic_keeps_paths_optimal_with_fewer_expansions(agent):
+    from pathfinder.landmarks import astar_landmarks
+
+    tensor = hilly_tensor(agent)
+    landmarks = LandmarkSet(tensor)
+    assert landmarks.update(wait=True) and len(landmarks.cells) == 8
+    forward, reverse = landmarks.fields()
+    assert forward.dtype == np.float32 and forward.shape == (8, 96 * 96)
+
+    start, goal = 0, 96 * 96 - 1
+    cells, expanded = astar_landmarks(start, goal, tensor.costs, tensor.min_penalty, forward, reverse)
+    optimal = astar_kernel(start, goal, tensor.costs, tensor.min_penalty)
+    assert cells_cost(cells, tensor.costs) == pytest.approx(cells_cost(optimal, tensor.costs), rel=1e-5)
+
+    plain = IncrementalSearch(tensor, (0, 0), (95, 95))
+    plain.advance(96 * 96)
+    guided = IncrementalSearch(tensor, (0, 0), (95, 95), landmarks=(forward, reverse))
+    guided.advance(96 * 96)
+    assert guided.found and expanded < plain.expanded and guided.expanded < plain.expanded
+
+
+def test_landmarks_are_stale_until_rebuilt(agent):
+    tensor = hilly_tensor(agent, size=48)
+    landmarks = LandmarkSet(tensor, count=4)
+    landmarks.update(wait=True)
+    tensor.obstacle_map[20:28, 20] = True
+    tensor.mark_dirty(20, 20, 21, 28)
+    tensor.refresh()
+    assert landmarks.fields() is None  # costs changed: octile fallback
+    assert landmarks.update(wait=True) and landmarks.rebuilds == 2
+
+
+def test_any_angle_path_is_visible_and_no_costlier_than_smoothed_astar():
+    from world.pathfinding import find_path, find_path_smoothed, segment_cost
+
+    def route_cost(grid, path):
+        return sum(segment_cost(grid, int(y0), int(x0), int(y1), int(x1))
+                   for (x0, y0), (x1, y1) in zip(path, path[1:]))
+
+    rng = np.random.default_rng(3)
+    grid = rng.random((48, 48)) * 0.2
+    grid[rng.random(grid.shape) < 0.15] = 1.0
+    grid[0, 0] = grid[47, 47] = 0.0
+
+    path = find_path(0, 0, 47, 47, grid)
+    smoothed = find_path_smoothed(0, 0, 47, 47, grid)
+    assert path[0] == (0.5, 0.5) and path[-1] == (47.5, 47.5)
+    assert route_cost(grid, path) < np.inf
+    assert route_cost(grid, path) <= route_cost(grid, smoothed) + 1e-9
+
+
+def test_any_angle_path_turns_only_at_walls():
+    from world.pathfinding import find_path, segment_cost
+
+    grid = np.zeros((20, 20))
+    grid[0:15, 8] = 1.0
+    path = find_path(2, 2, 17, 3, grid)
+    assert path[0] == (2.5, 2.5) and path[-1] == (17.5, 3.5)
+    costs = [segment_cost(grid, int(y0), int(x0), int(y1), int(x1)) for (x0, y0), (x1, y1) in zip(path, path[1:])]
+    assert np.isfinite(costs).all()  # every segment has line of sight
+    for x, y in path[1:-1]:
+        assert grid[int(y) - 1:int(y) + 2, int(x) - 1:int(x) + 2].max() >= 1.0  # turns next to the wall
+    # shortest way around the wall end, over its corners (8, 15) and (9, 15)
+    optimum = np.hypot(5.5, 12.5) + 1 + np.hypot(8.5, 11.5)
+    assert optimum <= sum(costs) <= 1.05 * optimum
+    grid[:, 8] = 1.0
+    assert find_path(2, 2, 17, 3, grid) == []
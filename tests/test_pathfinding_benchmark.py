@@ -0,0 +1,29 @@
+import math
+
+from profiling.pathfinding import MAPS_DIR, PLANNERS, compare, load_moving_ai, run_benchmark
+
+
+def test_moving_ai_files_parse():
+    bench = load_moving_ai(MAPS_DIR / "rooms.map")
+    assert bench.blocked.shape == (48, 48)
+    assert bench.blocked[0].all()  # border of trees and walls
+    assert len(bench.scenarios) == 12
+    for scenario in bench.scenarios:
+        assert not bench.blocked[scenario.start[1], scenario.start[0]]
+        assert not bench.blocked[scenario.goal[1], scenario.goal[0]]
+
+
+def test_benchmark_reports_every_planner():
+    bench = load_moving_ai(MAPS_DIR / "rooms.map")
+    bench.scenarios = bench.scenarios[:3]
+    report = run_benchmark([bench], repeats=1)
+
+    assert set(report["summary"]) == set(PLANNERS)
+    assert len(report["runs"]) == 3 * len(PLANNERS)
+    assert all(run["correct"] for run in report["runs"])
+    for run in report["runs"]:
+        # our corner rule is looser than MovingAI's, never longer
+        assert run["optimal"] <= run["reference"] + 1e-6
+    exact = report["summary"]["astar"]
+    assert math.isclose(exact["cost_ratio_max"], 1.0, rel_tol=1e-6) and exact["expanded_mean"] > 0
+    assert set(compare(report, report).values()) == {1.0}
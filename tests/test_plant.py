@@ -0,0 +1,12 @@
+import catalog
+from catalog.catalog import JSON_DIR
+from plant import parse_plants
+
+
+def test_wild_plants_pick_up_their_vegetation_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog.CATALOG, "cache_file", tmp_path / "catalog.pkl")
+    monkeypatch.setattr(catalog.CATALOG, "_disk", None)
+    plants = parse_plants(JSON_DIR / "plants_data.json", JSON_DIR / "vegetation.csv", catalog.get("terrains"))
+    assert (plants["grass"].abundance, plants["grass"].color) == (25, (124, 252, 0))     # "Grasses"
+    assert (plants["moss"].abundance, plants["moss"].color) == (2, (0, 100, 0))          # "Mosses"
+    assert (plants["reed"].abundance, plants["reed"].color) != (1.0, (70, 150, 60))      # "Reeds"
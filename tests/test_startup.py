@@ -0,0 +1,24 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from profiling.startup import STARTUP_BUDGET_S
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_cold_start(catalog_file: Path) -> dict:
+    env = dict(os.environ, CATALOG_FILE=str(catalog_file))  # not the project's pkl_files/catalog.pkl
+    out = subprocess.run([sys.executable, "-m", "profiling.startup", "--json"],
+                         cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=300, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_cold_start_within_budget(tmp_path):
+    result = run_cold_start(tmp_path / "catalog.pkl")
+    phases = dict(result["phases"], total=result["total"])
+    over = {name: t for name, t in phases.items() if t > STARTUP_BUDGET_S.get(name, float("inf"))}
+    assert not over, f"cold start over budget: {over} (budget {STARTUP_BUDGET_S})"
+    assert result["lazy_loaded"] == [], f"optional modules imported at start-up: {result['lazy_loaded']}"
@@ -0,0 +1,83 @@
+import pytest
+
+import world.world_generator as world_generator
+from world import WorldGen, WorldGenConfig, WorldGenTask
+
+
+@pytest.fixture(autouse=True)
+def no_debug_map(monkeypatch):
+    monkeypatch.setattr(world_generator, "visualize_topological_map", lambda *args, **kwargs: None)
+
+
+def small_config():
+    return WorldGenConfig(WIDTH=20, HEIGHT=20, TILE_SUBDIVISIONS=2)
+
+
+def test_generate_steps_reports_progress():
+    gen = WorldGen(small_config())
+    steps = list(gen.generate_steps())
+    progress = [p for _, p in steps]
+    assert progress == sorted(progress)
+    assert progress[-1] == 1.0
+    assert all(tile is not None for tile in gen.tiles.flat)
+
+
+def test_task_generates_into_fresh_worldgen():
+    task = WorldGenTask(small_config()).start()
+    assert task.wait(timeout=120)
+    assert task.succeeded
+    assert task.progress == 1.0
+    assert task.gen.tiles.shape == (20, 20)
+
+
+def test_prefetcher_hands_over_spare_world(tmp_path, monkeypatch):
+    import time
+    from terrain import TERRAIN_DATA
+    from world import WorldPrefetcher
+
+    monkeypatch.chdir(tmp_path)  # the worker process writes its debug map to cwd
+    prefetcher = WorldPrefetcher(small_config()).prefetch()
+    try:
+        deadline = time.time() + 300
+        while not prefetcher.ready and time.time() < deadline:
+            time.sleep(0.1)
+        assert prefetcher.ready
+        gen = prefetcher.take()
+        assert gen.tiles.shape == (20, 20)
+        tile = gen.tiles[0, 0]
+        assert tile.terrain is TERRAIN_DATA[tile.terrain.name]
+    finally:
+        prefetcher.shutdown()
+
+
+def test_ground_cover_follows_terrain_vegetation():
+    import numpy as np
+    from plant import PLANT_NAMES
+    from world.ground_cover import harvest
+
+    gen = WorldGen(small_config())
+    gen.generate()
+    assert gen.ground_cover.dtype == np.uint8
+    assert gen.ground_cover.shape == gen.topology.shape
+
+    N = gen.config.TILE_SUBDIVISIONS
+    cy, cx = np.argwhere(gen.ground_cover > 0)[0]
+    terrain = gen.get_tile(cx // N, cy // N).terrain
+    assert PLANT_NAMES[gen.ground_cover[cy, cx]] in terrain.vegetation.plants
+
+    assert harvest(gen.ground_cover, cx, cy) in terrain.vegetation.plants
+    assert gen.ground_cover[cy, cx] == 0
+
+
+def test_tile_colors_blend_plants_over_the_terrain():
+    import numpy as np
+    from plant import PLANT_COLORS
+    from world.ground_cover import tile_colors
+
+    base = np.full((2, 3, 3), 100, dtype=np.uint8)
+    layer = np.zeros((4, 6), dtype=np.uint8)
+    assert (tile_colors(layer, base) == base).all()  # bare ground: the terrain color
+    layer[0:2, 0:2] = 1
+    colors = tile_colors(layer, base)
+    np.testing.assert_array_equal(colors[0, 0], PLANT_COLORS[1])
+    assert (colors[1:, :] == 100).all() and (colors[:, 1:] == 100).all()
@@ -1 +1 @@
-from .tree import Tree, TREE_DATA, load_trees
\ No newline at end of file
+from .tree import Tree, TreeModel, TREE_DATA, load_trees, parse_trees_file
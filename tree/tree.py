@@ -1,7 +1,6 @@
 from world_object import WorldObject
 
 import json
-import pickle as pk
 from pathlib import Path
 from pydantic import BaseModel, ConfigDict
 
@@ -26,6 +25,13 @@ class Tree(WorldObject):
 
     def __init__(self, model: TreeModel):
         super().__init__(0,0)
+        self.apply_model(model)
+
+        self.age = self.growth_rate
+        self.hp = (1+0.5*int(self.wood_type == "hardwood")) * self.age
+
+    def apply_model(self, model: TreeModel):
+        """Copy the species attributes of 'model', age and hp are left untouched."""
         self.name = model.name
         self.growth_rate = model.growth_rate
         self.water_consumption = model.water_consumption
@@ -37,58 +43,42 @@ class Tree(WorldObject):
         self.unlocked = model.unlocked
         self.texture = model.texture
 
-        self.age = self.growth_rate
-        self.hp = (1+0.5*int(self.wood_type == "hardwood")) * self.age
-
     def __repr__(self):
         return f"<Tree {self.name}, {self.wood_type}, harvest in {self.growth_rate} years>"
 
 
 TREE_DATA:dict[str,TreeModel] = {}
-def load_trees(filepath: str | None = None) -> dict[str, TreeModel]:
-    """
-    Load trees from Pickle binary if it exists, otherwise from JSON.
-    Populates TREE_DATA with TreeModel instances.
-    If 'filepath' is provided, JSON is always loaded (ignoring binary).
-    Returns TREE_DATA.
-    """
-    global TREE_DATA
-
-    project_root = Path(__file__).resolve().parent.parent
-    trees_json_file = project_root / "json_files" / "trees.json"
-    trees_pkl_file = project_root / "pkl_files" / "trees.pkl"
-
-
-    # Load from binary if exists and no JSON filepath is given
-    if filepath is None and trees_pkl_file.exists():
-        try:
-            with open(trees_pkl_file, "rb") as f:
-                TREE_DATA.clear()           # remove old entries
-                TREE_DATA.update(pk.load(f))  # fill in from pickle
-            logger.info(f"Loaded {len(TREE_DATA)} trees from binary.")
-            return TREE_DATA
-        except Exception as e:
-            logger.warning(f"Failed to load binary: {e}")
-
-    # Load from JSON
-    filepath = filepath or trees_json_file
+
+def parse_trees_file(filepath: str | Path) -> dict[str, TreeModel]:
+    """Parse and validate a trees JSON file, returns name → TreeModel."""
     with open(filepath, "r") as f:
         raw_data = json.load(f)
 
+    trees = {}
     for name, data in raw_data.items():
         data["name"] = name
         if "yield" in data:
             data["log_yield"] = data.pop("yield")
 
-        model = TreeModel(**data)
-        TREE_DATA[name] = model
+        trees[name] = TreeModel(**data)
         logger.info(f"Added TreeModel for {name}")
+    return trees
 
-    # Save binary for next time
-    trees_pkl_file.parent.mkdir(exist_ok=True)
-    with open(trees_pkl_file, "wb") as f:
-        pk.dump(TREE_DATA, f, protocol=pk.HIGHEST_PROTOCOL)
-
-    logger.info(f"Loaded {len(TREE_DATA)} trees from JSON and saved binary.")
+def load_trees(filepath: str | None = None) -> dict[str, TreeModel]:
+    """
+    Populates TREE_DATA with TreeModel instances.
+    The default trees.json goes through the data catalog, which caches the validated
+    models in binary and re-parses the JSON only when its hash changes.
+    If 'filepath' is provided, that JSON is always parsed.
+    Returns TREE_DATA.
+    """
+    if filepath is None:
+        import catalog
+        trees = catalog.get("trees")
+    else:
+        trees = parse_trees_file(filepath)
+
+    TREE_DATA.clear()
+    TREE_DATA.update(trees)
+    logger.info(f"Loaded {len(TREE_DATA)} trees.")
     return TREE_DATA
-
@@ -1,10 +1,20 @@
 
-from .pathfinding import find_path
-
 from .topology import generate_topological_map
 from .topology import visualize_topological_map
 
 from .world import World
 from .world_generator import WorldGen, WorldGenConfig
+from .world_gen_task import WorldGenTask
+from .world_prefetch import WorldPrefetcher
+from .memory_planner import plan_world_memory, WorldGenMemoryError
 
 from .tile import Tile
+
+
+def __getattr__(name):
+    # loaded on first use: world.pathfinding shares the heap of pathfinder.astar_kernel,
+    # and the pathfinder package imports World
+    if name == "find_path":
+        from .pathfinding import find_path
+        return find_path
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
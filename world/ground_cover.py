@@ -0,0 +1,106 @@
+import numpy as np
+
+from plant import PLANT_DATA, PLANT_NAMES, PLANT_COLORS
+
+# Share of cells that get a plant at full moisture
+BASE_DENSITY = 0.6
+# Distances in subdivision cells over which moisture / shore influence decays
+MOISTURE_RANGE = 20.0
+SHORE_RANGE = 3.0
+
+
+def moisture_map(water: np.ndarray) -> np.ndarray:
+    """
+    Moisture in [0, 1] per cell from a boolean water mask.
+    Land cells get wetter close to water, water cells are 'habitable' close to the shore.
+    """
+    from scipy.ndimage import distance_transform_edt
+
+    if water.all() or not water.any():
+        return np.full(water.shape, 0.5, dtype=np.float32)
+    dist_to_water = distance_transform_edt(~water)
+    dist_to_land = distance_transform_edt(water)
+    moisture = np.where(
+        water,
+        np.exp(-dist_to_land / SHORE_RANGE),
+        np.exp(-dist_to_water / MOISTURE_RANGE),
+    )
+    return moisture.astype(np.float32)
+
+
+def fill_ground_cover(out: np.ndarray, terrain_ids: np.ndarray, water: np.ndarray,
+                      terrain_plants: list[tuple[str, ...]], density: float = BASE_DENSITY) -> np.ndarray:
+    """
+    Fills the uint8 ground-cover layer in place, vectorized per terrain.
+
+    Parameters:
+        out (np.ndarray[uint8]): layer at subdivision resolution.
+        terrain_ids (np.ndarray[int]): terrain index per cell, same shape as out.
+        water (np.ndarray[bool]): water mask per cell.
+        terrain_plants (list[tuple[str]]): plant names allowed for each terrain index.
+        density (float): plant probability at full moisture.
+    """
+    out[:, :] = 0
+    chance = density * (0.25 + 0.75 * moisture_map(water))
+    seeded = np.random.random(out.shape) < chance
+
+    for terrain_id, plants in enumerate(terrain_plants):
+        plants = [p for p in plants if p in PLANT_DATA]
+        if not plants:
+            continue
+        cells = seeded & (terrain_ids == terrain_id)
+        n = int(cells.sum())
+        if n == 0:
+            continue
+        codes = np.array([PLANT_DATA[p].code for p in plants], dtype=np.uint8)
+        weights = np.array([PLANT_DATA[p].abundance for p in plants], dtype=np.float64)
+        out[cells] = np.random.choice(codes, size=n, p=weights / weights.sum())
+    return out
+
+
+def ground_cover_colors(layer: np.ndarray) -> np.ndarray:
+    """RGB image (H, W, 3) of a ground-cover layer via the plant color lookup table."""
+    return PLANT_COLORS[layer]
+
+
+def tile_colors(layer: np.ndarray, base: np.ndarray) -> np.ndarray:
+    """
+    One RGB color per tile: the plant colors of its cells averaged with 'base' for the bare ones.
+
+    Parameters:
+        layer (np.ndarray[uint8]): ground-cover layer at subdivision resolution.
+        base (np.ndarray[uint8]): (H, W, 3) tile colors, usually the terrain colors.
+    """
+    h, w = base.shape[:2]
+    n = layer.shape[0] // h
+    bare = np.repeat(np.repeat(base, n, axis=0), n, axis=1)
+    cells = np.where((layer == 0)[:, :, None], bare, ground_cover_colors(layer)).astype(np.float32)
+    return cells.reshape(h, n, w, n, 3).mean(axis=(1, 3)).astype(np.uint8)
+
+
+def remap_codes(layer: np.ndarray, old_names: list[str], new_names: list[str]) -> np.ndarray:
+    """
+    Rewrite a layer in place after the plant codes changed (plant data reloaded).
+    Plants are matched by name, plants that no longer exist become bare ground.
+    """
+    new_codes = {name: code for code, name in enumerate(new_names) if name}
+    lut = np.zeros(256, dtype=np.uint8)
+    for code, name in enumerate(old_names):
+        if name:
+            lut[code] = new_codes.get(name, 0)
+    layer[...] = lut[layer]
+    return layer
+
+
+def plant_at(layer: np.ndarray, cx: int, cy: int) -> str | None:
+    """Name of the plant at cell (cx, cy), None for bare ground."""
+    code = int(layer[cy, cx])
+    return PLANT_NAMES[code] if code else None
+
+
+def harvest(layer: np.ndarray, cx: int, cy: int) -> str | None:
+    """Remove the plant at cell (cx, cy) and return its name (None if bare)."""
+    name = plant_at(layer, cx, cy)
+    if name is not None:
+        layer[cy, cx] = 0
+    return name
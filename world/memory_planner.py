@@ -0,0 +1,210 @@
+import tempfile
+import numpy as np
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Approximate resident size of one Python object stored in an object layer
+# (object header + __dict__ + sprite bookkeeping, measured on CPython 3.11).
+TILE_OBJECT_BYTES = 650
+ELEMENT_OBJECT_BYTES = 1100
+POINTER_BYTES = np.dtype(object).itemsize
+
+# Upper bound of subdivision cells holding an element after generation
+# (forest patches cover at most ~25% of the grassland).
+EXPECTED_ELEMENT_FILL = 0.25
+
+DEFAULT_MEMORY_BUDGET_MB = 1024
+
+# Numeric layers that may be moved to disk, largest first.
+MEMMAP_CANDIDATES = ("topology", "ground_cover", "obstacle")
+
+
+class WorldGenMemoryError(MemoryError):
+    """Raised when a WorldGenConfig cannot fit in the memory budget."""
+
+    def __init__(self, plan: "MemoryPlan"):
+        super().__init__(plan.report())
+        self.plan = plan
+
+
+@dataclass(slots=True)
+class LayerPlan:
+    name: str
+    shape: tuple[int, int]
+    dtype: np.dtype
+    nbytes: int                 # bytes held in RAM (0 once memory-mapped)
+    storage: str = "dense"      # "dense" | "memmap"
+    transient: bool = False     # only alive during generate()
+    note: str = ""
+
+
+@dataclass(slots=True)
+class MemoryPlan:
+    budget_bytes: int
+    layers: dict[str, LayerPlan] = field(default_factory=dict)
+    memmap_dir: Path | None = None
+    spill_dir: tempfile.TemporaryDirectory | None = None  # owns memmap_dir, removed with the plan
+    recommendations: list[str] = field(default_factory=list)
+
+    @property
+    def resident_bytes(self) -> int:
+        """Bytes kept in RAM once generation finished."""
+        return sum(layer.nbytes for layer in self.layers.values() if not layer.transient)
+
+    @property
+    def peak_bytes(self) -> int:
+        """Bytes in RAM while generate() runs, scratch buffers included."""
+        return sum(layer.nbytes for layer in self.layers.values())
+
+    @property
+    def fits(self) -> bool:
+        return self.peak_bytes <= self.budget_bytes
+
+    def __getitem__(self, name: str) -> LayerPlan:
+        return self.layers[name]
+
+    def report(self) -> str:
+        lines = [f"World memory plan (budget {_mb(self.budget_bytes)})"]
+        for layer in self.layers.values():
+            flag = " (transient)" if layer.transient else ""
+            note = f"  # {layer.note}" if layer.note else ""
+            lines.append(
+                f"  {layer.name:<16} {str(layer.shape):>14} {str(layer.dtype):>8} "
+                f"{layer.storage:>7} {_mb(layer.nbytes):>12}{flag}{note}"
+            )
+        lines.append(f"  {'resident':<16} {_mb(self.resident_bytes):>45}")
+        lines.append(f"  {'peak':<16} {_mb(self.peak_bytes):>45}")
+        for rec in self.recommendations:
+            lines.append(f"  ! {rec}")
+        return "\n".join(lines)
+
+    def check(self):
+        """Fail fast, before anything is allocated."""
+        if not self.fits:
+            raise WorldGenMemoryError(self)
+
+    def cleanup(self):
+        """Remove the memory-mapped files, call it once the layers of this plan are dropped."""
+        if self.spill_dir is not None:
+            self.spill_dir.cleanup()
+
+    def make_spill_dir(self, root: str | Path | None = None):
+        """New directory for the memory-mapped layers, under 'root' or the temp dir, deleted with the plan."""
+        if root:
+            Path(root).mkdir(parents=True, exist_ok=True)
+        self.spill_dir = tempfile.TemporaryDirectory(prefix="worldgen_", dir=root or None, ignore_cleanup_errors=True)
+        self.memmap_dir = Path(self.spill_dir.name)
+
+    def __getstate__(self) -> dict:
+        # the spill directory is removed with the plan that made it: an unpickled plan makes its own
+        state = {f.name: getattr(self, f.name) for f in fields(self)}
+        state["spill_dir"] = state["memmap_dir"] = None
+        state["spill_root"] = self.memmap_dir.parent if self.memmap_dir is not None else None
+        return state
+
+    def __setstate__(self, state: dict):
+        spill_root = state.pop("spill_root")
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        if spill_root is not None:
+            self.make_spill_dir(spill_root)
+
+    def allocate(self, name: str) -> np.ndarray:
+        """Allocate a zero/None filled array for the given layer."""
+        layer = self.layers[name]
+        if layer.storage == "memmap":
+            path = self.memmap_dir / f"{name}.dat"
+            logger.info(f" ... memory-mapping {name} to {path}")
+            return np.memmap(path, dtype=layer.dtype, mode="w+", shape=layer.shape)
+        if layer.dtype == np.dtype(object):
+            return np.empty(layer.shape, dtype=object)
+        return np.zeros(layer.shape, dtype=layer.dtype)
+
+
+def _mb(n_bytes: int) -> str:
+    return f"{n_bytes / 1024 ** 2:,.1f} MB"
+
+
+def plan_world_memory(config, budget_mb: float | None = None, auto_storage: bool = True) -> MemoryPlan:
+    """
+    Estimates the footprint of every world layer for a WorldGenConfig and picks
+    dtype and storage for each of them. Nothing is allocated here.
+
+    Parameters:
+        config (WorldGenConfig): configuration to plan for.
+        budget_mb (float): memory budget, defaults to config.MEMORY_BUDGET_MB.
+        auto_storage (bool): move numeric layers to memory-mapped files when the
+            dense plan does not fit.
+
+    Returns:
+        MemoryPlan: call .check() to raise WorldGenMemoryError if it does not fit.
+    """
+    if budget_mb is None:
+        budget_mb = getattr(config, "MEMORY_BUDGET_MB", None) or DEFAULT_MEMORY_BUDGET_MB
+    budget = int(budget_mb * 1024 ** 2)
+
+    tiles_shape = (config.HEIGHT, config.WIDTH)
+    topo_shape = (config.HEIGHT * config.TILE_SUBDIVISIONS, config.WIDTH * config.TILE_SUBDIVISIONS)
+    n_tiles = tiles_shape[0] * tiles_shape[1]
+    n_cells = topo_shape[0] * topo_shape[1]
+
+    plan = MemoryPlan(budget_bytes=budget)
+
+    def numeric(name, shape, dtype, transient=False, note=""):
+        dtype = np.dtype(dtype)
+        plan.layers[name] = LayerPlan(name, shape, dtype, shape[0] * shape[1] * dtype.itemsize,
+                                      transient=transient, note=note)
+
+    # --- object layers ---
+    plan.layers["tiles"] = LayerPlan(
+        "tiles", tiles_shape, np.dtype(object), n_tiles * (POINTER_BYTES + TILE_OBJECT_BYTES),
+        note="Tile objects")
+    plan.layers["elements"] = LayerPlan(
+        "elements", topo_shape, np.dtype(object),
+        int(n_cells * (POINTER_BYTES + EXPECTED_ELEMENT_FILL * ELEMENT_OBJECT_BYTES)),
+        note=f"~{EXPECTED_ELEMENT_FILL:.0%} cells hold a WorldObject")
+
+    # --- numeric layers ---
+    topo_dtype = getattr(config, "TOPOLOGY_DTYPE", None)
+    if topo_dtype is None:
+        # float32 unless that alone eats more than a quarter of the budget
+        topo_dtype = np.float32 if n_cells * 4 <= budget // 4 else np.float16
+    numeric("topology", topo_shape, topo_dtype)
+    numeric("obstacle", topo_shape, np.bool_)
+    numeric("ground_cover", topo_shape, np.uint8, note="plant codes")
+
+    # --- derived layers ---
+    numeric("tile_heights_map", tiles_shape, np.float64)
+    numeric("water_map", tiles_shape, np.int8)
+    numeric("water_labels", tiles_shape, np.int32, transient=True, note="scipy label")
+    numeric("topology_scratch", topo_shape, np.float32, transient=True)
+    plan.layers["topology_scratch"].nbytes *= 3  # meshgrid X, Y and the float32 result
+    numeric("ground_cover_scratch", topo_shape, np.float64, transient=True, note="moisture distances")
+    plan.layers["ground_cover_scratch"].nbytes *= 3
+
+    if not plan.fits and auto_storage:
+        # one directory per plan, under MEMMAP_DIR or the temp dir, deleted when the plan is collected
+        plan.make_spill_dir(getattr(config, "MEMMAP_DIR", None))
+        for name in MEMMAP_CANDIDATES:
+            layer = plan.layers[name]
+            layer.storage = "memmap"
+            layer.nbytes = 0
+            plan.recommendations.append(f"{name} moved to memory-mapped storage in {plan.memmap_dir}")
+            if plan.fits:
+                break
+
+    if not plan.fits:
+        objects = plan.layers["tiles"].nbytes + plan.layers["elements"].nbytes
+        if objects > budget:
+            plan.recommendations.append(
+                "object layers alone exceed the budget: lower WIDTH/HEIGHT/TILE_SUBDIVISIONS "
+                "or store elements in chunks")
+        else:
+            plan.recommendations.append(
+                "raise MEMORY_BUDGET_MB or lower TILE_SUBDIVISIONS")
+
+    logger.debug("\n" + plan.report())
+    return plan
@@ -3,11 +3,16 @@ import heapq
 import math
 from numba import njit
 
-@njit
+from pathfinder.astar_kernel import HEAP_START, heap_grow, heap_pop, heap_push
+
+BLOCKED_HEIGHT = 1.0   # topology cells at or above this height cannot be crossed
+SLOPE_PENALTY = 10.0   # cost per unit of height climbed along a segment
+
+@njit(cache=True)
 def heuristic(a, b):
     return np.hypot(a[0] - b[0], a[1] - b[1])
 
-@njit
+@njit(cache=True)
 def neighbors(y, x, h, w):
     # Note: y=row, x=col, h=rows, w=cols
     for dy in [-1, 0, 1]:
@@ -18,47 +23,170 @@ def neighbors(y, x, h, w):
             if 0 <= ny < h and 0 <= nx < w:
                 yield ny, nx
 
-@njit
-def bresenham_line(y0, x0, y1, x1):
-    points = []
+@njit(cache=True)
+def segment_cost(grid, y0, x0, y1, x1):
+    """
+    Cost of the straight segment between two cell centers: length plus SLOPE_PENALTY per unit of
+    height climbed over the crossed cells (downhill is free). inf if the segment crosses a blocked
+    cell or squeezes diagonally between two blocked cells.
+    Walks the cells with Bresenham's algorithm without allocating.
+    """
     dx = abs(x1 - x0)
     dy = abs(y1 - y0)
     sx = 1 if x0 < x1 else -1
     sy = 1 if y0 < y1 else -1
     err = dx - dy
 
-    while True:
-        points.append((y0, x0))
-        if x0 == x1 and y0 == y1:
-            break
+    x, y = x0, y0
+    prev = grid[y, x]
+    climb = 0.0
+    while x != x1 or y != y1:
         e2 = 2 * err
+        nx, ny = x, y
         if e2 > -dy:
             err -= dy
-            x0 += sx
+            nx += sx
         if e2 < dx:
             err += dx
-            y0 += sy
-    return points
+            ny += sy
+        if nx != x and ny != y and grid[y, nx] >= BLOCKED_HEIGHT and grid[ny, x] >= BLOCKED_HEIGHT:
+            return np.inf
+        x, y = nx, ny
+        height = grid[y, x]
+        if height >= BLOCKED_HEIGHT:
+            return np.inf
+        if height > prev:
+            climb += height - prev
+        prev = height
+    return math.hypot(x1 - x0, y1 - y0) + SLOPE_PENALTY * climb
 
-@njit
+@njit(cache=True)
 def line_of_sight(grid, p1, p2):
     y0, x0 = p1
     y1, x1 = p2
-    line = bresenham_line(y0, x0, y1, x1)
-    for (y, x) in line:
-        if grid[y, x] >= 1:
-            return False
-    return True
+    return segment_cost(grid, y0, x0, y1, x1) < np.inf
 
-@njit
+@njit(cache=True)
 def compute_cost(grid, current, neighbor):
     y0, x0 = current
     y1, x1 = neighbor
-    dz = grid[y1, x1] - grid[y0, x0]
-    distance = np.hypot(x1 - x0, y1 - y0)
-    slope_factor = 1 + 10*dz
-    return distance * slope_factor
+    return segment_cost(grid, y0, x0, y1, x1)
+
+# ------------------- Lazy Theta* -------------------
+@njit(cache=True)
+def lazy_theta_star(grid, sy, sx, gy, gx):
+    """
+    Any-angle search (Lazy Theta*) on a topology grid.
+
+    A reached cell optimistically inherits the parent of the cell expanding it; line of sight and
+    the real slope cost of that segment are only checked when the cell is expanded, falling back
+    to the best expanded neighbor when the segment is blocked.
+
+    Returns:
+        int64 (n, 2) array of (row, col) waypoints from start to goal, empty if unreachable.
+    """
+    h, w = grid.shape
+    n = h * w
+    start, goal = sy * w + sx, gy * w + gx
+    if grid[sy, sx] >= BLOCKED_HEIGHT or grid[gy, gx] >= BLOCKED_HEIGHT:
+        return np.empty((0, 2), dtype=np.int64)
+
+    g = np.full(n, np.inf)
+    parent = np.full(n, -1, dtype=np.int64)
+    closed = np.zeros(n, dtype=np.bool_)
+    keys = np.empty(HEAP_START, dtype=np.float64)  # grown on demand
+    items = np.empty(HEAP_START, dtype=np.int64)
+
+    g[start] = 0.0
+    parent[start] = start
+    size = heap_push(keys, items, 0, math.hypot(gx - sx, gy - sy), start)
+
+    while size > 0:
+        s, size = heap_pop(keys, items, size)
+        if closed[s]:
+            continue
+        y, x = s // w, s % w
+
+        # set vertex: verify the lazily assumed segment parent -> s
+        p = parent[s]
+        if p != s:
+            best = g[p] + segment_cost(grid, p // w, p % w, y, x)
+            best_parent = p
+            for dy in range(-1, 2):
+                for dx in range(-1, 2):
+                    ny, nx = y + dy, x + dx
+                    if (dx == 0 and dy == 0) or ny < 0 or nx < 0 or ny >= h or nx >= w:
+                        continue
+                    q = ny * w + nx
+                    if closed[q]:
+                        cost = g[q] + segment_cost(grid, ny, nx, y, x)
+                        if cost < best:
+                            best, best_parent = cost, q
+            g[s] = best
+            parent[s] = best_parent
+        closed[s] = True
 
+        if s == goal:
+            length = 1
+            c = s
+            while parent[c] != c:
+                c = parent[c]
+                length += 1
+            path = np.empty((length, 2), dtype=np.int64)
+            c = s
+            for i in range(length - 1, -1, -1):
+                path[i, 0], path[i, 1] = c // w, c % w
+                c = parent[c]
+            return path
+
+        p = parent[s]
+        py, px = p // w, p % w
+        for dy in range(-1, 2):
+            for dx in range(-1, 2):
+                ny, nx = y + dy, x + dx
+                if (dx == 0 and dy == 0) or ny < 0 or nx < 0 or ny >= h or nx >= w:
+                    continue
+                q = ny * w + nx
+                if closed[q] or grid[ny, nx] >= BLOCKED_HEIGHT:
+                    continue
+                if dx != 0 and dy != 0 and grid[y, nx] >= BLOCKED_HEIGHT and grid[ny, x] >= BLOCKED_HEIGHT:
+                    continue
+                # optimistic: straight from the parent of s, climb counted end to end only
+                estimate = g[p] + math.hypot(nx - px, ny - py) + SLOPE_PENALTY * max(0.0, grid[ny, nx] - grid[py, px])
+                if estimate < g[q]:
+                    g[q] = estimate
+                    parent[q] = p
+                    if size == keys.shape[0]:
+                        keys, items = heap_grow(keys, items)
+                    size = heap_push(keys, items, size, estimate + math.hypot(gx - nx, gy - ny), q)
+
+    return np.empty((0, 2), dtype=np.int64)
+
+@njit(cache=True)
+def prune_waypoints(grid, path):
+    """
+    Drops the waypoints Lazy Theta* keeps when a blocked lazy segment falls back to a neighbor:
+    from each kept waypoint, jump to the farthest one whose direct segment is not more expensive
+    than following the waypoints in between.
+    """
+    n = path.shape[0]
+    if n <= 2:
+        return path
+    keep = np.zeros(n, dtype=np.bool_)
+    keep[0] = keep[n - 1] = True
+    i = 0
+    while i < n - 1:
+        best = i + 1
+        along = 0.0
+        for j in range(i + 1, n):
+            along += segment_cost(grid, path[j - 1, 0], path[j - 1, 1], path[j, 0], path[j, 1])
+            if segment_cost(grid, path[i, 0], path[i, 1], path[j, 0], path[j, 1]) <= along + 1e-9:
+                best = j
+        keep[best] = True
+        i = best
+    return path[keep]
+
+# ------------------- 8-connected A* + smoothing -------------------
 def reconstruct_path(came_from, current):
     path = [current]
     while current in came_from:
@@ -67,19 +195,21 @@ def reconstruct_path(came_from, current):
     return path[::-1]
 
 def smooth_path(grid, path):
+    """Keep the farthest waypoint still in line of sight of the previous one."""
     if not path:
         return []
     waypoints = [path[0]]
     i = 0
     while i < len(path) - 1:
         j = len(path) - 1
-        while j > i + 1 and line_of_sight(grid, path[i], path[j]):
+        while j > i + 1 and not line_of_sight(grid, path[i], path[j]):
             j -= 1
         waypoints.append(path[j])
         i = j
     return [(x + 0.5, y + 0.5) for y, x in waypoints]
 
-def find_path(x0, y0, x1, y1, topo_grid):
+def find_path_smoothed(x0, y0, x1, y1, topo_grid):
+    """8-connected A* followed by smooth_path, kept as the reference for find_path."""
     h, w = topo_grid.shape  # rows, cols
     start = (int(y0), int(x0))
     goal  = (int(y1), int(x1))
@@ -98,7 +228,7 @@ def find_path(x0, y0, x1, y1, topo_grid):
             return smooth_path(topo_grid, tile_path)
 
         for ny, nx in neighbors(current[0], current[1], h, w):
-            if topo_grid[ny, nx] >= 1:
+            if topo_grid[ny, nx] >= BLOCKED_HEIGHT:
                 continue
             tentative_g = g_score[current] + compute_cost(topo_grid, current, (ny, nx))
             if tentative_g < g_score[ny, nx]:
@@ -107,3 +237,12 @@ def find_path(x0, y0, x1, y1, topo_grid):
                 f_score[ny, nx] = tentative_g + heuristic((ny, nx), goal)
                 heapq.heappush(open_set, (f_score[ny, nx], (ny, nx)))
     return []
+
+def find_path(x0, y0, x1, y1, topo_grid):
+    """
+    Any-angle path on the topology grid (Lazy Theta*).
+    Returns the waypoints as cell centers [(x, y), ...], empty if unreachable.
+    """
+    grid = np.ascontiguousarray(topo_grid, dtype=np.float64)
+    waypoints = prune_waypoints(grid, lazy_theta_star(grid, int(y0), int(x0), int(y1), int(x1)))
+    return [(x + 0.5, y + 0.5) for y, x in waypoints.tolist()]
@@ -1,7 +1,7 @@
 import numpy as np
 from numba import njit, prange
 
-@njit(parallel=True)
+@njit(parallel=True, cache=True)
 def compute_gaussians(X, Y, centers, sigmas, amplitudes):
     Z = np.zeros_like(X)
     n_peaks = centers.shape[0]
@@ -33,17 +33,22 @@ def visualize_topological_map(topology, cmap="terrain", debug_name=None, show=Fa
     """
     Efficiently visualize a 2D numpy array Z as a terrain map.
     """
-    import matplotlib.pyplot as plt
-    fig, ax = plt.subplots(figsize=(6,6), dpi=100)
+    if show:
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=(6,6), dpi=100)
+    else:
+        # Plain Agg figure: no GUI backend, safe from a background generation thread
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=(6,6), dpi=100)
+        ax = fig.subplots()
     ax.imshow(topology, cmap=cmap, interpolation="nearest")
     ax.axis("off")  # remove axes
 
     if debug_name is not None:
-        plt.savefig(f"{debug_name}.png", bbox_inches="tight", pad_inches=0)
+        fig.savefig(f"{debug_name}.png", bbox_inches="tight", pad_inches=0)
     elif not show:
-        plt.savefig(f"topological_map.png", bbox_inches="tight", pad_inches=0)
+        fig.savefig(f"topological_map.png", bbox_inches="tight", pad_inches=0)
 
     if show:
         plt.show()
-
-    plt.close(fig)
+        plt.close(fig)
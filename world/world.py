@@ -1,9 +1,12 @@
 
 import numpy as np
+import weakref
 
+from typing import Callable
 from typing_extensions import Self
 from .world_generator import WorldGen
 from .tile import Tile
+from . import ground_cover
 
 import logging
 logger = logging.getLogger(__name__)
@@ -12,6 +15,19 @@ class World:
     """
     Represents the game world
     """
+    _self: Self | None = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._self is None:
+            cls._self = super().__new__(cls)
+        return cls._self
+
+    @classmethod
+    def get_instance(cls):
+        if cls._self is None:
+            raise RuntimeError("World not created yet")
+        return cls._self
+
     def __init__(self, gen: WorldGen):
         self.gen:WorldGen = gen
 
@@ -23,6 +39,12 @@ class World:
         self.elements: np.ndarray | None = None
         self.topology: np.ndarray[np.float16] | None = None
         self.obstacle: np.ndarray[np.bool_] | None = None
+        self.ground_cover: np.ndarray[np.uint8] | None = None
+
+        # callbacks(x0, y0, x1, y1) told when tiles in [x0, x1) x [y0, y1) change, held weakly;
+        # World is a singleton, constructing it again keeps the listeners of the live caches
+        if not hasattr(self, "_change_listeners"):
+            self._change_listeners: list[Callable[[], Callable[[int, int, int, int], None] | None]] = []
 
     @property
     def width(self)->int:
@@ -40,6 +62,15 @@ class World:
     def topo_height(self)->int:
         return self.gen.config.HEIGHT * self.gen.config.TILE_SUBDIVISIONS
 
+    # aliases kept for the painters, minimap and pathfinder
+    @property
+    def size_x(self)->int:
+        return self.width
+
+    @property
+    def size_y(self)->int:
+        return self.height
+
     @property
     def scale(self)->float:
         return self.gen.config.SCALE
@@ -51,9 +82,60 @@ class World:
     def set_tile(self, x: int, y: int, tile: Tile):
         """Sets a tile at the given coordinates."""
         self.tiles[y,x] = tile
+        self.notify_changed(x, y, x + 1, y + 1)
+
+    def subscribe_changes(self, callback: Callable[[int, int, int, int], None]):
+        """
+        Register callback(x0, y0, x1, y1), called when terrain, topology or obstacles change in that tile box.
+        Bound methods are held weakly: their owner stops listening once collected, close() it to stop sooner.
+        """
+        if callback in self._listeners():
+            return
+        if hasattr(callback, "__self__"):
+            self._change_listeners.append(weakref.WeakMethod(callback))
+        else:
+            self._change_listeners.append(lambda: callback)
+
+    def unsubscribe_changes(self, callback: Callable[[int, int, int, int], None]):
+        self._change_listeners = [ref for ref in self._change_listeners if ref() not in (None, callback)]
+
+    def _listeners(self) -> list[Callable[[int, int, int, int], None]]:
+        """Live callbacks, the ones whose owner was collected are dropped."""
+        callbacks = [ref() for ref in self._change_listeners]
+        self._change_listeners = [ref for ref, callback in zip(self._change_listeners, callbacks) if callback is not None]
+        return [callback for callback in callbacks if callback is not None]
+
+    def notify_changed(self, x0: int, y0: int, x1: int, y1: int):
+        """
+        Tell the caches built on the world layers (pathfinding costs, ...) that the tiles
+        in [x0, x1) x [y0, y1) changed. Call it after editing topology or obstacle directly.
+        """
+        for callback in self._listeners():
+            callback(x0, y0, x1, y1)
 
     def __str__(self):
         return f"World: size_x = {self.size_x}, size_y = {self.size_y}"
 
     def generate(self) -> Self:
-        self.tiles, self.elements, self.topology, self.obstacle = self.gen.generate()
\ No newline at end of file
+        self.gen.generate()
+        return self.adopt(self.gen)
+
+    def adopt(self, gen: WorldGen) -> Self:
+        """
+        Swap in the layers of an already generated WorldGen.
+        Call it from the main loop between frames so the swap is atomic for the painters.
+        """
+        self.gen = gen
+        self.tiles, self.elements, self.topology, self.obstacle = gen.tiles, gen.elements, gen.topology, gen.obstacle
+        self.ground_cover = gen.ground_cover
+        return self
+
+    def plant_at(self, x: float, y: float) -> str | None:
+        """Ground-cover plant at world coordinates (tiles), None for bare ground."""
+        N = self.gen.config.TILE_SUBDIVISIONS
+        return ground_cover.plant_at(self.ground_cover, int(x * N), int(y * N))
+
+    def harvest_plant(self, x: float, y: float) -> str | None:
+        """Removes the ground-cover plant at world coordinates and returns its name."""
+        N = self.gen.config.TILE_SUBDIVISIONS
+        return ground_cover.harvest(self.ground_cover, int(x * N), int(y * N))
\ No newline at end of file
@@ -0,0 +1,54 @@
+import threading
+
+from .world_generator import WorldGen, WorldGenConfig
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class WorldGenTask:
+    """
+    Runs WorldGen.generate_steps() on a background thread into a fresh WorldGen,
+    so the world currently on screen is never touched while generating.
+
+    The main loop polls `progress`/`stage` to draw an overlay and, once `done`,
+    swaps the result in with World.get_instance().adopt(task.gen).
+    """
+
+    def __init__(self, config: WorldGenConfig | None = None):
+        self.config: WorldGenConfig | None = config
+        self.gen: WorldGen | None = None
+        self.stage: str = "queued"
+        self.progress: float = 0.0
+        self.error: BaseException | None = None
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="worldgen", daemon=True)
+
+    def start(self) -> "WorldGenTask":
+        self._thread.start()
+        return self
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.done and self.error is None
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _run(self):
+        try:
+            self.stage = "allocating"
+            gen = WorldGen(config=self.config)
+            for stage, progress in gen.generate_steps():
+                self.stage, self.progress = stage, progress
+                logger.debug(f"World generation: {stage} ({progress:.0%})")
+            self.gen = gen
+        except BaseException as e:
+            logger.error(f"World generation failed: {e}")
+            self.error = e
+        finally:
+            self._done.set()
@@ -1,7 +1,6 @@
 import numpy as np
 import random
 from collections import deque
-from scipy.ndimage import label
 from functools import cached_property
 from pydantic.dataclasses import dataclass
 from pathlib import Path
@@ -9,9 +8,12 @@ import json
 
 from terrain import TERRAIN_DATA, load_terrains_data
 from tree import Tree, TREE_DATA, load_trees
+from plant import PLANT_DATA, load_plants
 
 from .tile import Tile
 from .topology import generate_topological_map, visualize_topological_map
+from .memory_planner import MEMMAP_CANDIDATES, MemoryPlan, plan_world_memory
+from .ground_cover import fill_ground_cover
 
 import logging
 logger = logging.getLogger(__name__)
@@ -25,6 +27,10 @@ class WorldGenConfig:
     WATER_RATIO:float = 0.1
     MOUNTAIN_RATIO:float = 0.15
     ICE_CAP_RATIO:float = 0.01
+    MEMORY_BUDGET_MB: float = 1024
+    TOPOLOGY_DTYPE: str | None = None  # None -> picked by the memory planner
+    MEMMAP_DIR: str | None = None      # where layers spill when over budget
+    DEBUG_MAPS: bool = False           # save topological_map.png on every generation
 
     def __str__(self) -> str:
         return (
@@ -55,11 +61,25 @@ class WorldGen:
         self.config:WorldGenConfig = WorldGenConfig() if config is None else config
 
 
+        # Fail fast before allocating anything too big
+        self.memory_plan: MemoryPlan = plan_world_memory(self.config)
+        self.memory_plan.check()
+
         logger.info("Generating world ...")
-        self.tiles: np.ndarray[Tile] = np.empty((self.height, self.width), dtype=object)
-        self.elements: np.ndarray = np.empty((self.topo_height, self.topo_width), dtype=object)
-        self.topology: np.ndarray[np.float16] = np.zeros((self.topo_height, self.topo_width), dtype=np.float16)
-        self.obstacle: np.ndarray[np.bool_] = np.zeros((self.topo_height, self.topo_width), dtype=np.bool_)
+        self.tiles: np.ndarray[Tile] = self.memory_plan.allocate("tiles")
+        self.elements: np.ndarray = self.memory_plan.allocate("elements")
+        self.topology: np.ndarray = self.memory_plan.allocate("topology")
+        self.obstacle: np.ndarray[np.bool_] = self.memory_plan.allocate("obstacle")
+        self.ground_cover: np.ndarray[np.uint8] = self.memory_plan.allocate("ground_cover")
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        # spilled layers arrive in RAM: copy them back to files in the spill dir of the unpickled plan
+        for name in MEMMAP_CANDIDATES:
+            if self.memory_plan[name].storage == "memmap":
+                layer = self.memory_plan.allocate(name)
+                layer[...] = getattr(self, name)
+                setattr(self, name, layer)
 
     def reset(self):
         # --- clear previous generation ---
@@ -67,6 +87,7 @@ class WorldGen:
         self.elements[:, :] = None               # clears all Trees / objects
         self.topology[:, :] = 0                  # reset heights
         self.obstacle[:, :] = 0                  # reset obstacles
+        self.ground_cover[:, :] = 0              # clear plants
 
     @property
     def width(self)->int:
@@ -108,11 +129,39 @@ class WorldGen:
     def __str__(self):
         return self.config.__str__()
 
+    def relink_terrains(self):
+        """
+        Point every tile back at the TERRAIN_DATA model of the same name.
+        Needed after unpickling a world and after terrain data was hot reloaded.
+        """
+        for tile in self.tiles.flat:
+            if tile is not None and tile.terrain is not None:
+                tile.terrain = TERRAIN_DATA.get(tile.terrain.name, tile.terrain)
+
+    def relink_trees(self):
+        """
+        Copy the TREE_DATA model of the same name into every tree, age and hp kept.
+        Needed after unpickling a world and after tree data was hot reloaded.
+        """
+        for obj in self.elements[self.elements != None]:  # noqa: E711, element-wise on the object array
+            if isinstance(obj, Tree) and obj.name in TREE_DATA:
+                obj.apply_model(TREE_DATA[obj.name])
+
 
     def generate(self):
         """
         Generates the height map and assigns terrains based on height.
 
+        """
+        for _ in self.generate_steps():
+            pass
+        return self.tiles, self.elements, self.topology, self.obstacle
+
+    def generate_steps(self):
+        """
+        Same as generate(), but as a generator yielding (stage, progress) after
+        each stage so callers can report progress or interleave other work.
+        progress is the completed fraction in [0, 1].
         """
         self.reset()
         # 0. Loading neccesary data
@@ -122,23 +171,31 @@ class WorldGen:
         if len(TERRAIN_DATA) == 0:
             load_terrains_data()
 
+        if len(PLANT_DATA) == 0:
+            load_plants()
+
         logger.info(f"Terrain models:{len(TERRAIN_DATA)}")
         logger.info(f"Tree models:{len(TREE_DATA)}")
+        logger.info(f"Plant models:{len(PLANT_DATA)}")
+        yield "data loaded", 0.05
 
         logger.info(" ... pre-allocating world tiles")
         # 1. populate world with Tiles
         for y in range(self.height):
             for x in range(self.width):
                 self.tiles[y, x] = Tile()
+        yield "tiles allocated", 0.10
 
-        # 2. build topological map
-        self.topology = generate_topological_map(
+        # 2. build topological map (written in place, keeps the planned dtype/storage)
+        self.topology[:, :] = generate_topological_map(
             self.topo_width, self.topo_height, n_of_peaks=random.randint(5, 10)
         )
-        visualize_topological_map(self.topology)
+        if self.config.DEBUG_MAPS:
+            visualize_topological_map(self.topology)
         # invalidate cached tile_height_map
         if "tile_heights_map" in self.__dict__:
             del self.__dict__["tile_heights_map"]
+        yield "topology built", 0.40
 
         # 3. Compute thresholds from height distribution
         flat_heights = self.tile_heights_map.flatten()
@@ -159,6 +216,7 @@ class WorldGen:
                     self.set_tile(x, y, Tile(terrain=TERRAIN_DATA["mountain"]))
                 else:
                     self.set_tile(x, y, Tile(terrain=TERRAIN_DATA["grassland"]))
+        yield "terrains assigned", 0.50
 
         # 5. Calsify water bodies
         self.water_map = np.array(
@@ -167,16 +225,22 @@ class WorldGen:
             dtype=np.int8
         )
         self.classify_water_bodies()
+        yield "water bodies classified", 0.60
 
         # 6. Add rivers
         attempts = 0
         while attempts < 10 and self.carve_river_fast() == 0:
             attempts += 1
+        yield "rivers carved", 0.70
 
         self.generate_forest_patches()
+        yield "forests planted", 0.75
+
         self.populate_trees()
+        yield "trees populated", 0.90
 
-        return self.tiles, self.elements, self.topology, self.obstacle
+        self.grow_ground_cover()
+        yield "ground cover grown", 1.0
 
     def carve_rivers(self):
         """
@@ -184,6 +248,7 @@ class WorldGen:
         This method is kept as is from your original code.
         """
         logger.debug("Generating river")
+        from scipy.ndimage import label
 
         # --- 1. Pick headwater from mountain tiles ---
         mountain_coords = [
@@ -278,6 +343,7 @@ class WorldGen:
             int: Number of river tiles carved.
         """
         logger.debug("Generating river (fast)")
+        from scipy.ndimage import label
         max_attempts = max(self.width, self.height) / lateral_chance
 
         # --- 1. Pick headwater from mountain tiles ---
@@ -392,6 +458,7 @@ class WorldGen:
         Lakes and ponds must be surrounded by land.
         """
         logger.info("Classifying water bodies...")
+        from scipy.ndimage import label
 
         # Label connected water regions
         labeled, num_features = label(self.water_map)
@@ -519,3 +586,24 @@ class WorldGen:
                 t = Tree(model=TREE_DATA[tree_model])
                 t.set_coordinates(world_x, world_y)
                 self.elements[y,x] = t
+
+    def grow_ground_cover(self):
+        """
+        Fills the uint8 ground_cover layer (subdivision resolution) with plant codes,
+        picked from each terrain's vegetation.plants and thinned by moisture.
+        """
+        logger.info("Growing ground cover...")
+
+        N = self.config.TILE_SUBDIVISIONS
+        terrains = list(TERRAIN_DATA.values())
+        index = {terrain.name: i for i, terrain in enumerate(terrains)}
+        tile_ids = np.array(
+            [[index[self.get_tile(x, y).terrain.name] for x in range(self.width)]
+             for y in range(self.height)],
+            dtype=np.uint8
+        )
+        terrain_ids = np.repeat(np.repeat(tile_ids, N, axis=0), N, axis=1)
+        water = np.repeat(np.repeat(self.water_map.astype(np.bool_), N, axis=0), N, axis=1)
+
+        fill_ground_cover(self.ground_cover, terrain_ids, water,
+                          [terrain.vegetation.plants for terrain in terrains])
@@ -0,0 +1,73 @@
+import random
+import multiprocessing
+import numpy as np
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from .world_generator import WorldGen, WorldGenConfig
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def _generate_in_worker(config: WorldGenConfig, seed: int) -> WorldGen:
+    """Worker entry point: generate a full world with its own seed."""
+    random.seed(seed)
+    np.random.seed(seed)
+    gen = WorldGen(config=config)
+    gen.generate()
+    return gen
+
+
+class WorldPrefetcher:
+    """
+    Double buffer for world generation: while the current world is played, the next
+    candidate is generated in a background process into a spare WorldGen.
+
+    take() hands the spare over (so regenerating is an instant swap) and
+    immediately starts generating the following one.
+    """
+
+    def __init__(self, config: WorldGenConfig | None = None):
+        self.config: WorldGenConfig = WorldGenConfig() if config is None else config
+        # spawn: the worker must not inherit the SDL/pygame state of the game process
+        self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        self._pending: Future | None = None
+        self._ready: WorldGen | None = None
+
+    def prefetch(self) -> "WorldPrefetcher":
+        """Start generating the next world unless one is already on its way."""
+        if self._pending is None and self._ready is None:
+            seed = random.randrange(2 ** 32)
+            logger.info(f"Pre-generating next world (seed={seed}) ...")
+            self._pending = self._executor.submit(_generate_in_worker, self.config, seed)
+            self._pending.add_done_callback(self._on_done)
+        return self
+
+    def _on_done(self, future: Future):
+        # Runs on the executor's result thread: unpickling and relinking stay off the frame
+        try:
+            gen = future.result()
+            gen.relink_terrains()  # unpickled tiles hold terrain copies
+            self._ready = gen
+            logger.info("Next world ready")
+        except Exception as e:
+            logger.error(f"World pre-generation failed: {e}")
+        finally:
+            self._pending = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready is not None
+
+    def take(self) -> WorldGen | None:
+        """Return the pre-generated world (or None if not ready yet) and queue the next one."""
+        gen, self._ready = self._ready, None
+        if gen is not None:
+            gen.relink_trees()  # the worker's tree models, or data reloaded since it finished
+        self.prefetch()
+        return gen
+
+    def shutdown(self):
+        if self._pending is not None:
+            self._pending.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,10 @@
-from tree import load_trees
+from tree import Tree, TREE_DATA, load_trees
 from terrain import load_terrains_data
-from world import World, WorldGen, WorldGenConfig
+from plant import PLANT_NAMES, load_plants
+from world import World, WorldGen, WorldGenConfig, WorldGenTask, WorldPrefetcher
+from world import ground_cover
+from catalog import DataWatcher
+from knowledge_tree import KnowledgeTree
 from minimap import MiniMap
 
 import traceback
@@ -12,7 +16,7 @@ import threading
 import controls
 from camera import Camera
 from rendering import Layer
-from character import Human
+from character import Character, Human
 
 from manager import Manager
 from pygame_interface import PGISelectionController
@@ -21,6 +25,8 @@ from pygame_interface import PGIAgentControl
 from pygame_interface import PGIAgentPathPainter
 from pygame_interface import PGIWorldPainter
 from pygame_interface import PGIWorldObjectSetPainter
+from pygame_interface import PGIProgressOverlay
+from pygame_interface import clear_texture_caches
 # --- Logging setup ---
 logger = logging.getLogger("main")
 PROJECT_PREFIXES = ("main","world", "terrain", "pgi", "manager", "tree")
@@ -37,6 +43,9 @@ for name, log_obj in logging.root.manager.loggerDict.items():
 FPS = 120
 SCREEN_WIDTH, SCREEN_HEIGHT = 1600, 1000
 WORLD_WIDTH, WORLD_HEIGHT = 160, 100
+PREGENERATE_NEXT_WORLD = True  # keep a spare world generated in a background process
+HOT_RELOAD_DATA = True          # re-read edited json_files/ data while the game runs
+HOT_RELOAD_INTERVAL = 1.0       # seconds between checks of the data files
 
 # --- Initialize world ---
 world_config = WorldGenConfig(  SIZE_X= 50,
@@ -92,6 +101,60 @@ agent_controler = PGIAgentControl(manager=manager)
 # --- Overlay ---
 show_overlay = False
 
+# --- World regeneration ---
+regen_task: WorldGenTask | None = None
+progress_overlay = PGIProgressOverlay()
+prefetcher = WorldPrefetcher(config=world_config).prefetch() if PREGENERATE_NEXT_WORLD else None
+
+def swap_world(gen: WorldGen):
+    """Swap a freshly generated world in and reset everything built on the old layers."""
+    previous = World.get_instance().gen
+    World.get_instance().adopt(gen)
+    minimap.needs_redraw = True
+    world_painter.reset()
+    elemt_painter.reset()
+    manager.reset()
+    agent_controler.path_finder.reset()
+    if previous is not gen:
+        previous.memory_plan.cleanup()  # its memory-mapped layers, if any
+
+# --- Data hot reload ---
+def on_terrains_reloaded(_):
+    load_terrains_data()
+    world = World.get_instance()
+    world.gen.relink_terrains()
+    world.notify_changed(0, 0, world.size_x, world.size_y)  # path costs follow the reloaded terrains
+    clear_texture_caches()
+    world_painter.reset()
+    minimap.needs_redraw = True
+
+def on_trees_reloaded(_):
+    load_trees()
+    for obj in manager.static_objects:
+        if isinstance(obj, Tree) and obj.name in TREE_DATA:
+            obj.apply_model(TREE_DATA[obj.name])
+    clear_texture_caches()
+    elemt_painter.reset()
+
+def on_plants_reloaded(_):
+    old_names = list(PLANT_NAMES)
+    load_plants()
+    ground_cover.remap_codes(World.get_instance().ground_cover, old_names, PLANT_NAMES)
+    minimap.needs_redraw = True
+
+def on_knowledge_reloaded(_):
+    for agent in manager.get_agents():
+        if isinstance(agent, Character):
+            agent.knowledge = KnowledgeTree.LoadTree().restore_unlocks(agent.knowledge)
+
+data_watcher = None
+if HOT_RELOAD_DATA:
+    data_watcher = DataWatcher(names=["terrains", "trees", "plants", "knowledge"], interval=HOT_RELOAD_INTERVAL)
+    data_watcher.subscribe("terrains", on_terrains_reloaded)
+    data_watcher.subscribe("trees", on_trees_reloaded)
+    data_watcher.subscribe("plants", on_plants_reloaded)
+    data_watcher.subscribe("knowledge", on_knowledge_reloaded)
+
 # --- Main loop ---
 try:
     manager.resume()
@@ -112,15 +175,25 @@ try:
             elif event.type == pygame.KEYDOWN:
                 if event.key == controls.TOGGLE_OVERLAY_KEY:
                     show_overlay = not show_overlay
-                if event.key == controls.REGENERATE_WORLD_KEY:
-                    World.get_instance().generate()
-                    minimap.needs_redraw = True
-                    world_painter.reset()
-                    manager.reset()
+                if event.key == controls.REGENERATE_WORLD_KEY and regen_task is None:
+                    if prefetcher is not None and prefetcher.ready:
+                        # spare world already generated: instant swap
+                        swap_world(prefetcher.take())
+                    else:
+                        # generate in the background, the loop keeps pumping events
+                        regen_task = WorldGenTask(config=world_config).start()
                 if event.key == controls.PAUSE_GAME_KEY:
                     manager.toggle_pause()
                     print("game paused" if manager.paused else "game resumed")
 
+        if data_watcher is not None:
+            data_watcher.poll()
+
+        if regen_task is not None and regen_task.done:
+            if regen_task.succeeded:
+                swap_world(regen_task.gen)
+            regen_task = None
+
         # update selection
         pgi_selector.handle_events(events, manager.get_agents())
         agent_controler.command_agents(events)
@@ -162,6 +235,9 @@ try:
         screen.blit(fps_text, (SCREEN_WIDTH - 80, SCREEN_HEIGHT-30))
 
         # --- Overlay ---
+        if regen_task is not None:
+            progress_overlay.draw(screen, regen_task.stage, regen_task.progress)
+
         pygame.display.flip()
         clock.tick(FPS)
 except Exception as e:
@@ -171,6 +247,11 @@ except Exception as e:
     pygame.quit()
     sys.exit()
 finally:
+    if prefetcher is not None:
+        prefetcher.shutdown()
+    agent_controler.path_service.shutdown()
+    agent_controler.nearest.close()
+    agent_controler.path_finder.close()
     pygame.event.clear()
     pygame.quit()
     sys.exit()